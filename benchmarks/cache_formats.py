@@ -0,0 +1,83 @@
+"""Compare the json and binary cache files by size and by the time to save and load them.
+
+Each format saves the same entries, then times opening the cache and reading one location.
+
+    python benchmarks/cache_formats.py
+"""
+
+from __future__ import annotations
+
+import tempfile
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from timeit import repeat
+from typing import Callable
+
+from cache_loads import CURRENT, LOCATION, ONE_CALL
+from rich.console import Console
+from rich.table import Table
+
+from weather_command._storage import BinaryCacheStorage, JsonCacheStorage
+from weather_command.models.cache import CacheItem, CurrentWeatherCache, OneCallWeatherCache
+from weather_command.models.location import Location
+from weather_command.models.weather import CurrentWeather, OneCallWeather
+
+console = Console()
+
+ENTRY_COUNTS = (10, 100, 1_000)
+REPEAT = 5
+FORMATS: dict[str, Callable[[Path], JsonCacheStorage]] = {
+    "json": JsonCacheStorage,
+    "binary": BinaryCacheStorage,
+    "binary + zlib": partial(BinaryCacheStorage, compress=True),
+}
+
+
+def _cache_item() -> CacheItem:
+    saved = datetime.now(tz=timezone.utc)
+    return CacheItem(
+        location=Location.model_validate(LOCATION[0]),
+        current_weather=CurrentWeatherCache(
+            date_time_saved=saved, current_weather=CurrentWeather.model_validate(CURRENT)
+        ),
+        one_call_weather=OneCallWeatherCache(
+            date_time_saved=saved, one_call_weather=OneCallWeather.model_validate(ONE_CALL)
+        ),
+        last_accessed=saved,
+    )
+
+
+def main() -> None:
+    item = _cache_item()
+    table = Table("Entries", "Format", "Size (KB)", "Save (ms)", "Load (ms)")
+    for entries in ENTRY_COUNTS:
+        cache: dict[str, CacheItem | dict] = {f"key-{i}": item for i in range(entries)}
+        for name, storage_type in FORMATS.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                cache_dir = Path(tmp)
+                storage = storage_type(cache_dir)
+                save = min(
+                    repeat(
+                        lambda: storage._write_snapshot(cache, storage.cache_file),
+                        number=1,
+                        repeat=REPEAT,
+                    )
+                )
+                load = min(
+                    repeat(lambda: storage_type(cache_dir).get("key-0"), number=1, repeat=REPEAT)
+                )
+                size = storage.cache_file.stat().st_size
+                table.add_row(
+                    str(entries),
+                    name,
+                    f"{size / 1024:.1f}",
+                    f"{save * 1000:.1f}",
+                    f"{load * 1000:.1f}",
+                )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
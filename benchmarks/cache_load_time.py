@@ -0,0 +1,68 @@
+"""Time opening the json cache and reading one location as the number of cached entries grows.
+
+Lazy is the storage as it is used, where only the entry that is looked up is validated. Eager
+validates every entry, which is what loading the cache cost before entries were kept as raw json
+until they were read.
+
+    python benchmarks/cache_load_time.py
+"""
+
+from __future__ import annotations
+
+import json
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from timeit import repeat
+
+from cache_loads import CURRENT, LOCATION, ONE_CALL
+from rich.console import Console
+from rich.table import Table
+
+from weather_command._storage import DateTimeEncoder, JsonCacheStorage
+from weather_command.models.cache import CACHE_SCHEMA_VERSION
+
+console = Console()
+
+ENTRY_COUNTS = (10, 100, 1_000, 5_000)
+REPEAT = 5
+
+
+def _write_cache(cache_dir: Path, entries: int) -> None:
+    saved = datetime.now(tz=timezone.utc)
+    entry = {
+        "location": {**LOCATION[0], "lat": str(LOCATION[0]["lat"]), "lon": str(LOCATION[0]["lon"])},
+        "currentWeather": {"date_time_saved": saved, "current_weather": CURRENT},
+        "oneCallWeather": {"date_time_saved": saved, "one_call_weather": ONE_CALL},
+        "lastAccessed": saved,
+        "schemaVersion": CACHE_SCHEMA_VERSION,
+    }
+    with open(cache_dir / "cache.json", "w") as f:
+        json.dump({f"key-{i}": entry for i in range(entries)}, f, cls=DateTimeEncoder)
+
+
+def _lazy(cache_dir: Path) -> None:
+    JsonCacheStorage(cache_dir).get("key-0")
+
+
+def _eager(cache_dir: Path) -> None:
+    storage = JsonCacheStorage(cache_dir)
+    for key in storage.keys():
+        storage.get(key)
+
+
+def main() -> None:
+    table = Table("Entries", "Lazy (ms)", "Eager (ms)")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp)
+        for entries in ENTRY_COUNTS:
+            _write_cache(cache_dir, entries)
+            lazy = min(repeat(lambda: _lazy(cache_dir), number=1, repeat=REPEAT))
+            eager = min(repeat(lambda: _eager(cache_dir), number=1, repeat=REPEAT))
+            table.add_row(str(entries), f"{lazy * 1000:.1f}", f"{eager * 1000:.1f}")
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Count how many times a single `weather` invocation reads and validates the cache file.
+
+Runs the CLI twice against mocked HTTP responses, once with an empty cache directory (cold) and
+once with the cache populated by the first run (warm).
+
+    python benchmarks/cache_loads.py
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+from rich.console import Console
+from typer.testing import CliRunner
+
+from weather_command import _cache
+from weather_command._cache import Cache
+from weather_command._config import load_settings
+from weather_command._storage import JsonCacheStorage
+from weather_command.main import app
+from weather_command.models.cache import CacheItem
+
+console = Console()
+
+LOCATION = [{"display_name": "Greensboro, NC", "lat": 36.1056, "lon": -79.7569}]
+WEATHER_ITEM = [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}]
+CURRENT = {
+    "coord": {"lon": -79.7569, "lat": 36.1056},
+    "weather": WEATHER_ITEM,
+    "base": "stations",
+    "main": {"temp": 20.1, "feels_like": 20.3, "pressure": 1015, "humidity": 70},
+    "dt": 1632878438,
+    "sys": {"country": "US", "sunrise": 1632827507, "sunset": 1632870436},
+    "timezone": -14400,
+    "id": 4469146,
+    "name": "Greensboro",
+    "cod": 200,
+}
+ONE_CALL = {
+    "lat": 36.1056,
+    "lon": -79.7569,
+    "timezone": "America/New_York",
+    "timezone_offset": -14400,
+    "current": {
+        "dt": 1632878438,
+        "sunrise": 1632827507,
+        "sunset": 1632870436,
+        "weather": WEATHER_ITEM,
+    },
+    "minutely": [{"dt": 1632878460 + i * 60, "precipitation": 0} for i in range(60)],
+    "hourly": [{"dt": 1632877200 + i * 3600, "weather": WEATHER_ITEM} for i in range(48)],
+    "daily": [
+        {
+            "dt": 1632848400 + i * 86400,
+            "sunrise": 1632827507,
+            "sunset": 1632870436,
+            "moonrise": 1632887700,
+            "moonset": 1632853200,
+            "moon_phase": 0.75,
+            "temp": {"day": 29.18, "min": 14.95, "max": 29.7},
+            "feels_like": {"day": 28.36},
+            "weather": WEATHER_ITEM,
+        }
+        for i in range(8)
+    ],
+}
+
+
+def _response(data: Any) -> httpx.Response:
+    return httpx.Response(200, request=httpx.Request("GET", "https://localhost"), json=data)
+
+
+def _run(cache_dir: Path) -> tuple[int, int]:
+    counts = {"loads": 0, "validations": 0}
+    original_load = JsonCacheStorage._load
+    original_init = CacheItem.__init__
+
+    def counting_load(self: JsonCacheStorage) -> Any:
+        counts["loads"] += 1
+        return original_load(self)
+
+    def counting_init(self: CacheItem, **data: Any) -> None:
+        counts["validations"] += 1
+        original_init(self, **data)
+
+    async def mock_get(*args: Any, **kwargs: Any) -> httpx.Response:
+        if "nominatim" in args[1]:
+            return _response(LOCATION)
+
+        return _response(ONE_CALL if "onecall" in args[1] else CURRENT)
+
+    with patch.object(Cache, "get_default_directory", return_value=cache_dir), patch.object(
+        JsonCacheStorage, "_load", counting_load
+    ), patch.object(CacheItem, "__init__", counting_init), patch.object(
+        httpx.AsyncClient, "get", mock_get
+    ):
+        CliRunner().invoke(app, ["city", "Greensboro", "-f", "daily"], catch_exceptions=False)
+
+    _cache.get_cache.cache_clear()
+    _cache.get_geocode_index.cache_clear()
+    load_settings.cache_clear()
+
+    return counts["loads"], counts["validations"]
+
+
+def main() -> None:
+    os.environ.setdefault("OPEN_WEATHER_API_KEY", "benchmark")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp) / "weather-command"
+        for label in ("cold", "warm"):
+            loads, validations = _run(cache_dir)
+            console.print(f"{label}: {loads} cache file reads, {validations} CacheItem validations")
+
+
+if __name__ == "__main__":
+    main()
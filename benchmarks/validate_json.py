@@ -0,0 +1,49 @@
+"""Compare validating a one call weather response from a parsed dict and straight from bytes.
+
+Uses the one call payload saved in the test cache file, which includes the minutely, hourly and
+daily forecasts.
+
+    python benchmarks/validate_json.py
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from timeit import repeat
+
+from rich.console import Console
+
+from weather_command.models.weather import OneCallWeather
+
+console = Console()
+
+ASSETS_PATH = Path(__file__).parents[1] / "tests" / "assets"
+NUMBER = 1_000
+REPEAT = 5
+
+
+def _payload() -> bytes:
+    with open(ASSETS_PATH / "cache.json") as f:
+        cache = json.load(f)
+
+    entry = next(v for v in cache.values() if v.get("oneCallWeather"))
+    return json.dumps(entry["oneCallWeather"]["one_call_weather"]).encode()
+
+
+def main() -> None:
+    payload = _payload()
+    from_dict = min(
+        repeat(lambda: OneCallWeather(**json.loads(payload)), number=NUMBER, repeat=REPEAT)
+    )
+    from_bytes = min(
+        repeat(lambda: OneCallWeather.model_validate_json(payload), number=NUMBER, repeat=REPEAT)
+    )
+
+    console.print(f"payload: {len(payload) / 1024:.1f} KB")
+    console.print(f"json.loads + OneCallWeather(**data): {from_dict / NUMBER * 1e6:.0f} µs")
+    console.print(f"OneCallWeather.model_validate_json: {from_bytes / NUMBER * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,18 +8,23 @@ import pytest
 from typer.testing import CliRunner
 
 from weather_command._builder import (
+    _c_to_f,
     _format_date_time,
     _format_precip,
     _format_pressure,
     _format_sunrise_sunset,
+    _format_temp,
     _format_wind,
     _get_units,
     _hpa_to_in,
     _mm_to_in,
+    _mps_to_kph,
+    _mps_to_mph,
     _round_to_int,
 )
-from weather_command._cache import Cache
+from weather_command._cache import Cache, get_cache, get_geocode_index
 from weather_command._config import Settings, append_api_key, load_settings
+from weather_command._http import get_client
 from weather_command._location import build_location_url
 from weather_command._weather import get_icon
 from weather_command.models.location import Location
@@ -36,17 +41,36 @@ def clear_lru_cache():
     build_location_url.cache_clear()
     load_settings.cache_clear()
     get_icon.cache_clear()
+    get_cache.cache_clear()
+    get_geocode_index.cache_clear()
+    get_client.cache_clear()
+    _c_to_f.cache_clear()
     _format_date_time.cache_clear()
     _format_precip.cache_clear()
     _format_pressure.cache_clear()
     _format_sunrise_sunset.cache_clear()
+    _format_temp.cache_clear()
     _format_wind.cache_clear()
     _get_units.cache_clear()
     _hpa_to_in.cache_clear()
     _mm_to_in.cache_clear()
+    _mps_to_kph.cache_clear()
+    _mps_to_mph.cache_clear()
     _round_to_int.cache_clear()
 
 
+@pytest.fixture(autouse=True)
+def no_retry_backoff(monkeypatch):
+    """Retry failed requests right away so tests of them don't wait."""
+    monkeypatch.setattr("weather_command._http.BACKOFF_INITIAL_SECONDS", 0)
+
+
+@pytest.fixture(autouse=True)
+def no_geocode_spacing(monkeypatch):
+    """Geocode without waiting a second since the last request so tests don't wait."""
+    monkeypatch.setattr("weather_command._location.NOMINATIM_INTERVAL_SECONDS", 0)
+
+
 @pytest.fixture(autouse=True, scope="session")
 def dont_write_to_home_cache_directory():
     """Makes sure a default directory is specified for cache so that the home directory is not
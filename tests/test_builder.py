@@ -1,12 +1,8 @@
-from datetime import datetime, timezone
 from os import getenv
-from unittest.mock import Mock, patch
 
-import httpx
 import pytest
 
 from weather_command import _builder
-from weather_command._cache import CacheItem
 from weather_command._config import WEATHER_BASE_URL
 from weather_command._utils import build_weather_url
 from weather_command.models.weather import PrecipAmount, Wind
@@ -50,35 +46,32 @@ def test_current_weather_temp(
     assert table.row_count == 1
 
 
-@patch("weather_command._builder.get_location_details")
-@patch("weather_command._cache.Cache.get")
-@pytest.mark.usefixtures("mock_cache_dir")
-async def test_current_weather_no_cache_hit(
-    mock_cache_get_call,
-    mock_location_details_call,
-    mock_current_weather_response,
-    mock_location,
-    monkeypatch,
+@pytest.mark.parametrize("units", UNITS)
+@pytest.mark.parametrize("am_pm", [False, True])
+@pytest.mark.parametrize("rain", [None, PrecipAmount(one_hour=0.1)])  # type: ignore
+@pytest.mark.parametrize("snow", [None, PrecipAmount(one_hour=0.1)])  # type: ignore
+def test_current_weather_all_one_call(
+    mock_one_call_weather, units, am_pm, rain, snow, mock_location
 ):
-    async def mock_get_weather_response(*args, **kwargs):
-        return mock_current_weather_response
+    mock_one_call_weather.current.rain = rain
+    mock_one_call_weather.current.snow = snow
 
-    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
-    mock_cache_get_call.return_value = CacheItem()
-    mock_location_details_call.return_value = mock_location
-    await _builder.show_current("zip", "27455")
-    mock_cache_get_call.assert_called()
-    mock_location_details_call.assert_called()
+    table = _builder.current_weather_all(mock_one_call_weather, units, am_pm, mock_location)
+    assert len(table.columns) == 12
+    assert table.row_count == 1
+
+
+@pytest.mark.parametrize("units", UNITS)
+def test_current_weather_temp_one_call(mock_one_call_weather, units, mock_location):
+    table = _builder._current_weather_temp(mock_one_call_weather, units, mock_location)
+    assert len(table.columns) == 2
+    assert table.row_count == 1
 
 
 @pytest.mark.parametrize("pager", [True, False])
 @pytest.mark.parametrize("temp_only", [True, False])
-@pytest.mark.parametrize("how, city_zip", [("zip", "27455"), ("city", "greensboro")])
-@pytest.mark.usefixtures("mock_cache_dir_with_file")
-@patch("weather_command._cache.datetime")
-async def test_current_weather_cache_hit(mock_dt, how, city_zip, temp_only, pager, capfd):
-    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
-    await _builder.show_current(how, city_zip, temp_only=temp_only, pager=pager)
+def test_show_current(mock_current_weather, mock_location, temp_only, pager, capfd):
+    _builder.show_current(mock_current_weather, mock_location, temp_only=temp_only, pager=pager)
     out, _ = capfd.readouterr()
     assert "Greensboro" in out
 
@@ -109,35 +102,10 @@ def test_daily_temp_only(mock_one_call_weather, mock_location, units, am_pm):
     assert table.row_count == len(mock_one_call_weather.daily)
 
 
-@patch("weather_command._builder.get_location_details")
-@patch("weather_command._cache.Cache.get")
-@pytest.mark.usefixtures("mock_cache_dir")
-async def test_show_daily_no_cache_hit(
-    mock_cache_get_call,
-    mock_location_details_call,
-    mock_one_call_weather_response,
-    mock_location,
-    monkeypatch,
-):
-    async def mock_get_weather_response(*args, **kwargs):
-        return mock_one_call_weather_response
-
-    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
-
-    mock_cache_get_call.return_value = CacheItem()
-    mock_location_details_call.return_value = mock_location
-    await _builder.show_daily("zip", "27455")
-    mock_cache_get_call.assert_called()
-    mock_location_details_call.assert_called()
-
-
 @pytest.mark.parametrize("pager", [True, False])
 @pytest.mark.parametrize("temp_only", [True, False])
-@pytest.mark.usefixtures("mock_cache_dir_with_file")
-@patch("weather_command._cache.datetime")
-async def test_show_daily_cache_hit(mock_dt, temp_only, pager, capfd):
-    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
-    await _builder.show_daily("zip", "27455", temp_only=temp_only, pager=pager)
+def test_show_daily(mock_one_call_weather, mock_location, temp_only, pager, capfd):
+    _builder.show_daily(mock_one_call_weather, mock_location, temp_only=temp_only, pager=pager)
     out, _ = capfd.readouterr()
     assert "Greensboro" in out
 
@@ -188,80 +156,66 @@ def test_hourly_temp_only(mock_one_call_weather, mock_location, units, am_pm):
     assert table.row_count == len(mock_one_call_weather.hourly)
 
 
-@patch("weather_command._builder.get_location_details")
-@patch("weather_command._cache.Cache.get")
-@pytest.mark.usefixtures("mock_cache_dir")
-async def test_show_hourly_no_cache_hit(
-    mock_cache_get_call,
-    mock_location_details_call,
-    mock_one_call_weather_response,
-    mock_location,
-    monkeypatch,
-):
-    async def mock_get_weather_response(*args, **kwargs):
-        return mock_one_call_weather_response
-
-    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
-
-    mock_cache_get_call.return_value = CacheItem()
-    mock_location_details_call.return_value = mock_location
-    await _builder.show_hourly("zip", "27455")
-    mock_cache_get_call.assert_called()
-    mock_location_details_call.assert_called()
-
-
 @pytest.mark.parametrize("pager", [True, False])
 @pytest.mark.parametrize("temp_only", [True, False])
-@pytest.mark.usefixtures("mock_cache_dir_with_file")
-@patch("weather_command._cache.datetime")
-async def test_show_hourly_cache_hit(mock_dt, temp_only, pager, capfd):
-    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
-    await _builder.show_hourly("zip", "27455", temp_only=temp_only, pager=pager)
+def test_show_hourly(mock_one_call_weather, mock_location, temp_only, pager, capfd):
+    _builder.show_hourly(mock_one_call_weather, mock_location, temp_only=temp_only, pager=pager)
     out, _ = capfd.readouterr()
     assert "Greensboro" in out
 
 
-@pytest.mark.parametrize("units", ["metric", "imperial"])
-def test_build_url_current(units):
+def test_build_url_current():
     lon = 0.123
     lat = 789.1
     got = build_weather_url(
         forecast_type="current",
-        units=units,
         lon=lon,
         lat=lat,
     )
 
     assert got.startswith(WEATHER_BASE_URL)
     assert "/weather?" in got
-    assert f"&units={units}" in got
+    assert "&units=metric" in got
     assert f"lon={lon}" in got
     assert f"lat={lat}" in got
     assert f"&appid={getenv('OPEN_WEATHER_API_KEY')}" in got
 
 
-@pytest.mark.parametrize("units", ["metric", "imperial"])
 @pytest.mark.parametrize("forecast_type", ["hourly", "daily", "alert"])
-def test_build_url_one_one_call(units, forecast_type):
+def test_build_url_one_one_call(forecast_type):
     lon = 0.123
     lat = 789.1
-    got = build_weather_url(forecast_type=forecast_type, units=units, lon=lon, lat=lat)
+    got = build_weather_url(forecast_type=forecast_type, lon=lon, lat=lat)
 
     assert got.startswith(WEATHER_BASE_URL)
     assert "/onecall?" in got
-    assert f"units={units}" in got
+    assert "units=metric" in got
     assert f"lon={lon}" in got
     assert f"lat={lat}" in got
     assert f"&appid={getenv('OPEN_WEATHER_API_KEY')}" in got
 
 
+@pytest.mark.parametrize(
+    "sections, exclude",
+    [
+        (("hourly", "daily"), "minutely,alerts"),
+        (("daily",), "hourly,minutely,alerts"),
+        (("hourly",), "daily,minutely,alerts"),
+        ((), "hourly,daily,minutely,alerts"),
+    ],
+)
+def test_build_url_one_call_sections(sections, exclude):
+    got = build_weather_url(forecast_type="daily", lon=0.123, lat=789.1, sections=sections)
+
+    assert f"&exclude={exclude}&" in got
+
+
 @pytest.mark.usefixtures("settings")
 def test_build_url_current_api_key_env_and_settings():
     lon = 0.123
     lat = 789.1
     got = build_weather_url(
         forecast_type="current",
-        units="metric",
         lon=lon,
         lat=lat,
     )
@@ -280,7 +234,6 @@ def test_build_url_current_api_key_settings(settings_no_env_api_key, monkeypatch
     lat = 789.1
     got = build_weather_url(
         forecast_type="current",
-        units="metric",
         lon=lon,
         lat=lat,
     )
@@ -297,10 +250,23 @@ def test_hpa_to_in():
     assert _builder._hpa_to_in(1000) == 29.53
 
 
-def test_kph_to_mph():
+def test_c_to_f():
+    assert _builder._c_to_f(100) == 212
+
+
+@pytest.mark.parametrize("units, expected", [("metric", "21"), ("imperial", "70")])
+def test_format_temp(units, expected):
+    assert _builder._format_temp(21.2, units) == expected
+
+
+def test_mps_to_kph():
+    assert _builder._mps_to_kph(10) == 36
+
+
+def test_mps_to_mph():
     # Rounding to account for imprecision in floating point numbers. As long as this is accurate to
     # 2 digits that is good enough.
-    assert round(_builder._kph_to_mph(1), 2) == 0.62
+    assert round(_builder._mps_to_mph(1), 2) == 2.24
 
 
 def test_mm_to_in():
@@ -1,35 +1,25 @@
 import json
+import multiprocessing
 import os
-from datetime import date, datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from unittest.mock import Mock, patch
 
 import pytest
 
-from weather_command._cache import DateTimeEncoder, _get_default_directory
-
-
-def test_encoder(tmp_path):
-    data = {
-        "string": "string",
-        "float": 1.1,
-        "integer": 1,
-        "date": date(2021, 12, 21),
-        "date_time": datetime(2021, 12, 21, 22, 56, 1, 141153),
-    }
-
-    cache_file = tmp_path / "test.json"
-
-    with open(cache_file, "w") as f:
-        json.dump(data, f, cls=DateTimeEncoder)
-
-    with open(cache_file) as f:
-        result = json.load(f)
-
-    data["date"] = str(data["date"])
-    data["date_time"] = str(data["date_time"]).replace(" ", "T")
-
-    assert result == data
+from weather_command._cache import (
+    Cache,
+    _expires_at,
+    _get_default_directory,
+    _without_minutely,
+    find_nearby_weather,
+    get_cache,
+    get_geocode_index,
+    missing_sections,
+)
+from weather_command._config import CacheBackend
+from weather_command.models.cache import CacheDuration, CacheItem
+from weather_command.models.location import Location
 
 
 def test_get_default_directory_defaults_to_home():
@@ -114,14 +104,14 @@ def test_add_eject(
     mock_one_call_weather,
     cache_with_file,
 ):
-    cache_key = "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+    cache_key = "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=90210"
 
     cache_with_file.add(
         cache_key=cache_key,
         location=mock_location,
         current_weather=mock_current_weather,
         one_call_weather=mock_one_call_weather,
-        cache_size=1,
+        cache_size=2,
     )
 
     with open(cache_with_file._cache_file) as f:
@@ -130,6 +120,10 @@ def test_add_eject(
     assert cache_values is not None
     keys = cache_values.keys()
     assert cache_key in keys
+    assert (
+        "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+        not in keys
+    )
     assert len(keys) == 2
 
 
@@ -222,9 +216,495 @@ def test_get_expired(cache_with_file):
     assert cache_values.one_call_weather is None
 
 
+def test_get_allow_stale(cache_with_file):
+    cache_values = cache_with_file.get(
+        "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455",
+        allow_stale=True,
+    )
+
+    assert cache_values is not None
+    assert cache_values.current_weather is not None
+    assert cache_values.one_call_weather is not None
+
+
 def test_load(cache_with_file):
-    assert cache_with_file._cache is not None
+    assert len(cache_with_file._storage) == 2
 
 
 def test_load_none(cache):
-    assert cache._cache is None
+    assert len(cache._storage) == 0
+
+
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+def test_get_cache_shared():
+    with patch("weather_command._storage.JsonCacheStorage._load", return_value={}) as mock_load:
+        assert get_cache() is get_cache()
+
+    mock_load.assert_called_once()
+
+
+@patch("weather_command._cache.datetime")
+def test_add_updates_memory(mock_dt, mock_current_weather, cache):
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
+    cache_key = "https://nominatim.openstreetmap.org/search?format=json&limit=1&city=Greensboro"
+    cache.add(cache_key=cache_key, current_weather=mock_current_weather)
+
+    cache_values = cache.get(cache_key)
+
+    assert cache_values is not None
+    assert cache_values.current_weather is not None
+
+
+def test_get_expired_does_not_remove_saved(cache_with_file):
+    cache_key = "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+    cache_with_file.get(cache_key)
+
+    assert cache_with_file._storage.get(cache_key).current_weather is not None
+
+
+def test_clear_resets_memory(cache_with_file):
+    cache_with_file.clear()
+
+    assert len(cache_with_file._storage) == 0
+
+
+@pytest.mark.parametrize(
+    "backend, cache_file, cache_size",
+    [("sqlite", "cache.sqlite", 10_000), ("journal", "cache.json", 5), ("binary", "cache.bin", 5)],
+)
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_get_cache_backend(backend, cache_file, cache_size, mock_config_dir):
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        f.write(f"settings:\n  cache_backend: {backend}\n")
+
+    cache = get_cache()
+
+    assert cache._cache_file.name == cache_file
+    assert cache.cache_size == cache_size
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_get_cache_compress_cache(mock_config_dir):
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        f.write("settings:\n  cache_backend: binary\n  compress_cache: true\n")
+
+    assert get_cache()._storage.compress is True  # type: ignore[attr-defined]
+
+
+@patch("weather_command._cache.datetime")
+def test_add_sqlite_eject(mock_dt, mock_location, mock_current_weather, tmp_path):
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
+    cache = Cache(tmp_path, backend=CacheBackend.SQLITE, cache_size=2)
+    for zip_code in ("27455", "27405", "90210"):
+        cache.add(
+            cache_key=f"https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode={zip_code}",
+            location=mock_location,
+            current_weather=mock_current_weather,
+        )
+        mock_dt.now.return_value = mock_dt.now.return_value.replace(minute=37)
+
+    assert len(cache._storage) == 2
+    assert (
+        cache.get("https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455")
+        is None
+    )
+
+
+@patch("weather_command._cache.datetime")
+def test_add_evicts_least_recently_used(mock_dt, mock_location, tmp_path):
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 0, 0, tzinfo=timezone.utc))
+    cache = Cache(tmp_path, cache_size=2)
+    cache.add(cache_key="first", location=mock_location)
+    mock_dt.now.return_value = datetime(2021, 12, 22, 1, 10, 0, tzinfo=timezone.utc)
+    cache.add(cache_key="second", location=mock_location)
+    mock_dt.now.return_value = datetime(2021, 12, 22, 1, 20, 0, tzinfo=timezone.utc)
+    cache.get("first")
+    cache.add(cache_key="third", location=mock_location)
+
+    assert cache.get("first") is not None
+    assert cache.get("second") is None
+    assert cache.get("third") is not None
+
+
+@patch("weather_command._cache.datetime")
+def test_get_records_access(mock_dt, mock_location, tmp_path):
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 0, 0, tzinfo=timezone.utc))
+    cache = Cache(tmp_path)
+    cache.add(cache_key="first", location=mock_location)
+    mock_dt.now.return_value = datetime(2021, 12, 22, 1, 0, 30, tzinfo=timezone.utc)
+    cache.get("first")
+
+    assert Cache(tmp_path).get("first").last_accessed == datetime(  # type: ignore[union-attr]
+        2021, 12, 22, 1, 0, 0, tzinfo=timezone.utc
+    )
+
+    mock_dt.now.return_value = datetime(2021, 12, 22, 1, 5, 0, tzinfo=timezone.utc)
+    cache.get("first")
+
+    assert Cache(tmp_path).get("first").last_accessed == datetime(  # type: ignore[union-attr]
+        2021, 12, 22, 1, 5, 0, tzinfo=timezone.utc
+    )
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_get_cache_cache_size(mock_config_dir):
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        f.write("settings:\n  cache_size: 30\n")
+
+    assert get_cache().cache_size == 30
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_get_cache_cache_durations(mock_config_dir):
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        f.write(
+            "settings:\n  location_cache_days: 30\n  current_weather_cache_minutes: 5\n"
+            "  one_call_cache_minutes: 60\n"
+        )
+
+    cache = get_cache()
+
+    assert cache.location_cache_days == 30
+    assert cache.current_weather_cache_minutes == 5
+    assert cache.one_call_cache_minutes == 60
+
+
+@pytest.mark.parametrize(
+    "observed_minutes_ago, expected_minutes",
+    [(0, 10), (4, 6), (10, 10), (23, 7), (-2, 10)],
+)
+def test_expires_at(observed_minutes_ago, expected_minutes):
+    saved = datetime(2021, 12, 22, 1, 0, 0, tzinfo=timezone.utc)
+    cache_duration = CacheDuration(cache_duration_minutes=10, date_time_saved=saved)
+    observed = saved - timedelta(minutes=observed_minutes_ago)
+
+    assert _expires_at(observed, cache_duration) == saved + timedelta(minutes=expected_minutes)
+
+
+@patch("weather_command._cache.datetime")
+def test_add_saves_cache_durations(
+    mock_dt, mock_location, mock_current_weather, mock_one_call_weather, tmp_path
+):
+    now = datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc)
+    mock_dt.now = Mock(return_value=now)
+    cache = Cache(tmp_path, current_weather_cache_minutes=5, one_call_cache_minutes=60)
+    cache.add(
+        cache_key="first",
+        location=mock_location,
+        current_weather=mock_current_weather,
+        one_call_weather=mock_one_call_weather,
+    )
+    cache_values = cache._storage.get("first")
+
+    assert cache_values is not None
+    assert cache_values.location_saved == now
+    assert cache_values.current_weather.cache_duration_minutes == 5  # type: ignore[union-attr]
+    assert cache_values.one_call_weather.cache_duration_minutes == 60  # type: ignore[union-attr]
+
+
+@pytest.mark.parametrize("minutes_later, expired", [(5, False), (25, True)])
+@patch("weather_command._cache.datetime")
+def test_get_expires_from_observation(
+    mock_dt, minutes_later, expired, mock_current_weather, mock_one_call_weather, tmp_path
+):
+    observed = mock_current_weather.dt
+    mock_dt.now = Mock(return_value=observed + timedelta(minutes=1))
+    cache = Cache(tmp_path, current_weather_cache_minutes=15, one_call_cache_minutes=15)
+    cache.add(
+        cache_key="first",
+        current_weather=mock_current_weather,
+        one_call_weather=mock_one_call_weather.model_copy(
+            update={
+                "current": mock_one_call_weather.current.model_copy(
+                    update={"dt": int(observed.timestamp())}
+                )
+            }
+        ),
+    )
+    mock_dt.now.return_value = observed + timedelta(minutes=minutes_later)
+    cache_values = cache.get("first")
+
+    assert cache_values is not None
+    assert (cache_values.current_weather is None) is expired
+    assert (cache_values.one_call_weather is None) is expired
+
+
+@pytest.mark.parametrize(
+    "location_cache_days, location_saved, expired",
+    [
+        (None, None, False),
+        (2, None, True),
+        (2, datetime(2021, 12, 21, 1, 0, 0, tzinfo=timezone.utc), False),
+        (2, datetime(2021, 12, 19, 1, 0, 0, tzinfo=timezone.utc), True),
+    ],
+)
+@patch("weather_command._cache.datetime")
+def test_get_location_expired(
+    mock_dt, location_cache_days, location_saved, expired, mock_location, tmp_path
+):
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 0, 0, tzinfo=timezone.utc))
+    cache = Cache(tmp_path, location_cache_days=location_cache_days)
+    cache._storage.put(
+        "first",
+        CacheItem(
+            location=mock_location, location_saved=location_saved, last_accessed=mock_dt.now()
+        ),
+    )
+    cache_values = cache.get("first")
+
+    assert cache_values is not None
+    assert (cache_values.location is None) is expired
+
+
+def _fill_cache(cache, mock_dt, mock_location, mock_current_weather, mock_one_call_weather):
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 0, 0, tzinfo=timezone.utc))
+    cache.add(
+        cache_key="first",
+        location=mock_location,
+        current_weather=mock_current_weather,
+        one_call_weather=mock_one_call_weather,
+    )
+    first = cache._storage.get("first")
+    mock_dt.now.return_value = datetime(2021, 12, 22, 1, 10, 0, tzinfo=timezone.utc)
+    return first
+
+
+@pytest.mark.parametrize("backend", list(CacheBackend))
+@patch("weather_command._cache.datetime")
+def test_add_max_cache_bytes_drops_minutely(
+    mock_dt, backend, mock_location, mock_current_weather, mock_one_call_weather, tmp_path
+):
+    cache = Cache(tmp_path, backend=backend)
+    first = _fill_cache(cache, mock_dt, mock_location, mock_current_weather, mock_one_call_weather)
+    cache.max_cache_bytes = cache._storage.entry_size(first) + cache._storage.entry_size(
+        _without_minutely(first)
+    )
+    cache.add(
+        cache_key="second",
+        location=mock_location,
+        current_weather=mock_current_weather,
+        one_call_weather=mock_one_call_weather,
+    )
+
+    saved_first = cache._storage.get("first")
+    saved_second = cache._storage.get("second")
+    assert saved_first.one_call_weather.one_call_weather.minutely is None  # type: ignore[union-attr]
+    assert saved_second.one_call_weather.one_call_weather.minutely is not None  # type: ignore[union-attr]
+
+
+@pytest.mark.parametrize("backend", list(CacheBackend))
+@patch("weather_command._cache.datetime")
+def test_add_max_cache_bytes_keeps_location(
+    mock_dt, backend, mock_location, mock_current_weather, mock_one_call_weather, tmp_path
+):
+    cache = Cache(tmp_path, backend=backend)
+    first = _fill_cache(cache, mock_dt, mock_location, mock_current_weather, mock_one_call_weather)
+    cache.max_cache_bytes = cache._storage.entry_size(first) + 200
+    cache.add(
+        cache_key="second",
+        location=mock_location,
+        current_weather=mock_current_weather,
+        one_call_weather=mock_one_call_weather,
+    )
+
+    saved_first = cache._storage.get("first")
+    saved_second = cache._storage.get("second")
+    assert saved_first is not None
+    assert saved_first.location == mock_location
+    assert saved_first.current_weather is None
+    assert saved_first.one_call_weather is None
+    assert saved_second.one_call_weather.one_call_weather.minutely is None  # type: ignore[union-attr]
+
+
+@pytest.mark.parametrize("backend", list(CacheBackend))
+@patch("weather_command._cache.datetime")
+def test_add_max_cache_bytes_evicts(
+    mock_dt, backend, mock_location, mock_current_weather, mock_one_call_weather, tmp_path
+):
+    cache = Cache(tmp_path, backend=backend, max_cache_bytes=1)
+    _fill_cache(cache, mock_dt, mock_location, mock_current_weather, mock_one_call_weather)
+    cache.add(cache_key="second", location=mock_location)
+
+    assert "first" not in cache._storage
+    assert "second" in cache._storage
+
+
+def test_without_minutely_no_one_call(mock_location):
+    item = CacheItem(location=mock_location)
+
+    assert _without_minutely(item) is item
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_get_cache_max_cache_bytes(mock_config_dir):
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        f.write("settings:\n  max_cache_bytes: 100000\n")
+
+    assert get_cache().max_cache_bytes == 100_000
+
+
+@pytest.mark.parametrize("backend", list(CacheBackend))
+def test_add_keeps_other_instance_saves(backend, mock_location, tmp_path):
+    first = Cache(tmp_path, backend=backend)
+    second = Cache(tmp_path, backend=backend)
+    first.add(cache_key="first", location=mock_location)
+    second.add(cache_key="second", location=mock_location)
+    first.add(cache_key="third", location=mock_location)
+
+    assert sorted(Cache(tmp_path, backend=backend)._storage.keys()) == ["first", "second", "third"]
+
+
+def _add_keys(cache_dir: Path, backend: CacheBackend, worker: int, location: Location) -> None:
+    cache = Cache(cache_dir, backend=backend, cache_size=100)
+    for i in range(5):
+        cache.add(cache_key=f"{worker}-{i}", location=location)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork to share the test fixtures")
+@pytest.mark.parametrize("backend", [CacheBackend.JSON, CacheBackend.BINARY])
+def test_add_concurrent_processes(backend, mock_location, tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_add_keys, args=(tmp_path, backend, worker, mock_location))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert len(Cache(tmp_path, backend=backend)._storage) == 20
+
+
+def test_add_nearby(mock_location, mock_current_weather, mock_one_call_weather, tmp_path):
+    cache = Cache(tmp_path)
+    cache.add(
+        cache_key="nearby",
+        location=mock_location,
+        current_weather=mock_current_weather,
+        one_call_weather=mock_one_call_weather,
+    )
+    nearby = cache.get("nearby")
+    cache.add(cache_key="key", location=mock_location, nearby=nearby)
+    cache_hit = cache.get("key")
+
+    assert nearby
+    assert cache_hit
+    assert cache_hit.current_weather == nearby.current_weather
+    assert cache_hit.one_call_weather == nearby.one_call_weather
+
+
+@patch("weather_command._cache.datetime")
+def test_add_merges_one_call_sections(mock_dt, mock_one_call_weather, tmp_path):
+    first_saved = datetime(2021, 9, 29, 1, 21, tzinfo=timezone.utc)
+    mock_dt.now = Mock(return_value=first_saved)
+    cache = Cache(tmp_path)
+    cache.add(
+        cache_key="key", one_call_weather=mock_one_call_weather.model_copy(update={"hourly": None})
+    )
+    mock_dt.now = Mock(return_value=datetime(2021, 9, 29, 1, 22, tzinfo=timezone.utc))
+    cache.add(
+        cache_key="key", one_call_weather=mock_one_call_weather.model_copy(update={"daily": None})
+    )
+    cache_hit = cache.get("key")
+
+    assert cache_hit
+    assert cache_hit.one_call_weather
+    assert cache_hit.one_call_weather.one_call_weather.daily == mock_one_call_weather.daily
+    assert cache_hit.one_call_weather.one_call_weather.hourly == mock_one_call_weather.hourly
+    # The daily forecast still expires from when it was saved.
+    assert cache_hit.one_call_weather.date_time_saved == first_saved
+
+    cache.add(cache_key="key", one_call_weather=mock_one_call_weather)
+    cache_hit = cache.get("key")
+
+    assert cache_hit
+    assert cache_hit.one_call_weather
+    assert cache_hit.one_call_weather.date_time_saved == datetime(
+        2021, 9, 29, 1, 22, tzinfo=timezone.utc
+    )
+
+
+def test_missing_sections(mock_one_call_weather):
+    weather = mock_one_call_weather.model_copy(update={"hourly": None})
+
+    assert missing_sections(weather, ("hourly", "daily")) == ["hourly"]
+    assert missing_sections(weather, ("daily",)) == []
+
+
+def test_find_nearby_weather(
+    mock_cache_dir, mock_location, mock_current_weather, mock_one_call_weather
+):
+    cache = get_cache()
+    cache.add(cache_key="key", location=mock_location, current_weather=mock_current_weather)
+    cache.add(cache_key="location-only", location=mock_location)
+    for key in ("key", "location-only", "missing", "with-weather"):
+        get_geocode_index().put_point(key, mock_location)
+
+    assert find_nearby_weather("key", mock_location, 10) is None
+
+    cache.add(cache_key="with-weather", one_call_weather=mock_one_call_weather)
+    nearby = find_nearby_weather("key", mock_location, 10)
+
+    assert nearby
+    assert nearby.one_call_weather
+    assert cache.lookup_counts() == {"hit": 0, "miss": 0, "expired": 0}
+
+
+@patch("weather_command._cache.datetime")
+def test_get_counts_lookups(mock_dt, mock_location, mock_current_weather, tmp_path):
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
+    cache = Cache(tmp_path)
+    cache.add(cache_key="key", location=mock_location, current_weather=mock_current_weather)
+    cache.get("key")
+    cache.get("missing")
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 23, 1, 36, 38, tzinfo=timezone.utc))
+    cache.get("key", allow_stale=True)
+
+    assert cache.lookup_counts() == {"hit": 1, "miss": 1, "expired": 1}
+
+
+@patch("weather_command._cache.datetime")
+def test_get_probe(mock_dt, mock_location, tmp_path):
+    saved = datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc)
+    mock_dt.now = Mock(return_value=saved)
+    cache = Cache(tmp_path)
+    cache.add(cache_key="key", location=mock_location)
+    mock_dt.now = Mock(return_value=saved + timedelta(hours=1))
+    cache_hit = cache.get("key", probe=True)
+    cache.get("missing", probe=True)
+
+    assert cache_hit
+    assert cache.lookup_counts() == {"hit": 0, "miss": 0, "expired": 0}
+    # Probing does not make the entry recently used.
+    assert cache._storage.get("key").last_accessed == saved  # type: ignore[union-attr]
+
+
+def test_save_stats(mock_location, tmp_path):
+    first = Cache(tmp_path)
+    second = Cache(tmp_path)
+    first.add(cache_key="key", location=mock_location)
+    first.get("key")
+    second.get("missing")
+    first.save_stats()
+    second.save_stats()
+    second.save_stats()
+
+    assert first.lookup_counts() == {"hit": 1, "miss": 1, "expired": 0}
+    assert Cache(tmp_path).lookup_counts() == {"hit": 1, "miss": 1, "expired": 0}
+
+
+def test_save_stats_no_lookups(tmp_path):
+    Cache(tmp_path).save_stats()
+
+    assert not (tmp_path / "cache-stats.json").exists()
+
+
+def test_items(mock_location, tmp_path):
+    cache = Cache(tmp_path)
+    cache.add(cache_key="first", location=mock_location)
+    cache.add(cache_key="second", location=mock_location)
+
+    assert sorted(key for key, _ in cache.items()) == ["first", "second"]
+    assert cache.lookup_counts() == {"hit": 0, "miss": 0, "expired": 0}
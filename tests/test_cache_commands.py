@@ -0,0 +1,150 @@
+import httpx
+import pytest
+
+from weather_command import cache_commands
+from weather_command._cache import get_cache, get_geocode_index
+from weather_command.main import app
+
+GREENSBORO_URL = "https://nominatim.openstreetmap.org/search?format=json&limit=1&city=greensboro"
+
+
+@pytest.fixture
+def mock_weather(
+    mock_location_response,
+    mock_current_weather_response,
+    mock_one_call_weather_response,
+    monkeypatch,
+):
+    calls: list[str] = []
+
+    async def mock_get_response(*args, **kwargs):
+        calls.append(args[1])
+        if "nominatim" in args[1]:
+            return mock_location_response
+        if "onecall" in args[1]:
+            return mock_one_call_weather_response
+
+        return mock_current_weather_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    return calls
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_warm(mock_weather, test_runner, tmp_path):
+    locations = tmp_path / "locations.txt"
+    locations.write_text("# Greensboro\ncity, Greensboro\n\nzip,27455,NC,US\n36.07, -79.79\n")
+    result = test_runner.invoke(app, ["cache", "warm", str(locations)], catch_exceptions=False)
+    cache = get_cache()
+
+    assert result.exit_code == 0
+    assert result.stdout == ""
+    assert len(mock_weather) == 8
+    for cache_key in (
+        GREENSBORO_URL,
+        "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455&state=NC&country=US",
+        "36.07,-79.79",
+    ):
+        cache_hit = cache.get(cache_key)
+        assert cache_hit
+        assert cache_hit.current_weather
+        assert cache_hit.one_call_weather
+
+    assert get_geocode_index().nearby(36.07, -79.79, 1) == ["36.07,-79.79"]
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_warm_cached(mock_weather, test_runner, tmp_path):
+    locations = tmp_path / "locations.txt"
+    locations.write_text("city,Greensboro\n")
+    test_runner.invoke(app, ["cache", "warm", str(locations)], catch_exceptions=False)
+    mock_weather.clear()
+    result = test_runner.invoke(
+        app,
+        ["cache", "warm", str(locations), "--summary", "--concurrency", "1"],
+        catch_exceptions=False,
+    )
+
+    assert mock_weather == []
+    assert "Warmed 1 of 1 locations" in result.stdout
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_warm_failed(test_runner, tmp_path, monkeypatch):
+    async def mock_get_location_response(*args, **kwargs):
+        return httpx.Response(404, request=httpx.Request("get", url="https://test.com"))
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_location_response)
+
+    locations = tmp_path / "locations.txt"
+    locations.write_text("city,Nowhere\n")
+    result = test_runner.invoke(
+        app, ["cache", "warm", str(locations), "--summary"], catch_exceptions=False
+    )
+
+    assert result.exit_code == 1
+    assert result.stdout.strip() == "Warmed 0 of 1 locations"
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_warm_closes_client_on_error(test_runner, tmp_path, monkeypatch):
+    async def mock_warm(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    async def mock_close_client():
+        closed.append(True)
+
+    closed: list[bool] = []
+    monkeypatch.setattr(cache_commands, "_warm", mock_warm)
+    monkeypatch.setattr(cache_commands, "close_client", mock_close_client)
+    locations = tmp_path / "locations.txt"
+    locations.write_text("city,Greensboro\n")
+    result = test_runner.invoke(app, ["cache", "warm", str(locations)])
+
+    assert result.exit_code == 1
+    assert closed == [True]
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_warm_more_than_cache_size(mock_weather, test_runner, tmp_path):
+    locations = tmp_path / "locations.txt"
+    locations.write_text("".join(f"{lat},0\n" for lat in range(get_cache().cache_size + 1)))
+    result = test_runner.invoke(app, ["cache", "warm", str(locations)], catch_exceptions=False)
+
+    assert result.exit_code == 1
+    assert "The file has 6 locations but the cache only holds 5" in result.stdout
+    assert mock_weather == []
+
+
+@pytest.mark.parametrize("line", ["city", "zip,", "greensboro", "36.07", "1,2,3", "91,0", "0,181"])
+def test_warm_invalid_line(line, test_runner, tmp_path):
+    locations = tmp_path / "locations.txt"
+    locations.write_text(f"city,Greensboro\n{line}\n")
+    result = test_runner.invoke(app, ["cache", "warm", str(locations)], catch_exceptions=False)
+
+    assert result.exit_code == 1
+    assert "Line 2 is not a valid location" in result.stdout
+
+
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+def test_stats(test_runner):
+    cache = get_cache()
+    cache.get(GREENSBORO_URL)
+    cache.get("missing")
+    cache.save_stats()
+    result = test_runner.invoke(app, ["cache", "stats"], catch_exceptions=False)
+    out = result.stdout
+
+    assert "2 cache entries" in out
+    assert "Location" in out
+    # The weather in the cache file has expired, so the lookup that found it is not a hit.
+    assert "│ 0    │ 1      │ 1       │ 0%" in out
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_stats_empty(test_runner):
+    result = test_runner.invoke(app, ["cache", "stats"], catch_exceptions=False)
+    out = result.stdout
+
+    assert "0 cache entries" in out
+    assert "-" in out
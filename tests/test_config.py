@@ -3,7 +3,7 @@ import shutil
 from pathlib import Path
 from unittest.mock import patch
 
-from weather_command._config import Settings, _get_default_directory
+from weather_command._config import CacheBackend, Settings, _get_default_directory
 
 
 def test_get_default_directory_defaults_to_home():
@@ -28,3 +28,60 @@ def test_save_creates_dir(mock_config_dir):
     settings.save()
 
     assert settings_file.exists()
+
+
+def test_display_values_cache_settings(mock_config_dir):
+    settings = Settings(
+        settings_dir=mock_config_dir,
+        cache_backend=CacheBackend.SQLITE,
+        cache_size=30,
+        max_cache_bytes=1000,
+    )
+
+    assert "cache_backend = [green]sqlite[/green]" in settings.display_values
+    assert "cache_size = [green]30[/green]" in settings.display_values
+    assert "max_cache_bytes = [green]1000[/green]" in settings.display_values
+
+
+def test_display_values_cache_durations(mock_config_dir):
+    settings = Settings(
+        settings_dir=mock_config_dir,
+        location_cache_days=30,
+        current_weather_cache_minutes=5,
+        one_call_cache_minutes=60,
+    )
+
+    assert "location_cache_days = [green]30[/green]" in settings.display_values
+    assert "current_weather_cache_minutes = [green]5[/green]" in settings.display_values
+    assert "one_call_cache_minutes = [green]60[/green]" in settings.display_values
+
+
+def test_display_values_compress_cache(mock_config_dir):
+    settings = Settings(settings_dir=mock_config_dir, compress_cache=False)
+
+    assert "compress_cache = [green]false[/green]" in settings.display_values
+
+
+def test_display_values_http(mock_config_dir):
+    settings = Settings(settings_dir=mock_config_dir, http2=True, max_connections=4)
+
+    assert "http2 = [green]true[/green]" in settings.display_values
+    assert "max_connections = [green]4[/green]" in settings.display_values
+
+
+def test_display_values_one_call_current(mock_config_dir):
+    settings = Settings(settings_dir=mock_config_dir, one_call_current=True)
+
+    assert "one_call_current = [green]true[/green]" in settings.display_values
+
+
+def test_display_values_reuse_radius_km(mock_config_dir):
+    settings = Settings(settings_dir=mock_config_dir, reuse_radius_km=2.5)
+
+    assert "reuse_radius_km = [green]2.5[/green]" in settings.display_values
+
+
+def test_display_values_stale_ok(mock_config_dir):
+    settings = Settings(settings_dir=mock_config_dir, stale_ok=True)
+
+    assert "stale_ok = [green]true[/green]" in settings.display_values
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import patch
+
+import httpx
+import pytest
+import yaml
+from httpx import Limits
+from tenacity import Future, RetryCallState
+
+from weather_command._http import (
+    BACKOFF_MAX_SECONDS,
+    DEFAULT_MAX_CONNECTIONS,
+    KEEPALIVE_EXPIRY_SECONDS,
+    _wait,
+    close_client,
+    get_client,
+    is_transient,
+    retry_after,
+    retry_transient,
+)
+from weather_command.errors import UnknownSearchTypeError
+
+
+def status_error(status_code, headers=None):
+    request = httpx.Request("get", url="https://test.com")
+    response = httpx.Response(status_code, request=request, headers=headers)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def test_get_client_shared():
+    assert get_client() is get_client()
+
+
+@pytest.mark.parametrize(
+    "settings, max_connections",
+    [({}, DEFAULT_MAX_CONNECTIONS), ({"max_connections": 3}, 3)],
+)
+def test_get_client_limits(settings, max_connections, mock_config_dir):
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        yaml.dump({"settings": {"api_key": "test", **settings}}, f)
+
+    with patch("weather_command._http.AsyncClient") as client:
+        get_client()
+
+    client.assert_called_once_with(
+        http2=False,
+        limits=Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+@pytest.mark.parametrize("h2_installed", [True, False])
+def test_get_client_http2(h2_installed, mock_config_dir):
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        yaml.dump({"settings": {"api_key": "test", "http2": True}}, f)
+
+    with patch(
+        "weather_command._http.find_spec", return_value=object() if h2_installed else None
+    ), patch("weather_command._http.AsyncClient") as client:
+        get_client()
+
+    assert client.call_args.kwargs["http2"] is h2_installed
+
+
+async def test_close_client():
+    client = get_client()
+    await close_client()
+
+    assert client.is_closed
+    assert get_client() is not client
+
+
+async def test_close_client_not_opened():
+    await close_client()
+
+    assert get_client.cache_info().currsize == 0
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (status_error(500), True),
+        (status_error(503), True),
+        (status_error(429), True),
+        (status_error(400), False),
+        (status_error(401), False),
+        (status_error(404), False),
+        (httpx.ConnectError("reset"), True),
+        (httpx.ReadTimeout("timeout"), True),
+        (httpx.RemoteProtocolError("closed"), True),
+        (UnknownSearchTypeError("bad"), False),
+        (ValueError("bad"), False),
+    ],
+)
+def test_is_transient(error, expected):
+    assert is_transient(error) is expected
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (status_error(429, {"retry-after": "2"}), 2.0),
+        (status_error(503, {"retry-after": "-1"}), 0.0),
+        (status_error(503, {"retry-after": "Wed, 21 Oct 2015 07:28:00 -0000"}), 0.0),
+        (status_error(503, {"retry-after": "soon"}), None),
+        (status_error(503), None),
+        (status_error(500, {"retry-after": "2"}), None),
+        (httpx.ConnectError("reset"), None),
+        (None, None),
+    ],
+)
+def test_retry_after(error, expected):
+    assert retry_after(error) == expected
+
+
+def test_retry_after_date():
+    retry_at = datetime.now(tz=timezone.utc) + timedelta(seconds=30)
+    error = status_error(429, {"retry-after": format_datetime(retry_at, usegmt=True)})
+    seconds = retry_after(error)
+
+    assert seconds is not None
+    assert 28 < seconds <= 30
+
+
+def retry_state(attempt_number, error):
+    state = RetryCallState(retry_object=None, fn=None, args=(), kwargs={})  # type: ignore
+    state.attempt_number = attempt_number
+    state.outcome = Future.construct(attempt_number, error, True)
+    return state
+
+
+@pytest.mark.parametrize(
+    "attempt_number, limit", [(1, 1), (2, 2), (3, 4), (10, BACKOFF_MAX_SECONDS)]
+)
+def test_wait_backoff(attempt_number, limit, monkeypatch):
+    monkeypatch.setattr("weather_command._http.BACKOFF_INITIAL_SECONDS", 1)
+    waits = [_wait(retry_state(attempt_number, status_error(500))) for _ in range(50)]
+
+    assert all(0 <= wait <= limit for wait in waits)
+    # Jittered so clients that failed together retry at different times.
+    assert len(set(waits)) > 1
+
+
+def test_wait_retry_after():
+    assert _wait(retry_state(1, status_error(429, {"retry-after": "3"}))) == 3
+
+
+async def test_retry_transient():
+    errors = [status_error(503, {"retry-after": "0"}), httpx.ReadTimeout("timeout")]
+
+    @retry_transient
+    async def fetch():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+
+        return "weather"
+
+    calls: list[int] = []
+
+    assert await fetch() == "weather"
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        status_error(401),
+        UnknownSearchTypeError("bad"),
+        # Waiting longer than the deadline allows fails right away.
+        status_error(429, {"retry-after": "60"}),
+    ],
+)
+async def test_retry_transient_not_retried(error):
+    @retry_transient
+    async def fetch():
+        calls.append(1)
+        raise error
+
+    calls: list[int] = []
+
+    with pytest.raises(type(error)):
+        await fetch()
+
+    assert len(calls) == 1
+
+
+async def test_retry_transient_max_attempts():
+    @retry_transient
+    async def fetch():
+        calls.append(1)
+        raise httpx.ConnectError("reset")
+
+    calls: list[int] = []
+
+    with pytest.raises(httpx.ConnectError):
+        await fetch()
+
+    assert len(calls) == 5
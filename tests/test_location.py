@@ -1,7 +1,15 @@
+import asyncio
+import time
+
 import httpx
 import pytest
 
-from weather_command._location import get_location_details
+from weather_command._cache import get_cache, get_geocode_index
+from weather_command._location import (
+    _geocode_query,
+    build_location_url,
+    get_location_details,
+)
 from weather_command.errors import UnknownSearchTypeError
 
 
@@ -30,8 +38,8 @@ def mock_location_data():
 @pytest.mark.parametrize("how", ["city", "zip"])
 @pytest.mark.parametrize("return_type", ["list", "dict"])
 @pytest.mark.usefixtures("mock_cache_dir")
-def test_get_location_details(how, return_type, mock_location_data, monkeypatch):
-    def mock_get_response(*args, **kwargs):
+async def test_get_location_details(how, return_type, mock_location_data, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
         return httpx.Response(
             200, request=httpx.Request("get", url="https://test.com"), json=return_json
         )
@@ -41,8 +49,8 @@ def test_get_location_details(how, return_type, mock_location_data, monkeypatch)
     else:
         return_json = mock_location_data[0]
 
-    monkeypatch.setattr(httpx, "get", mock_get_response)
-    response = get_location_details(how=how, city_zip="test", state="test", country="test")
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    response = await get_location_details(how=how, city_zip="test", state="test", country="test")
 
     assert response.display_name == mock_location_data[0]["display_name"]
     assert response.lat == float(mock_location_data[0]["lat"])
@@ -50,19 +58,19 @@ def test_get_location_details(how, return_type, mock_location_data, monkeypatch)
 
 
 @pytest.mark.usefixtures("mock_cache_dir")
-def test_get_location_details_cache_hit(mock_location_data, monkeypatch):
-    def mock_get_response(*args, **kwargs):
+async def test_get_location_details_cache_hit(mock_location_data, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
         return httpx.Response(
             200, request=httpx.Request("get", url="https://test.com"), json=return_json
         )
 
     return_json = mock_location_data
 
-    monkeypatch.setattr(httpx, "get", mock_get_response)
-    get_location_details(
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    await get_location_details(
         how="zip", city_zip="test", state="test", country="test"
     )  # first run to cache
-    response = get_location_details(how="zip", city_zip="test", state="test", country="test")
+    response = await get_location_details(how="zip", city_zip="test", state="test", country="test")
 
     assert response.display_name == mock_location_data[0]["display_name"]
     assert response.lat == float(mock_location_data[0]["lat"])
@@ -70,58 +78,162 @@ def test_get_location_details_cache_hit(mock_location_data, monkeypatch):
 
 
 @pytest.mark.usefixtures("mock_cache_dir")
-def test_get_location_details_http_error_404(capfd, monkeypatch):
-    def mock_get_response(*args, **kwargs):
+async def test_get_location_details_geocode_index_hit(mock_location_data, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
+        calls.append(args[1])
+        return httpx.Response(
+            200, request=httpx.Request("get", url="https://test.com"), json=mock_location_data
+        )
+
+    calls: list[str] = []
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    await get_location_details(how="city", city_zip="Greensboro")
+    get_cache().clear()
+    response = await get_location_details(how="city", city_zip=" greensboro ")
+
+    assert len(calls) == 1
+    assert response.display_name == mock_location_data[0]["display_name"]
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+async def test_get_location_details_geocode_index_hit_cached(mock_location_data, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
+        return httpx.Response(
+            200, request=httpx.Request("get", url="https://test.com"), json=mock_location_data
+        )
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    await get_location_details(how="city", city_zip="Greensboro")
+    get_cache().clear()
+    response = await get_location_details(how="city", city_zip="Greensboro")
+    cache_key = build_location_url("city", "Greensboro", None, None)
+    fresh = get_cache().get(cache_key)
+
+    assert fresh
+    assert fresh.location == response
+    assert get_geocode_index().has_point(cache_key)
+
+
+def test_geocode_query():
+    assert _geocode_query("city", "  New   York ", "NY", None) == "city|new york|ny|"
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+async def test_get_location_details_http_error_404(capfd, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
         return httpx.Response(404, request=httpx.Request("get", url="https://test.com"))
 
-    monkeypatch.setattr(httpx, "get", mock_get_response)
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
     with pytest.raises(SystemExit):
-        get_location_details(how="city", city_zip="test")
+        await get_location_details(how="city", city_zip="test")
 
     out, _ = capfd.readouterr()
     assert "Unable" in out
 
 
 @pytest.mark.usefixtures("mock_cache_dir")
-def test_get_location_details_https_error(monkeypatch):
-    def mock_get_response(*args, **kwargs):
+async def test_get_location_details_https_error(monkeypatch):
+    async def mock_get_response(*args, **kwargs):
         return httpx.Response(500, request=httpx.Request("get", url="https://test.com"))
 
-    monkeypatch.setattr(httpx, "get", mock_get_response)
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
 
     with pytest.raises(httpx.HTTPStatusError):
-        get_location_details(how="city", city_zip="test")
+        await get_location_details(how="city", city_zip="test")
 
 
 @pytest.mark.usefixtures("mock_cache_dir")
-def test_get_location_details_validation_error(capfd, monkeypatch):
-    def mock_get_response(*args, **kwargs):
+async def test_get_location_details_validation_error(capfd, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
         return httpx.Response(200, request=httpx.Request("get", url="https://test.com"), json=data)
 
-    monkeypatch.setattr(httpx, "get", mock_get_response)
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
 
     data = {"bad": None}
     with pytest.raises(SystemExit):
-        get_location_details(how="city", city_zip="test")
+        await get_location_details(how="city", city_zip="test")
 
     out, _ = capfd.readouterr()
     assert "Unable" in out
 
 
 @pytest.mark.usefixtures("mock_cache_dir")
-def test_get_location_details_empty_list(capfd, monkeypatch):
-    def mock_get_response(*args, **kwargs):
+async def test_get_location_details_empty_list(capfd, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
         return httpx.Response(200, request=httpx.Request("get", url="https://test.com"), json=[])
 
-    monkeypatch.setattr(httpx, "get", mock_get_response)
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
 
     with pytest.raises(SystemExit):
-        get_location_details(how="zip", city_zip="12345")
+        await get_location_details(how="zip", city_zip="12345")
         out, _ = capfd.readouterr()
         assert "Unable" in out
 
 
 @pytest.mark.usefixtures("mock_cache_dir")
-def test_get_location_details_error():
+async def test_get_location_details_not_found_cached(capfd, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
+        calls.append(args[1])
+        return httpx.Response(200, request=httpx.Request("get", url="https://test.com"), json=[])
+
+    calls: list[str] = []
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    for _ in range(2):
+        with pytest.raises(SystemExit):
+            await get_location_details(how="zip", city_zip="12345")
+
+    out, _ = capfd.readouterr()
+
+    assert len(calls) == 1
+    assert out.count("Unable") == 2
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+async def test_get_location_details_found_after_not_found(mock_location_data, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
+        return httpx.Response(
+            200, request=httpx.Request("get", url="https://test.com"), json=mock_location_data
+        )
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    get_geocode_index().put_not_found(_geocode_query("city", "Greensboro", None, None))
+    get_geocode_index().not_found_minutes = 0
+    response = await get_location_details(how="city", city_zip="Greensboro")
+
+    get_geocode_index().not_found_minutes = 60
+
+    assert response.display_name == mock_location_data[0]["display_name"]
+    assert not get_geocode_index().not_found(_geocode_query("city", "Greensboro", None, None))
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+async def test_get_location_details_error():
     with pytest.raises(UnknownSearchTypeError):
-        get_location_details(how="bad", city_zip="test")
+        await get_location_details(how="bad", city_zip="test")
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+async def test_get_location_details_concurrent(mock_location_data, monkeypatch):
+    async def mock_get_response(*args, **kwargs):
+        started.append(time.monotonic())
+        in_flight.append(args[1])
+        overlap.append(len(in_flight))
+        await asyncio.sleep(0.3)
+        in_flight.remove(args[1])
+        return httpx.Response(
+            200, request=httpx.Request("get", url="https://test.com"), json=mock_location_data
+        )
+
+    started: list[float] = []
+    in_flight: list[str] = []
+    overlap: list[int] = []
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    monkeypatch.setattr("weather_command._location.NOMINATIM_INTERVAL_SECONDS", 0.2)
+    await asyncio.gather(
+        get_location_details(how="city", city_zip="Greensboro"),
+        get_location_details(how="zip", city_zip="27455"),
+    )
+
+    # Requests start at most once an interval, but one still in flight doesn't hold up the next.
+    assert started[1] - started[0] >= 0.2
+    assert overlap == [1, 2]
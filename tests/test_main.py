@@ -8,6 +8,8 @@ import httpx
 import pytest
 import yaml
 
+from weather_command import main
+from weather_command._cache import get_cache, get_geocode_index
 from weather_command.errors import MissingApiKey
 from weather_command.main import __version__, app
 
@@ -44,16 +46,14 @@ def test_main_default_params(
     cache_with_file,
     monkeypatch,
 ):
-    def mock_get_location_response(*args, **kwargs):
-        return mock_location_response
-
     async def mock_get_weather_response(*args, **kwargs):
+        if "nominatim" in args[1]:
+            return mock_location_response
         if "onecall" in args[1]:
             return mock_one_call_weather_response
 
         return mock_current_weather_response
 
-    monkeypatch.setattr(httpx, "get", mock_get_location_response)
     monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
     args = [how, city_zip, "--terminal-width", 180]
     result = test_runner.invoke(app, args, catch_exceptions=False)
@@ -108,6 +108,67 @@ def test_main_cache_hit(
     assert "Greensboro" in out
 
 
+@pytest.mark.usefixtures("mock_cache_dir")
+@patch("weather_command._cache.datetime")
+def test_main_cache_hit_other_units(
+    mock_dt,
+    mock_location,
+    mock_current_weather,
+    mock_one_call_weather,
+    test_runner,
+    cache_with_file,
+    monkeypatch,
+):
+    async def fail_get(*args, **kwargs):
+        raise AssertionError("weather should be served from the cache")
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", fail_get)
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
+    cache_key = "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+
+    cache_with_file.add(
+        cache_key=cache_key,
+        location=mock_location,
+        current_weather=mock_current_weather,
+        one_call_weather=mock_one_call_weather,
+    )
+    args = ["zip", "27455", "--imperial", "--terminal-width", 180]
+    result = test_runner.invoke(app, args, catch_exceptions=False)
+
+    out = result.stdout
+
+    assert "Greensboro" in out
+    assert "(F)" in out
+
+
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+@patch("weather_command._cache.datetime")
+def test_main_cache_hit_location_expired(
+    mock_dt, mock_location_response, mock_config_dir, test_runner, monkeypatch
+):
+    locations = []
+
+    async def mock_get_location_response(*args, **kwargs):
+        if "nominatim" not in args[1]:
+            raise AssertionError("weather should be served from the cache")
+
+        locations.append(args[1])
+        return mock_location_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_location_response)
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        yaml.dump({"settings": {"api_key": "test", "location_cache_days": 1}}, f)
+
+    args = ["zip", "27455", "--terminal-width", 180]
+    result = test_runner.invoke(app, args, catch_exceptions=False)
+
+    assert "Greensboro" in result.stdout
+    assert locations == [
+        "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+    ]
+
+
 @pytest.mark.usefixtures("mock_cache_dir_with_file")
 def test_main_cache_hit_expired(
     mock_one_call_weather_response, mock_current_weather_response, test_runner, monkeypatch
@@ -127,6 +188,192 @@ def test_main_cache_hit_expired(
     assert "Greensboro" in out
 
 
+@pytest.mark.parametrize(
+    "forecast_type, expected",
+    [
+        ("current", "/weather?"),
+        ("daily", "/onecall?lat=36.1056&lon=-79.7569&units=metric&exclude=hourly,minutely,alerts&"),
+        ("hourly", "/onecall?lat=36.1056&lon=-79.7569&units=metric&exclude=daily,minutely,alerts&"),
+    ],
+)
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_main_requests_only_forecast_type(
+    forecast_type,
+    expected,
+    mock_location_response,
+    mock_current_weather_response,
+    mock_one_call_weather_response,
+    test_runner,
+    monkeypatch,
+):
+    requests: list[str] = []
+
+    async def mock_get_weather_response(*args, **kwargs):
+        if "nominatim" in args[1]:
+            return mock_location_response
+
+        requests.append(args[1])
+        if "onecall" in args[1]:
+            return mock_one_call_weather_response
+
+        return mock_current_weather_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
+    args = ["zip", "27455", "-f", forecast_type, "--terminal-width", 180]
+    result = test_runner.invoke(app, args, catch_exceptions=False)
+
+    assert "Greensboro" in result.stdout
+    assert len(requests) == 1
+    assert expected in requests[0]
+
+
+def test_main_location_not_found_cleans_up(mock_cache_dir, test_runner, monkeypatch):
+    async def mock_get_location_response(*args, **kwargs):
+        return httpx.Response(200, request=httpx.Request("get", url="https://test.com"), json=[])
+
+    async def mock_close_client():
+        closed.append(True)
+
+    closed: list[bool] = []
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_location_response)
+    monkeypatch.setattr(main, "close_client", mock_close_client)
+    result = test_runner.invoke(app, ["city", "Nowhere"], catch_exceptions=False)
+
+    assert result.exit_code == 1
+    assert closed == [True]
+    assert json.loads((mock_cache_dir / "cache-stats.json").read_text()) == {"miss": 1}
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_main_counts_one_lookup(
+    mock_location_response, mock_current_weather_response, test_runner, monkeypatch
+):
+    async def mock_get_weather_response(*args, **kwargs):
+        if "nominatim" in args[1]:
+            return mock_location_response
+
+        return mock_current_weather_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
+    test_runner.invoke(app, ["city", "Greensboro", "-f", "current"], catch_exceptions=False)
+
+    assert get_cache().lookup_counts() == {"hit": 0, "miss": 1, "expired": 0}
+
+
+@pytest.mark.parametrize("use_settings", [True, False])
+@pytest.mark.usefixtures("mock_cache_dir")
+def test_main_one_call_current(
+    use_settings,
+    mock_location_response,
+    mock_one_call_weather_response,
+    mock_config_dir,
+    test_runner,
+    monkeypatch,
+):
+    requests: list[str] = []
+
+    async def mock_get_weather_response(*args, **kwargs):
+        if "nominatim" in args[1]:
+            return mock_location_response
+        if "onecall" not in args[1]:
+            raise AssertionError("current weather should come from the one call weather")
+
+        requests.append(args[1])
+        return mock_one_call_weather_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
+    args = ["zip", "27455", "--terminal-width", 180]
+    if use_settings:
+        with open(mock_config_dir / "weather_command.yaml", "w") as f:
+            yaml.dump({"settings": {"api_key": "test", "one_call_current": True}}, f)
+    else:
+        args.append("--one-call-current")
+
+    result = test_runner.invoke(app, args, catch_exceptions=False)
+    daily_result = test_runner.invoke(app, args + ["-f", "daily"], catch_exceptions=False)
+
+    assert "Current weather for Greensboro" in result.stdout
+    assert "Daily weather for Greensboro" in daily_result.stdout
+    # The daily view is served from the one call weather cached for the current view.
+    assert len(requests) == 1
+
+
+@pytest.mark.parametrize("forecast_type", ["current", "daily", "hourly"])
+@pytest.mark.parametrize("use_settings", [True, False])
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+def test_main_stale_ok(
+    forecast_type,
+    use_settings,
+    mock_one_call_weather_response,
+    mock_current_weather_response,
+    mock_config_dir,
+    test_runner,
+    monkeypatch,
+):
+    events = []
+
+    async def mock_get_weather_response(*args, **kwargs):
+        events.append("fetch")
+        if "onecall" in args[1]:
+            return mock_one_call_weather_response
+
+        return mock_current_weather_response
+
+    def mock_print(*args, **kwargs):
+        events.append("render")
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
+    monkeypatch.setattr(main.console, "print", mock_print)
+
+    args = ["zip", "27455", "-f", forecast_type]
+    if use_settings:
+        with open(mock_config_dir / "weather_command.yaml", "w") as f:
+            yaml.dump({"settings": {"api_key": "test", "stale_ok": True}}, f)
+    else:
+        args.append("--stale-ok")
+
+    test_runner.invoke(app, args, catch_exceptions=False)
+
+    assert events[0] == "render"
+    # Only the weather that was shown is refreshed.
+    assert events[-1] == "fetch"
+    assert events.count("fetch") == 1
+    cache_hit = get_cache().get(
+        "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+    )
+    assert cache_hit is not None
+    if forecast_type == "current":
+        assert cache_hit.current_weather is not None
+        assert cache_hit.one_call_weather is None
+    else:
+        assert cache_hit.current_weather is None
+        assert cache_hit.one_call_weather is not None
+
+
+@pytest.mark.parametrize("status_code", [None, 404, 500])
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+def test_main_stale_ok_refresh_fails(status_code, test_runner, monkeypatch):
+    async def mock_get_weather_response(*args, **kwargs):
+        if status_code is None:
+            raise httpx.ConnectError("reset")
+
+        return httpx.Response(status_code, request=httpx.Request("get", url="https://test.com"))
+
+    async def mock_close_client():
+        closed.append(True)
+
+    closed: list[bool] = []
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
+    monkeypatch.setattr(main, "close_client", mock_close_client)
+    args = ["zip", "27455", "-f", "daily", "--stale-ok", "--terminal-width", 180]
+    result = test_runner.invoke(app, args, catch_exceptions=False)
+
+    assert result.exit_code == 0
+    assert "Daily weather for" in result.stdout
+    assert "Unable" not in result.stdout
+    assert closed == [True]
+
+
 @pytest.mark.parametrize("imperial", ["--imperial", "-i"])
 @pytest.mark.parametrize("state_code_flag", ["-s", "--state-code"])
 @pytest.mark.parametrize("country_code_flag", ["-c", "--country-code"])
@@ -151,16 +398,14 @@ def test_main_with_params(
     mock_location_response,
     monkeypatch,
 ):
-    def mock_get_location_response(*args, **kwargs):
-        return mock_location_response
-
     async def mock_get_weather_response(*args, **kwargs):
+        if "nominatim" in args[1]:
+            return mock_location_response
         if "onecall" in args[1]:
             return mock_one_call_weather_response
 
         return mock_current_weather_response
 
-    monkeypatch.setattr(httpx, "get", mock_get_location_response)
     monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
 
     args = [
@@ -214,16 +459,14 @@ def test_main_from_settings_params(
     monkeypatch,
     mock_config_dir,
 ):
-    def mock_get_location_response(*args, **kwargs):
-        return mock_location_response
-
     async def mock_get_weather_response(*args, **kwargs):
+        if "nominatim" in args[1]:
+            return mock_location_response
         if "onecall" in args[1]:
             return mock_one_call_weather_response
 
         return mock_current_weather_response
 
-    monkeypatch.setattr(httpx, "get", mock_get_location_response)
     monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
     settings = {"settings": {"api_key": "file", "units": "imperial", "time_format": "am/pm"}}
 
@@ -252,16 +495,14 @@ def test_main_from_settings_params_temp_only(
     mock_location_response,
     monkeypatch,
 ):
-    def mock_get_location_response(*args, **kwargs):
-        return mock_location_response
-
     async def mock_get_weather_response(*args, **kwargs):
+        if "nominatim" in args[1]:
+            return mock_location_response
         if "onecall" in args[1]:
             return mock_one_call_weather_response
 
         return mock_current_weather_response
 
-    monkeypatch.setattr(httpx, "get", mock_get_location_response)
     monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_weather_response)
     args = [how, city_zip, "--terminal-width", 180]
     result = test_runner.invoke(app, args, catch_exceptions=False)
@@ -290,3 +531,38 @@ def test_bad_how(test_runner):
 def test_bad_forecast_type(test_runner):
     result = test_runner.invoke(app, ["city", "Greensboro", "-f", "bad"])
     assert result.exit_code > 1
+
+
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+@patch("weather_command._cache.datetime")
+def test_main_reuse_nearby_weather(
+    mock_dt, mock_location, mock_location_response, mock_config_dir, test_runner, monkeypatch
+):
+    async def mock_get_location_response(*args, **kwargs):
+        if "nominatim" not in args[1]:
+            raise AssertionError("weather should be reused from the nearby location")
+
+        return mock_location_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_location_response)
+    mock_dt.now = Mock(return_value=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc))
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        yaml.dump({"settings": {"api_key": "test", "reuse_radius_km": 5}}, f)
+    get_geocode_index().put_point(
+        "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455",
+        mock_location,
+    )
+
+    args = ["zip", "27410", "--terminal-width", 180]
+    result = test_runner.invoke(app, args, catch_exceptions=False)
+    cache_hit = get_cache().get(
+        "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27410"
+    )
+
+    assert "Greensboro" in result.stdout
+    assert cache_hit
+    assert cache_hit.current_weather
+    # Kept from the nearby entry rather than stamped with the current time.
+    assert cache_hit.current_weather.date_time_saved == datetime(
+        2021, 12, 22, 1, 36, 38, 212266, tzinfo=timezone.utc
+    )
@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+import yaml
+
+from weather_command._cache import get_cache, get_geocode_index
+from weather_command._planner import plan_current_weather, plan_one_call_weather
+
+CACHE_KEY = "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+NOW = datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc)
+# Shortly after the one call weather fixture was observed.
+ONE_CALL_NOW = datetime(2021, 9, 29, 1, 21, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def mock_requests(
+    mock_location_response,
+    mock_current_weather_response,
+    mock_one_call_weather_response,
+    monkeypatch,
+):
+    requests: list[str] = []
+
+    async def mock_get_response(*args, **kwargs):
+        requests.append(args[1])
+        if "nominatim" in args[1]:
+            return mock_location_response
+        if "onecall" in args[1]:
+            return mock_one_call_weather_response
+
+        return mock_current_weather_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    return requests
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+async def test_plan_current_weather_fetch(mock_requests):
+    weather, location, refresh = await plan_current_weather(
+        "zip", "27455", state_code=None, country_code=None
+    )
+    cache_hit = get_cache().get(CACHE_KEY)
+
+    assert location.display_name == "Greensboro, NC"
+    assert weather.name == "Greensboro"
+    assert refresh == []
+    assert len(mock_requests) == 2
+    assert "/weather?" in mock_requests[1]
+    assert cache_hit
+    assert cache_hit.current_weather
+    assert cache_hit.one_call_weather is None
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+async def test_plan_one_call_weather_fetch(mock_requests):
+    weather, _, refresh = await plan_one_call_weather(
+        "zip", "27455", state_code=None, country_code=None
+    )
+    cache_hit = get_cache().get(CACHE_KEY)
+
+    assert weather.daily
+    assert refresh == []
+    assert len(mock_requests) == 2
+    assert "/onecall?" in mock_requests[1]
+    assert cache_hit
+    assert cache_hit.current_weather is None
+    assert cache_hit.one_call_weather
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+@patch("weather_command._cache.datetime")
+async def test_plan_cache_hit(
+    mock_dt, mock_location, mock_current_weather, mock_one_call_weather, mock_requests
+):
+    mock_dt.now = Mock(return_value=NOW)
+    get_cache().add(
+        cache_key=CACHE_KEY,
+        location=mock_location,
+        current_weather=mock_current_weather,
+        one_call_weather=mock_one_call_weather,
+    )
+    current_weather, _, current_refresh = await plan_current_weather(
+        "zip", "27455", state_code=None, country_code=None
+    )
+    one_call_weather, location, one_call_refresh = await plan_one_call_weather(
+        "zip", "27455", state_code=None, country_code=None, stale_ok=True
+    )
+
+    assert mock_requests == []
+    assert current_weather == mock_current_weather
+    assert one_call_weather == mock_one_call_weather
+    assert location == mock_location
+    assert current_refresh == []
+    assert one_call_refresh == []
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+async def test_plan_fetch_missing_section(mock_location, mock_current_weather, mock_requests):
+    get_cache().add(
+        cache_key=CACHE_KEY, location=mock_location, current_weather=mock_current_weather
+    )
+    weather, _, _ = await plan_one_call_weather("zip", "27455", state_code=None, country_code=None)
+
+    assert weather.daily
+    assert len(mock_requests) == 1
+    assert "/onecall?" in mock_requests[0]
+
+
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+async def test_plan_expired(mock_requests):
+    weather, _, refresh = await plan_current_weather(
+        "zip", "27455", state_code=None, country_code=None
+    )
+
+    # The location is still cached so only the expired weather is requested.
+    assert weather.name == "Greensboro"
+    assert refresh == []
+    assert len(mock_requests) == 1
+    assert "/weather?" in mock_requests[0]
+
+
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+async def test_plan_stale_ok(mock_requests):
+    saved = get_cache().get(CACHE_KEY, allow_stale=True)
+    assert saved
+    assert saved.one_call_weather
+    weather, _, refresh = await plan_one_call_weather(
+        "zip", "27455", state_code=None, country_code=None, stale_ok=True
+    )
+
+    assert weather == saved.one_call_weather.one_call_weather
+    assert "/onecall?" not in "".join(mock_requests)
+    assert len(refresh) == 1
+
+    await refresh[0]
+
+    assert "/onecall?" in mock_requests[-1]
+
+
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+@patch("weather_command._cache.datetime")
+async def test_plan_location_expired(mock_dt, mock_config_dir, mock_requests):
+    mock_dt.now = Mock(return_value=NOW)
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        yaml.dump({"settings": {"api_key": "test", "location_cache_days": 1}}, f)
+
+    weather, location, _ = await plan_current_weather(
+        "zip", "27455", state_code=None, country_code=None
+    )
+
+    assert weather.name == "Summerfield"
+    assert location.display_name == "Greensboro, NC"
+    assert mock_requests == [CACHE_KEY]
+
+
+@pytest.mark.usefixtures("mock_cache_dir_with_file")
+@patch("weather_command._cache.datetime")
+async def test_plan_reuse_nearby_weather(mock_dt, mock_location, mock_config_dir, mock_requests):
+    mock_dt.now = Mock(return_value=NOW)
+    with open(mock_config_dir / "weather_command.yaml", "w") as f:
+        yaml.dump({"settings": {"api_key": "test", "reuse_radius_km": 5}}, f)
+    get_geocode_index().put_point(CACHE_KEY, mock_location)
+
+    weather, _, _ = await plan_one_call_weather("zip", "27410", state_code=None, country_code=None)
+
+    assert weather.daily
+    assert len(mock_requests) == 1
+    assert "nominatim" in mock_requests[0]
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+@patch("weather_command._cache.datetime")
+async def test_plan_fetch_missing_one_call_section(
+    mock_dt, mock_location, mock_one_call_weather, mock_requests
+):
+    mock_dt.now = Mock(return_value=ONE_CALL_NOW)
+    get_cache().add(
+        cache_key=CACHE_KEY,
+        location=mock_location,
+        one_call_weather=mock_one_call_weather.model_copy(update={"hourly": None}),
+    )
+    weather, _, _ = await plan_one_call_weather(
+        "zip", "27455", state_code=None, country_code=None, sections=("hourly",)
+    )
+    cache_hit = get_cache().get(CACHE_KEY)
+
+    assert weather.hourly == mock_one_call_weather.hourly
+    assert weather.daily == mock_one_call_weather.daily
+    assert len(mock_requests) == 1
+    assert "&exclude=daily,minutely,alerts&" in mock_requests[0]
+    assert cache_hit
+    assert cache_hit.one_call_weather
+    assert cache_hit.one_call_weather.one_call_weather.hourly
+    assert cache_hit.one_call_weather.one_call_weather.daily
+
+
+@pytest.mark.usefixtures("mock_cache_dir")
+@patch("weather_command._cache.datetime")
+async def test_plan_stale_ok_missing_one_call_section(
+    mock_dt, mock_location, mock_one_call_weather, mock_requests
+):
+    mock_dt.now = Mock(return_value=ONE_CALL_NOW)
+    get_cache().add(
+        cache_key=CACHE_KEY,
+        location=mock_location,
+        one_call_weather=mock_one_call_weather.model_copy(update={"hourly": None}),
+    )
+    mock_dt.now = Mock(return_value=ONE_CALL_NOW + timedelta(hours=1))
+    weather, _, refresh = await plan_one_call_weather(
+        "zip", "27455", state_code=None, country_code=None, sections=("hourly",), stale_ok=True
+    )
+
+    # The stale weather has no hourly forecast to display so it is requested right away.
+    assert weather.hourly == mock_one_call_weather.hourly
+    assert refresh == []
+    assert len(mock_requests) == 1
+    assert "&exclude=daily,minutely,alerts&" in mock_requests[0]
@@ -46,6 +46,61 @@ def test_api_key(test_runner, mock_config_dir):
     assert settings.api_key_file == "test"
 
 
+@pytest.mark.parametrize("cache_backend", ["sqlite", "journal", "json", "binary"])
+def test_cache_backend(cache_backend, test_runner, mock_config_dir):
+    result = test_runner.invoke(
+        app, ["cache-backend"], input=f"{cache_backend}\n", catch_exceptions=False
+    )
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.cache_backend == cache_backend
+
+
+def test_cache_size(test_runner, mock_config_dir):
+    result = test_runner.invoke(app, ["cache-size"], input="30\n", catch_exceptions=False)
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.cache_size == 30
+
+
+def test_max_cache_bytes(test_runner, mock_config_dir):
+    result = test_runner.invoke(app, ["max-cache-bytes"], input="1000000\n", catch_exceptions=False)
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.max_cache_bytes == 1_000_000
+
+
+@pytest.mark.parametrize(
+    "command, attribute, value",
+    [
+        ("location-cache-days", "location_cache_days", 30),
+        ("current-weather-cache-minutes", "current_weather_cache_minutes", 5),
+        ("one-call-cache-minutes", "one_call_cache_minutes", 60),
+    ],
+)
+def test_cache_durations(command, attribute, value, test_runner, mock_config_dir):
+    result = test_runner.invoke(app, [command], input=f"{value}\n", catch_exceptions=False)
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert getattr(settings, attribute) == value
+
+
 def test_delete(test_runner, mock_config_dir_with_file):
     result = test_runner.invoke(app, ["delete"], catch_exceptions=False)
     out = result.stdout
@@ -107,6 +162,83 @@ def test_saved_settings_invalid_settings(settings, test_runner, mock_config_dir)
     assert "Invalid" in out
 
 
+@pytest.mark.parametrize("compress_cache, expected", [("y", True), ("n", False)])
+def test_compress_cache(compress_cache, expected, test_runner, mock_config_dir):
+    result = test_runner.invoke(
+        app, ["compress-cache"], input=f"{compress_cache}\n", catch_exceptions=False
+    )
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.compress_cache is expected
+
+
+@pytest.mark.parametrize("http2, expected", [("y", True), ("n", False)])
+def test_http2(http2, expected, test_runner, mock_config_dir):
+    result = test_runner.invoke(app, ["http2"], input=f"{http2}\n", catch_exceptions=False)
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.http2 is expected
+
+
+def test_max_connections(test_runner, mock_config_dir):
+    result = test_runner.invoke(app, ["max-connections"], input="4\n", catch_exceptions=False)
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.max_connections == 4
+
+
+@pytest.mark.parametrize("one_call_current, expected", [("y", True), ("n", False)])
+def test_one_call_current(one_call_current, expected, test_runner, mock_config_dir):
+    result = test_runner.invoke(
+        app, ["one-call-current"], input=f"{one_call_current}\n", catch_exceptions=False
+    )
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.one_call_current is expected
+
+
+@pytest.mark.parametrize("reuse_radius_km", [0.0, 2.5])
+def test_reuse_radius_km(reuse_radius_km, test_runner, mock_config_dir):
+    result = test_runner.invoke(
+        app, ["reuse-radius-km"], input=f"{reuse_radius_km}\n", catch_exceptions=False
+    )
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.reuse_radius_km == reuse_radius_km
+
+
+@pytest.mark.parametrize("stale_ok, expected", [("y", True), ("n", False)])
+def test_stale_ok(stale_ok, expected, test_runner, mock_config_dir):
+    result = test_runner.invoke(app, ["stale-ok"], input=f"{stale_ok}\n", catch_exceptions=False)
+    out = result.stdout
+
+    assert "successfully saved" in out
+
+    settings = load_settings(mock_config_dir)
+
+    assert settings.stale_ok is expected
+
+
 @pytest.mark.parametrize("temp_only, expected", [("y", True), ("n", False)])
 def test_temp_only(temp_only, expected, test_runner, mock_config_dir):
     result = test_runner.invoke(app, ["temp-only"], input=f"{temp_only}\n", catch_exceptions=False)
@@ -0,0 +1,522 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from weather_command._storage import (
+    BinaryCacheStorage,
+    CacheLock,
+    DateTimeEncoder,
+    GeocodeIndex,
+    JournalCacheStorage,
+    JsonCacheStorage,
+    SqliteCacheStorage,
+    cache_lock,
+)
+from weather_command.models.cache import (
+    CACHE_SCHEMA_VERSION,
+    CacheItem,
+    CurrentWeatherCache,
+    OneCallWeatherCache,
+)
+from weather_command.models.location import Location
+
+CACHE_KEY = "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+
+
+@pytest.fixture(
+    params=[
+        JsonCacheStorage,
+        JournalCacheStorage,
+        SqliteCacheStorage,
+        BinaryCacheStorage,
+        partial(BinaryCacheStorage, compress=True),
+    ]
+)
+def storage(request, tmp_path):
+    return request.param(tmp_path)
+
+
+@pytest.fixture
+def cache_item(mock_location, mock_current_weather, mock_one_call_weather):
+    return CacheItem(
+        location=mock_location,
+        location_saved=datetime(2021, 12, 20, 1, 36, 38, tzinfo=timezone.utc),
+        current_weather=CurrentWeatherCache(
+            cache_duration_minutes=10,
+            date_time_saved=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc),
+            current_weather=mock_current_weather,
+        ),
+        one_call_weather=OneCallWeatherCache(
+            cache_duration_minutes=30,
+            date_time_saved=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc),
+            one_call_weather=mock_one_call_weather,
+        ),
+        last_accessed=datetime(2021, 12, 22, 1, 36, 38, tzinfo=timezone.utc),
+    )
+
+
+def test_encoder(tmp_path):
+    data = {
+        "string": "string",
+        "float": 1.1,
+        "integer": 1,
+        "date": date(2021, 12, 21),
+        "date_time": datetime(2021, 12, 21, 22, 56, 1, 141153),
+    }
+
+    cache_file = tmp_path / "test.json"
+
+    with open(cache_file, "w") as f:
+        json.dump(data, f, cls=DateTimeEncoder)
+
+    with open(cache_file) as f:
+        result = json.load(f)
+
+    data["date"] = str(data["date"])
+    data["date_time"] = str(data["date_time"]).replace(" ", "T")
+
+    assert result == data
+
+
+def test_put_get(storage, cache_item):
+    storage.put(CACHE_KEY, cache_item)
+
+    assert CACHE_KEY in storage
+    assert storage.get(CACHE_KEY) == cache_item
+
+
+def test_get_none(storage):
+    assert storage.get(CACHE_KEY) is None
+    assert storage.least_recently_used() is None
+
+
+def test_put_location_only(storage, mock_location):
+    storage.put(CACHE_KEY, CacheItem(location=mock_location))
+    result = storage.get(CACHE_KEY)
+
+    assert result is not None
+    assert result.location == mock_location
+    assert result.current_weather is None
+    assert result.one_call_weather is None
+
+
+def test_put_evict(storage, cache_item):
+    storage.put("first", cache_item)
+    storage.put(
+        "second",
+        cache_item.model_copy(
+            update={
+                "one_call_weather": None,
+                "last_accessed": datetime(2021, 12, 22, 1, 40, 0, tzinfo=timezone.utc),
+            }
+        ),
+    )
+
+    assert sorted(storage.keys()) == ["first", "second"]
+    assert storage.least_recently_used() == "first"
+
+    storage.put("third", cache_item, evict=["first"])
+
+    assert "first" not in storage
+    assert len(storage) == 2
+
+
+def test_touch(storage, cache_item):
+    storage.put("first", cache_item)
+    storage.put("second", cache_item)
+    storage.touch("first", datetime(2021, 12, 22, 1, 40, 0, tzinfo=timezone.utc))
+
+    assert storage.least_recently_used() == "second"
+    assert storage.get("first").last_accessed == datetime(
+        2021, 12, 22, 1, 40, 0, tzinfo=timezone.utc
+    )
+
+
+def test_touch_missing(storage):
+    storage.touch("missing", datetime(2021, 12, 22, 1, 40, 0, tzinfo=timezone.utc))
+
+    assert len(storage) == 0
+
+
+def test_put_trimmed(storage, cache_item):
+    storage.put("first", cache_item)
+    trimmed = cache_item.model_copy(update={"one_call_weather": None})
+    storage.put("second", cache_item, trimmed={"first": trimmed})
+
+    assert storage.get("first") == trimmed
+    assert storage.get("second") == cache_item
+
+
+def test_sizes(storage, cache_item):
+    storage.put("first", cache_item.model_copy(update={"one_call_weather": None}))
+    storage.put(
+        "second",
+        cache_item.model_copy(
+            update={"last_accessed": datetime(2021, 12, 22, 1, 40, 0, tzinfo=timezone.utc)}
+        ),
+    )
+
+    sizes = storage.sizes()
+
+    assert list(sizes.keys()) == ["first", "second"]
+    assert sizes["first"] < sizes["second"]
+
+
+def test_clear(storage, cache_item):
+    storage.put(CACHE_KEY, cache_item)
+    storage.clear()
+
+    assert len(storage) == 0
+
+
+def test_sqlite_persists(tmp_path, cache_item):
+    SqliteCacheStorage(tmp_path).put(CACHE_KEY, cache_item)
+
+    assert SqliteCacheStorage(tmp_path).get(CACHE_KEY) == cache_item
+
+
+def test_journal_writes_changed_fields(tmp_path, cache_item, mock_location):
+    storage = JournalCacheStorage(tmp_path)
+    storage.put(CACHE_KEY, CacheItem(location=mock_location))
+    saved = storage.get(CACHE_KEY)
+    assert saved is not None
+    storage.put(
+        CACHE_KEY,
+        CacheItem(location=saved.location, current_weather=cache_item.current_weather),
+    )
+
+    with open(storage.journal_file) as f:
+        records = [json.loads(line) for line in f]
+
+    assert not storage.cache_file.exists()
+    assert len(records) == 2
+    assert records[1]["fields"].keys() == {"currentWeather"}
+
+
+def test_journal_replay(tmp_path, cache_item, mock_location):
+    storage = JournalCacheStorage(tmp_path)
+    storage.put("first", CacheItem(location=mock_location))
+    storage.put("second", cache_item)
+    storage.put("first", cache_item, evict=["second"])
+
+    replayed = JournalCacheStorage(tmp_path)
+
+    assert replayed.keys() == ["first"]
+    assert replayed.get("first") == cache_item
+
+
+def test_journal_partial_record(tmp_path, cache_item, mock_location):
+    storage = JournalCacheStorage(tmp_path)
+    storage.put("first", cache_item)
+    with open(storage.journal_file, "a") as f:
+        f.write('{"key": "second", "fields": {"loca')
+
+    replayed = JournalCacheStorage(tmp_path)
+    replayed.put("third", CacheItem(location=mock_location))
+
+    assert replayed.keys() == ["third", "first"]
+    assert JournalCacheStorage(tmp_path).keys() == ["third", "first"]
+
+
+def test_journal_compaction(tmp_path, cache_item, mock_location):
+    storage = JournalCacheStorage(tmp_path, max_journal_bytes=1)
+    storage.put("first", cache_item)
+    storage.wait_for_compaction()
+
+    assert storage.cache_file.exists()
+    assert not storage.journal_file.exists()
+
+    storage.put("second", CacheItem(location=mock_location))
+    storage.wait_for_compaction()
+
+    replayed = JournalCacheStorage(tmp_path)
+
+    assert replayed.keys() == ["second", "first"]
+    assert replayed.get("first") == cache_item
+
+
+def test_journal_interrupted_compaction(tmp_path, cache_item, mock_location):
+    storage = JournalCacheStorage(tmp_path)
+    storage.put("first", cache_item)
+    storage.journal_file.rename(storage._compacting_file)
+    storage.put("second", CacheItem(location=mock_location))
+
+    replayed = JournalCacheStorage(tmp_path)
+
+    assert replayed.keys() == ["second", "first"]
+
+
+def test_journal_clear(tmp_path, cache_item):
+    storage = JournalCacheStorage(tmp_path, max_journal_bytes=1)
+    storage.put("first", cache_item)
+    storage.put("second", cache_item)
+    storage.clear()
+
+    assert len(JournalCacheStorage(tmp_path)) == 0
+
+
+@pytest.mark.parametrize(
+    "storage_type", [JsonCacheStorage, JournalCacheStorage, BinaryCacheStorage]
+)
+def test_json_storage_lazy_load(storage_type, cache_item, tmp_path):
+    storage_type(tmp_path).put("first", cache_item)
+    storage_type(tmp_path).put(
+        "second",
+        cache_item.model_copy(
+            update={"last_accessed": datetime(2021, 12, 22, 1, 40, 0, tzinfo=timezone.utc)}
+        ),
+    )
+
+    storage = storage_type(tmp_path)
+
+    assert all(isinstance(v, dict) for v in storage._cache.values())
+    assert storage.least_recently_used() == "first"
+    assert list(storage.sizes()) == ["first", "second"]
+
+    item = storage.get("second")
+
+    assert item is storage.get("second")
+    assert isinstance(storage._cache["first"], dict)
+
+    storage.put("third", cache_item)
+
+    assert storage_type(tmp_path).get("first") == cache_item
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_binary_storage_file(compress, cache_item, tmp_path):
+    BinaryCacheStorage(tmp_path, compress=compress).put(CACHE_KEY, cache_item)
+    with open(tmp_path / "cache.bin", "rb") as f:
+        data = f.read()
+
+    assert data.startswith(b"WCMD\x01")
+    assert len(data) < len(cache_item.model_dump_json(by_alias=True))
+    assert BinaryCacheStorage(tmp_path, compress=not compress).get(CACHE_KEY) == cache_item
+
+
+def test_binary_storage_unknown_version(cache_item, tmp_path):
+    BinaryCacheStorage(tmp_path).put(CACHE_KEY, cache_item)
+    data = (tmp_path / "cache.bin").read_bytes()
+    (tmp_path / "cache.bin").write_bytes(data[:4] + b"\x02" + data[5:])
+
+    assert len(BinaryCacheStorage(tmp_path)) == 0
+
+
+@pytest.mark.parametrize("legacy_type", [JsonCacheStorage, JournalCacheStorage])
+def test_binary_storage_migrates_json(legacy_type, cache_item, tmp_path):
+    legacy_type(tmp_path).put(CACHE_KEY, cache_item)
+    storage = BinaryCacheStorage(tmp_path)
+
+    assert storage.get(CACHE_KEY) == cache_item
+    assert (tmp_path / "cache.bin").exists()
+    assert not (tmp_path / "cache.json").exists()
+    assert not (tmp_path / "cache.journal").exists()
+
+
+def test_binary_storage_no_migration(tmp_path):
+    BinaryCacheStorage(tmp_path)
+
+    assert not (tmp_path / "cache.bin").exists()
+
+
+STALE_ENTRY = {
+    "currentWeather": {"date_time_saved": "2021-12-22T01:36:38+00:00", "current_weather": {}},
+    "lastAccessed": "2021-12-22T01:36:38+00:00",
+}
+
+
+@pytest.mark.parametrize("storage_type", [JsonCacheStorage, JournalCacheStorage])
+def test_json_storage_drops_stale_schema(storage_type, tmp_path):
+    with open(tmp_path / "cache.json", "w") as f:
+        json.dump({CACHE_KEY: STALE_ENTRY}, f)
+
+    storage = storage_type(tmp_path)
+
+    assert storage.get(CACHE_KEY) is None
+    assert CACHE_KEY not in storage
+
+
+def test_json_storage_drops_unversioned(cache_item, tmp_path):
+    # Valid entries saved before the schema version was stored may still hold imperial weather.
+    entry = cache_item.model_dump(mode="json", by_alias=True)
+    del entry["schemaVersion"]
+    with open(tmp_path / "cache.json", "w") as f:
+        json.dump({CACHE_KEY: entry}, f)
+
+    storage = JsonCacheStorage(tmp_path)
+
+    assert storage.get(CACHE_KEY) is None
+    assert CACHE_KEY not in storage
+
+
+def test_json_storage_current_schema_invalid(tmp_path):
+    with open(tmp_path / "cache.json", "w") as f:
+        json.dump({CACHE_KEY: {**STALE_ENTRY, "schemaVersion": CACHE_SCHEMA_VERSION}}, f)
+
+    with pytest.raises(ValidationError):
+        JsonCacheStorage(tmp_path).get(CACHE_KEY)
+
+
+@pytest.mark.parametrize("schema_version", [CACHE_SCHEMA_VERSION - 1, CACHE_SCHEMA_VERSION])
+def test_sqlite_storage_schema_version(schema_version, cache_item, tmp_path):
+    storage = SqliteCacheStorage(tmp_path)
+    storage.put(CACHE_KEY, cache_item)
+    with storage._connection:
+        storage._connection.execute(
+            "UPDATE cache SET current_weather = '{}', schema_version = ?", (schema_version,)
+        )
+
+    if schema_version == CACHE_SCHEMA_VERSION:
+        with pytest.raises(ValidationError):
+            storage.get(CACHE_KEY)
+    else:
+        assert storage.get(CACHE_KEY) is None
+        assert CACHE_KEY not in storage
+
+
+def test_geocode_index(mock_location, tmp_path):
+    index = GeocodeIndex(tmp_path)
+    index.put("zip|27455||", mock_location)
+
+    assert len(GeocodeIndex(tmp_path)) == 1
+    assert GeocodeIndex(tmp_path).get("zip|27455||") == mock_location
+    assert index.get("zip|90210||") is None
+
+
+def test_geocode_index_clear(mock_location, tmp_path):
+    index = GeocodeIndex(tmp_path)
+    index.put("zip|27455||", mock_location)
+    index.clear()
+
+    assert len(index) == 0
+
+
+@pytest.mark.parametrize("age_days, expired", [(1, False), (3, True)])
+def test_geocode_index_max_age(age_days, expired, mock_location, tmp_path):
+    index = GeocodeIndex(tmp_path, max_age_days=2)
+    saved = datetime.now(tz=timezone.utc) - timedelta(days=age_days)
+    with index._connection:
+        index._connection.execute(
+            "INSERT INTO geocode (query, location, date_time_saved) VALUES (?, ?, ?)",
+            ("zip|27455||", mock_location.model_dump_json(), saved.isoformat()),
+        )
+
+    assert (index.get("zip|27455||") is None) is expired
+
+
+@pytest.mark.parametrize(
+    "storage_type",
+    [JsonCacheStorage, JournalCacheStorage, BinaryCacheStorage, SqliteCacheStorage],
+)
+def test_storage_reloads_saves_from_other_instances(storage_type, cache_item, tmp_path):
+    first = storage_type(tmp_path)
+    second = storage_type(tmp_path)
+    first.put("first", cache_item)
+    with second.lock():
+        second.put("second", cache_item)
+
+    assert sorted(second.keys()) == ["first", "second"]
+
+
+def test_write_snapshot_leaves_no_temp_files(storage, cache_item, tmp_path):
+    storage.put("first", cache_item)
+    storage.put("second", cache_item)
+
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_write_snapshot_failure(cache_item, tmp_path):
+    storage = JsonCacheStorage(tmp_path)
+    storage.put("first", cache_item)
+    with patch("weather_command._storage.os.replace", side_effect=OSError), pytest.raises(OSError):
+        storage.put("second", cache_item)
+
+    assert not list(tmp_path.glob("*.tmp"))
+    assert JsonCacheStorage(tmp_path).keys() == ["first"]
+
+
+def test_cache_lock_reentrant(tmp_path):
+    lock = cache_lock(tmp_path)
+
+    assert lock is cache_lock(tmp_path)
+    assert not lock.held()
+
+    with lock as outer:
+        with lock as inner:
+            assert lock.held()
+        assert lock.held()
+
+    assert outer
+    assert not inner
+    assert not lock.held()
+
+
+def test_cache_lock_open_failure(tmp_path):
+    lock = CacheLock(tmp_path / "missing" / "cache.lock")
+    with pytest.raises(FileNotFoundError), lock:
+        pass  # pragma: no cover
+
+    assert not lock.held()
+    with CacheLock(tmp_path / "cache.lock") as acquired:
+        assert acquired
+
+
+def test_journal_lock_waits_for_compaction(tmp_path, cache_item):
+    storage = JournalCacheStorage(tmp_path, max_journal_bytes=1)
+    storage.put("first", cache_item)
+    with storage.lock():
+        assert not storage.journal_file.exists()
+        assert not storage._compaction.is_alive()  # type: ignore[union-attr]
+
+
+def test_geocode_index_nearby(mock_location, tmp_path):
+    index = GeocodeIndex(tmp_path)
+    index.put_point("Greensboro", mock_location)
+    index.put_point("summerfield", Location(display_name="Summerfield", lat=36.2088, lon=-79.9048))
+    index.put_point("raleigh", Location(display_name="Raleigh", lat=35.7796, lon=-78.6382))
+
+    assert index.nearby(36.1, -79.8, 5) == ["greensboro"]
+    assert index.nearby(36.1, -79.8, 20) == ["greensboro", "summerfield"]
+    assert index.nearby(36.1, -79.8, 200) == ["greensboro", "summerfield", "raleigh"]
+
+
+def test_geocode_index_has_point(mock_location, tmp_path):
+    index = GeocodeIndex(tmp_path)
+    index.put_point("Greensboro", mock_location)
+
+    assert index.has_point("greensboro")
+    assert not index.has_point("summerfield")
+
+
+def test_geocode_index_clear_points(mock_location, tmp_path):
+    index = GeocodeIndex(tmp_path)
+    index.put_point("greensboro", mock_location)
+    index.clear()
+
+    assert index.nearby(mock_location.lat, mock_location.lon, 10) == []
+
+
+@pytest.mark.parametrize("age_minutes, expired", [(30, False), (90, True)])
+def test_geocode_index_not_found(age_minutes, expired, tmp_path):
+    index = GeocodeIndex(tmp_path)
+    saved = datetime.now(tz=timezone.utc) - timedelta(minutes=age_minutes)
+    with index._connection:
+        index._connection.execute(
+            "INSERT INTO not_found (query, date_time_saved) VALUES (?, ?)",
+            ("zip|00000||", saved.isoformat()),
+        )
+
+    assert index.not_found("zip|00000||") is not expired
+    assert not index.not_found("zip|27455||")
+
+
+def test_geocode_index_clear_not_found(tmp_path):
+    index = GeocodeIndex(tmp_path)
+    index.put_not_found("zip|00000||")
+    index.clear()
+
+    assert not index.not_found("zip|00000||")
@@ -1,7 +1,13 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
 import httpx
 import pytest
 from rich._emoji_codes import EMOJI
 
+from weather_command import _storage
+from weather_command._cache import get_cache, single_flight
 from weather_command._weather import (
     WeatherIcons,
     get_current_weather,
@@ -9,6 +15,10 @@ from weather_command._weather import (
     get_one_call_weather,
 )
 
+# Waiting on another fetch relies on fcntl locks, which Windows does not have.
+needs_fcntl = pytest.mark.skipif(_storage.fcntl is None, reason="needs fcntl to lock files")
+CACHE_KEY = "https://nominatim.openstreetmap.org/search?format=json&limit=1&postalcode=27455"
+
 
 @pytest.mark.parametrize(
     "condition, expected",
@@ -26,7 +36,7 @@ def test_icons(icon):
         assert icon.replace(":", "") in list(EMOJI.keys())
 
 
-async def test_current_weather_http_error_404(capfd, monkeypatch):
+async def test_current_weather_http_error_404(capfd, monkeypatch, mock_cache_dir):
     async def mock_get_response(*args, **kwargs):
         return httpx.Response(404, request=httpx.Request("get", url="https://test.com"))
 
@@ -39,7 +49,7 @@ async def test_current_weather_http_error_404(capfd, monkeypatch):
     assert "Unable" in out
 
 
-async def test_get_current_weather_https_error(monkeypatch):
+async def test_get_current_weather_https_error(monkeypatch, mock_cache_dir):
     async def mock_get_response(*args, **kwargs):
         return httpx.Response(500, request=httpx.Request("get", url="https://test.com"))
 
@@ -49,7 +59,7 @@ async def test_get_current_weather_https_error(monkeypatch):
         await get_current_weather(url="https://test.com", cache_key="https://somekey.com")
 
 
-async def test_get_current_weather_validation_error(capfd, monkeypatch):
+async def test_get_current_weather_validation_error(capfd, monkeypatch, mock_cache_dir):
     async def mock_get_response(*args, **kwargs):
         return httpx.Response(
             200, request=httpx.Request("get", url="https://test.com"), json={"bad": None}
@@ -64,7 +74,7 @@ async def test_get_current_weather_validation_error(capfd, monkeypatch):
     assert "Unable" in out
 
 
-async def test_one_call_current_weather_http_error_404(capfd, monkeypatch):
+async def test_one_call_current_weather_http_error_404(capfd, monkeypatch, mock_cache_dir):
     async def mock_get_response(*args, **kwargs):
         return httpx.Response(404, request=httpx.Request("get", url="https://test.com"))
 
@@ -77,7 +87,7 @@ async def test_one_call_current_weather_http_error_404(capfd, monkeypatch):
     assert "Unable" in out
 
 
-async def test_get_one_callcurrent_weather_https_error(monkeypatch):
+async def test_get_one_callcurrent_weather_https_error(monkeypatch, mock_cache_dir):
     async def mock_get_response(*args, **kwargs):
         return httpx.Response(500, request=httpx.Request("get", url="https://test.com"))
 
@@ -87,7 +97,7 @@ async def test_get_one_callcurrent_weather_https_error(monkeypatch):
         await get_one_call_weather(url="https://test.com", cache_key="https://somekey.com")
 
 
-async def test_get_one_call_weather_validation_error(capfd, monkeypatch):
+async def test_get_one_call_weather_validation_error(capfd, monkeypatch, mock_cache_dir):
     async def mock_get_response(*args, **kwargs):
         return httpx.Response(
             200, request=httpx.Request("get", url="https://test.com"), json={"bad": None}
@@ -100,3 +110,113 @@ async def test_get_one_call_weather_validation_error(capfd, monkeypatch):
 
     out, _ = capfd.readouterr()
     assert "Unable" in out
+
+
+@needs_fcntl
+async def test_get_current_weather_waits_for_other_fetch(
+    mock_cache_dir, mock_current_weather, monkeypatch
+):
+    calls: list[str] = []
+
+    async def mock_get_response(*args, **kwargs):
+        calls.append(args[1])  # pragma: no cover
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+
+    async def other_fetch():
+        async with single_flight(CACHE_KEY, "current"):
+            await asyncio.sleep(0.1)
+            get_cache().add(cache_key=CACHE_KEY, current_weather=mock_current_weather)
+
+    other = asyncio.create_task(other_fetch())
+    await asyncio.sleep(0)
+    weather = await get_current_weather(url="https://test.com", cache_key=CACHE_KEY)
+    await other
+
+    assert weather == mock_current_weather
+    assert calls == []
+
+
+@needs_fcntl
+async def test_get_one_call_weather_waits_for_other_fetch(
+    mock_cache_dir, mock_one_call_weather, monkeypatch
+):
+    calls: list[str] = []
+
+    async def mock_get_response(*args, **kwargs):
+        calls.append(args[1])  # pragma: no cover
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+
+    async def other_fetch():
+        async with single_flight(CACHE_KEY, "one_call"):
+            await asyncio.sleep(0.1)
+            get_cache().add(cache_key=CACHE_KEY, one_call_weather=mock_one_call_weather)
+
+    other = asyncio.create_task(other_fetch())
+    await asyncio.sleep(0)
+    weather = await get_one_call_weather(url="https://test.com", cache_key=CACHE_KEY)
+    await other
+
+    assert weather == mock_one_call_weather
+    assert calls == []
+
+
+@needs_fcntl
+@patch("weather_command._cache.datetime")
+async def test_get_one_call_weather_other_fetch_missing_section(
+    mock_dt, mock_cache_dir, mock_one_call_weather, mock_one_call_weather_response, monkeypatch
+):
+    calls: list[str] = []
+
+    async def mock_get_response(*args, **kwargs):
+        calls.append(args[1])
+        return mock_one_call_weather_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+    mock_dt.now = Mock(return_value=datetime(2021, 9, 29, 1, 21, tzinfo=timezone.utc))
+
+    async def other_fetch():
+        async with single_flight(CACHE_KEY, "one_call"):
+            await asyncio.sleep(0.1)
+            get_cache().add(
+                cache_key=CACHE_KEY,
+                one_call_weather=mock_one_call_weather.model_copy(update={"hourly": None}),
+            )
+
+    other = asyncio.create_task(other_fetch())
+    await asyncio.sleep(0)
+    weather = await get_one_call_weather(
+        url="https://test.com", cache_key=CACHE_KEY, sections=("hourly",)
+    )
+    await other
+
+    assert weather.hourly
+    assert calls == ["https://test.com"]
+
+
+async def test_get_current_weather_other_fetch_failed(
+    mock_cache_dir, mock_current_weather, mock_current_weather_response, monkeypatch
+):
+    async def mock_get_response(*args, **kwargs):
+        return mock_current_weather_response
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", mock_get_response)
+
+    async def other_fetch():
+        async with single_flight(CACHE_KEY, "current"):
+            await asyncio.sleep(0.1)
+
+    other = asyncio.create_task(other_fetch())
+    await asyncio.sleep(0)
+    weather = await get_current_weather(url="https://test.com", cache_key=CACHE_KEY)
+    await other
+
+    assert weather == mock_current_weather
+
+
+async def test_single_flight_stops_waiting(mock_cache_dir, monkeypatch):
+    monkeypatch.setattr("weather_command._cache.FETCH_WAIT_SECONDS", 0)
+    async with single_flight(CACHE_KEY, "current"):
+        async with single_flight(CACHE_KEY, "current") as waited:
+            assert not waited
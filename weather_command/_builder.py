@@ -6,23 +6,18 @@ from functools import lru_cache
 from rich.style import Style
 from rich.table import Table
 
-from weather_command._cache import Cache
 from weather_command._config import console
-from weather_command._location import build_location_url, get_location_details
-from weather_command._utils import build_weather_url
-from weather_command._weather import get_current_weather, get_icon, get_one_call_weather
+from weather_command._weather import get_icon
 from weather_command.models.location import Location
 from weather_command.models.weather import CurrentWeather, OneCallWeather
 
 HEADER_ROW_STYLE = Style(color="sky_blue2", bold=True)
 
 
-async def show_current(
-    how: str,
-    city_zip: str,
+def show_current(
+    weather: CurrentWeather | OneCallWeather,
+    location: Location,
     *,
-    state_code: str | None = None,
-    country_code: str | None = None,
     units: str = "metric",
     am_pm: bool = False,
     temp_only: bool = False,
@@ -32,14 +27,6 @@ async def show_current(
     if terminal_width:
         console.width = terminal_width
 
-    with console.status("Getting weather..."):
-        weather, location = await _gather_current_weather(
-            how=how,
-            city_zip=city_zip,
-            state_code=state_code,
-            country_code=country_code,
-            units=units,
-        )
     if not temp_only:
         if pager:
             with console.pager(styles=True):
@@ -54,12 +41,10 @@ async def show_current(
             console.print(_current_weather_temp(weather, units, location))
 
 
-async def show_daily(
-    how: str,
-    city_zip: str,
+def show_daily(
+    weather: OneCallWeather,
+    location: Location,
     *,
-    state_code: str | None = None,
-    country_code: str | None = None,
     units: str = "metric",
     am_pm: bool = False,
     temp_only: bool = False,
@@ -69,15 +54,6 @@ async def show_daily(
     if terminal_width:
         console.width = terminal_width
 
-    with console.status("Getting weather..."):
-        weather, location = await _gather_one_call_weather(
-            how=how,
-            city_zip=city_zip,
-            state_code=state_code,
-            country_code=country_code,
-            units=units,
-        )
-
     if not temp_only:
         if pager:
             with console.pager(styles=True):
@@ -92,12 +68,10 @@ async def show_daily(
             console.print(_daily_temp_only(weather, units, am_pm, location))
 
 
-async def show_hourly(
-    how: str,
-    city_zip: str,
+def show_hourly(
+    weather: OneCallWeather,
+    location: Location,
     *,
-    state_code: str | None = None,
-    country_code: str | None = None,
     units: str = "metric",
     am_pm: bool = False,
     temp_only: bool = False,
@@ -107,14 +81,6 @@ async def show_hourly(
     if terminal_width:
         console.width = terminal_width
 
-    with console.status("Getting weather..."):
-        weather, location = await _gather_one_call_weather(
-            how=how,
-            city_zip=city_zip,
-            state_code=state_code,
-            country_code=country_code,
-            units=units,
-        )
     if not temp_only:
         if pager:
             with console.pager(styles=True):
@@ -130,20 +96,38 @@ async def show_hourly(
 
 
 def current_weather_all(
-    current_weather: CurrentWeather,
+    current_weather: CurrentWeather | OneCallWeather,
     units: str,
     am_pm: bool,
     location: Location,
     show_title: bool = True,
 ) -> Table:
     precip_unit, _, speed_units, temp_units = _get_units(units)
-    conditions = current_weather.weather[0].description
+    if isinstance(current_weather, OneCallWeather):
+        current = current_weather.current
+        weather = current.weather
+        temp, feels_like, humidity = current.temp, current.feels_like, current.humidity
+        wind_speed: float | None = current.wind_speed
+        wind_gust: float | None = current.wind_gust
+        rain, snow = current.rain, current.snow
+        sunrise, sunset = _format_sunrise_sunset(
+            am_pm, current.sunrise, current.sunset, current_weather.timezone_offset
+        )
+    else:
+        weather = current_weather.weather
+        temp, feels_like = current_weather.main.temp, current_weather.main.feels_like
+        humidity = current_weather.main.humidity
+        wind_speed = current_weather.wind.speed if current_weather.wind else None
+        wind_gust = current_weather.wind.gust if current_weather.wind else None
+        rain, snow = current_weather.rain, current_weather.snow
+        sunrise, sunset = _format_sunrise_sunset(
+            am_pm, current_weather.sys.sunrise, current_weather.sys.sunset, current_weather.timezone
+        )
+
+    conditions = weather[0].description
     weather_icon = get_icon(conditions)
     if weather_icon:
         conditions = f"{conditions} {weather_icon}"
-    sunrise, sunset = _format_sunrise_sunset(
-        am_pm, current_weather.sys.sunrise, current_weather.sys.sunset, current_weather.timezone
-    )
 
     table = (
         Table(
@@ -167,34 +151,27 @@ def current_weather_all(
     table.add_column("Sunrise :sunrise:")
     table.add_column("Sunset :sunset:")
 
-    if current_weather.rain:
-        rain_one_hour = _format_precip(current_weather.rain.one_hour, units)
-        rain_three_hour = _format_precip(current_weather.rain.three_hour, units)
+    if rain:
+        rain_one_hour = _format_precip(rain.one_hour, units)
+        rain_three_hour = _format_precip(rain.three_hour, units)
     else:
         rain_one_hour = "0.00"
         rain_three_hour = "0.00"
 
-    if current_weather.snow:
-        snow_one_hour = _format_precip(current_weather.snow.one_hour, units)
-        snow_three_hour = _format_precip(current_weather.snow.three_hour, units)
+    if snow:
+        snow_one_hour = _format_precip(snow.one_hour, units)
+        snow_three_hour = _format_precip(snow.three_hour, units)
     else:
         snow_one_hour = "0.00"
         snow_three_hour = "0.00"
 
-    if current_weather.wind:
-        wind = _format_wind(current_weather.wind.speed, units)
-        gusts = _format_wind(current_weather.wind.gust, units)
-    else:
-        wind = "0"
-        gusts = "0"
-
     table.add_row(
-        str(_round_to_int(current_weather.main.temp)),
-        str(_round_to_int(current_weather.main.feels_like)),
-        f"{current_weather.main.humidity}%" if current_weather.main.humidity else "0%",
+        _format_temp(temp, units),
+        _format_temp(feels_like, units),
+        f"{humidity}%" if humidity else "0%",
         conditions,
-        wind,
-        gusts,
+        _format_wind(wind_speed, units),
+        _format_wind(wind_gust, units),
         rain_one_hour,
         rain_three_hour,
         snow_one_hour,
@@ -206,18 +183,21 @@ def current_weather_all(
     return table
 
 
-def _current_weather_temp(current_weather: CurrentWeather, units: str, location: Location) -> Table:
+def _current_weather_temp(
+    current_weather: CurrentWeather | OneCallWeather, units: str, location: Location
+) -> Table:
     _, _, _, temp_units = _get_units(units)
+    if isinstance(current_weather, OneCallWeather):
+        temp, feels_like = current_weather.current.temp, current_weather.current.feels_like
+    else:
+        temp, feels_like = current_weather.main.temp, current_weather.main.feels_like
 
     table = Table(
         title=f"Current weather for {location.display_name}", header_style=HEADER_ROW_STYLE
     )
     table.add_column(f"Temperature ({temp_units}) :thermometer:")
     table.add_column(f"Feels Like ({temp_units}) :thermometer:")
-    table.add_row(
-        str(_round_to_int(current_weather.main.temp)),
-        str(_round_to_int(current_weather.main.feels_like)),
-    )
+    table.add_row(_format_temp(temp, units), _format_temp(feels_like, units))
 
     return table
 
@@ -251,7 +231,7 @@ def daily_all(
     table.add_column("Sunrise :sunrise:")
     table.add_column("Sunset :sunset:")
 
-    for daily in weather.daily:
+    for daily in weather.daily or []:
         dt = _format_date_time(am_pm, daily.dt, weather.timezone_offset, "daily")
         sunrise, sunset = _format_sunrise_sunset(
             am_pm, daily.sunrise, daily.sunset, weather.timezone_offset
@@ -267,10 +247,10 @@ def daily_all(
 
         table.add_row(
             dt,
-            str(_round_to_int(daily.temp.max)),
-            str(_round_to_int(daily.temp.min)),
+            _format_temp(daily.temp.max, units),
+            _format_temp(daily.temp.min, units),
             f"{daily.humidity}%",
-            str(_round_to_int(daily.dew_point)),
+            _format_temp(daily.dew_point, units),
             pressure,
             conditions,
             str(daily.uvi),
@@ -296,18 +276,23 @@ def _daily_temp_only(weather: OneCallWeather, units: str, am_pm: bool, location:
     table.add_column(f"High ({temp_units}) :thermometer:")
     table.add_column(f"Low ({temp_units}) :thermometer:")
 
-    for daily in weather.daily:
+    for daily in weather.daily or []:
         dt = _format_date_time(am_pm, daily.dt, weather.timezone_offset, "daily")
 
         table.add_row(
             dt,
-            str(_round_to_int(daily.temp.max)),
-            str(_round_to_int(daily.temp.min)),
+            _format_temp(daily.temp.max, units),
+            _format_temp(daily.temp.min, units),
         )
 
     return table
 
 
+@lru_cache(maxsize=256)
+def _c_to_f(value: float) -> float:
+    return value * 9 / 5 + 32
+
+
 @lru_cache(maxsize=256)
 def _format_date_time(
     am_pm: bool, dt: datetime, timezone: int, forecast_type: str | None = None
@@ -339,13 +324,20 @@ def _format_pressure(pressure: int | None, units: str) -> str:
     return str(_hpa_to_in(pressure)) if units == "imperial" else str(pressure)
 
 
+@lru_cache(maxsize=256)
+def _format_temp(temp: float, units: str) -> str:
+    return str(_round_to_int(_c_to_f(temp))) if units == "imperial" else str(_round_to_int(temp))
+
+
 @lru_cache(maxsize=256)
 def _format_wind(speed: float | None, units: str) -> str:
     if not speed:
         return "0"
 
     return (
-        str(_round_to_int(_kph_to_mph(speed))) if units == "imperial" else str(_round_to_int(speed))
+        str(_round_to_int(_mps_to_mph(speed)))
+        if units == "imperial"
+        else str(_round_to_int(_mps_to_kph(speed)))
     )
 
 
@@ -408,7 +400,7 @@ def hourly_all(
     table.add_column(f"Rain ({precip_units}) :cloud_with_rain:")
     table.add_column(f"Snow ({precip_units}) :snowflake:")
 
-    for hourly in weather.hourly:
+    for hourly in weather.hourly or []:
         dt = _format_date_time(am_pm, hourly.dt, weather.timezone_offset)
         rain = _format_precip(hourly.rain.one_hour, units) if hourly.rain else "0.00"
         snow = _format_precip(hourly.snow.one_hour, units) if hourly.snow else "0.00"
@@ -422,10 +414,10 @@ def hourly_all(
 
         table.add_row(
             dt,
-            str(_round_to_int(hourly.temp)),
-            str(_round_to_int(hourly.feels_like)),
+            _format_temp(hourly.temp, units),
+            _format_temp(hourly.feels_like, units),
             f"{hourly.humidity}%",
-            str(_round_to_int(hourly.dew_point)),
+            _format_temp(hourly.dew_point, units),
             pressure,
             conditions,
             str(hourly.uvi),
@@ -440,89 +432,6 @@ def hourly_all(
     return table
 
 
-async def _gather_current_weather(
-    how: str,
-    city_zip: str,
-    *,
-    state_code: str | None,
-    country_code: str | None,
-    units: str,
-) -> tuple[CurrentWeather, Location]:
-    location_url = build_location_url(how, city_zip, state_code, country_code)
-    cache = Cache()
-    cache_hit = cache.get(location_url)
-    if cache_hit:
-        if cache_hit.location:
-            location = cache_hit.location
-        else:
-            location = get_location_details(
-                how=how, city_zip=city_zip, state=state_code, country=country_code
-            )
-        if cache_hit.current_weather:
-            current_weather = cache_hit.current_weather.current_weather
-            return cache_hit.current_weather.current_weather, location
-        else:
-            url = build_weather_url(
-                forecast_type="current",
-                units=units,
-                lon=location.lon,
-                lat=location.lat,
-            )
-            current_weather = await get_current_weather(url, cache_key=location_url)
-            return current_weather, location
-
-    location = get_location_details(
-        how=how, city_zip=city_zip, state=state_code, country=country_code
-    )
-
-    url = build_weather_url(
-        forecast_type="current",
-        units=units,
-        lon=location.lon,
-        lat=location.lat,
-    )
-    current_weather = await get_current_weather(url, cache_key=location_url)
-
-    return current_weather, location
-
-
-async def _gather_one_call_weather(
-    how: str,
-    city_zip: str,
-    *,
-    state_code: str | None,
-    country_code: str | None,
-    units: str,
-) -> tuple[OneCallWeather, Location]:
-    location_url = build_location_url(how, city_zip, state_code, country_code)
-    cache = Cache()
-    cache_hit = cache.get(location_url)
-    if cache_hit:
-        if cache_hit.location:
-            location = cache_hit.location
-        else:
-            location = get_location_details(
-                how=how, city_zip=city_zip, state=state_code, country=country_code
-            )
-        if cache_hit.one_call_weather:
-            return cache_hit.one_call_weather.one_call_weather, location
-        else:
-            url = build_weather_url(
-                forecast_type="daily", units=units, lon=location.lon, lat=location.lat
-            )
-            weather = await get_one_call_weather(url, location_url)
-            return weather, location
-
-    location = get_location_details(
-        how=how, city_zip=city_zip, state=state_code, country=country_code
-    )
-
-    url = build_weather_url(forecast_type="daily", units=units, lon=location.lon, lat=location.lat)
-    weather = await get_one_call_weather(url, location_url)
-
-    return weather, location
-
-
 def _hourly_temp_only(
     weather: OneCallWeather, units: str, am_pm: bool, location: Location
 ) -> Table:
@@ -536,13 +445,13 @@ def _hourly_temp_only(
     table.add_column(f"Temperature ({temp_units}) :thermometer:")
     table.add_column(f"Feels Like ({temp_units}) :thermometer:")
 
-    for hourly in weather.hourly:
+    for hourly in weather.hourly or []:
         dt = _format_date_time(am_pm, hourly.dt, weather.timezone_offset)
 
         table.add_row(
             dt,
-            str(_round_to_int(hourly.temp)),
-            str(_round_to_int(hourly.feels_like)),
+            _format_temp(hourly.temp, units),
+            _format_temp(hourly.feels_like, units),
         )
 
     return table
@@ -554,8 +463,13 @@ def _hpa_to_in(value: float) -> float:
 
 
 @lru_cache(maxsize=256)
-def _kph_to_mph(value: float) -> float:
-    return value / 1.609
+def _mps_to_kph(value: float) -> float:
+    return value * 3.6
+
+
+@lru_cache(maxsize=256)
+def _mps_to_mph(value: float) -> float:
+    return value * 2.237
 
 
 @lru_cache(maxsize=256)
@@ -1,41 +1,48 @@
-import json
+import asyncio
 import os
-from datetime import date, datetime, timezone
-from json import JSONEncoder
+import time
+import zlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
-
-from camel_converter.pydantic_base import CamelBase
-
+from typing import AsyncIterator, Callable, Counter, Dict, Iterable, List, Tuple, Union
+
+from weather_command._config import CacheBackend, load_settings
+from weather_command._storage import (
+    BinaryCacheStorage,
+    CacheStats,
+    CacheStorage,
+    GeocodeIndex,
+    JournalCacheStorage,
+    JsonCacheStorage,
+    SqliteCacheStorage,
+    try_lock,
+)
+from weather_command._utils import ONE_CALL_SECTIONS
+from weather_command.models.cache import (
+    CacheDuration,
+    CacheItem,
+    CurrentWeatherCache,
+    OneCallWeatherCache,
+)
 from weather_command.models.location import Location
 from weather_command.models.weather import CurrentWeather, OneCallWeather
 
-
-class CacheDuration(CamelBase):
-    cache_duration_minutes: int = 15
-    date_time_saved: datetime
-
-
-class CurrentWeatherCache(CacheDuration):
-    current_weather: CurrentWeather
-
-
-class OneCallWeatherCache(CacheDuration):
-    one_call_weather: OneCallWeather
-
-
-class CacheItem(CamelBase):
-    location: Optional[Location] = None
-    current_weather: Optional[CurrentWeatherCache] = None
-    one_call_weather: Optional[OneCallWeatherCache] = None
-
-
-class DateTimeEncoder(JSONEncoder):
-    """Subclass the default encoder to be able to encode dates."""
-
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, (date, datetime)):
-            return obj.isoformat()
+ACCESS_TIME_RESOLUTION = timedelta(minutes=1)
+# OpenWeather refreshes its current conditions and forecasts about every 10 minutes.
+DEFAULT_WEATHER_CACHE_MINUTES = 10
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# How long to wait on another process fetching the same weather before fetching it anyway.
+FETCH_WAIT_SECONDS = 30
+_FETCH_POLL_SECONDS = 0.05
+_FETCH_LOCK_SLOTS = 64
+DEFAULT_CACHE_SIZE = {
+    CacheBackend.BINARY: 5,
+    CacheBackend.JSON: 5,
+    CacheBackend.JOURNAL: 5,
+    CacheBackend.SQLITE: 10_000,
+}
 
 
 def _get_default_directory() -> Path:
@@ -51,13 +58,42 @@ def _get_default_directory() -> Path:
 class Cache:
     get_default_directory = staticmethod(_get_default_directory)
 
-    def __init__(self, cache_dir: Union[Path, None] = None) -> None:
+    def __init__(
+        self,
+        cache_dir: Union[Path, None] = None,
+        backend: CacheBackend = CacheBackend.JSON,
+        cache_size: Union[int, None] = None,
+        max_cache_bytes: Union[int, None] = None,
+        location_cache_days: Union[int, None] = None,
+        current_weather_cache_minutes: Union[int, None] = None,
+        one_call_cache_minutes: Union[int, None] = None,
+        compress_cache: bool = False,
+    ) -> None:
         self.cache_dir = cache_dir or Cache.get_default_directory()
-        self._cache_file = self.cache_dir / "cache.json"
         if not self.cache_dir.exists():
             self.cache_dir.mkdir(parents=True)
 
-        self._cache: Union[Dict[str, CacheItem], None] = self._load()
+        self.cache_size = cache_size or DEFAULT_CACHE_SIZE[backend]
+        self.max_cache_bytes = max_cache_bytes
+        self.location_cache_days = location_cache_days
+        self.current_weather_cache_minutes = (
+            current_weather_cache_minutes or DEFAULT_WEATHER_CACHE_MINUTES
+        )
+        self.one_call_cache_minutes = one_call_cache_minutes or DEFAULT_WEATHER_CACHE_MINUTES
+        self._storage: CacheStorage
+        if backend == CacheBackend.SQLITE:
+            self._storage = SqliteCacheStorage(self.cache_dir)
+        elif backend == CacheBackend.BINARY:
+            self._storage = BinaryCacheStorage(self.cache_dir, compress=compress_cache)
+        elif backend == CacheBackend.JOURNAL:
+            self._storage = JournalCacheStorage(self.cache_dir)
+        else:
+            self._storage = JsonCacheStorage(self.cache_dir)
+
+        self._cache_file = self._storage.cache_file
+        self._stats = CacheStats(self.cache_dir)
+        # Lookups counted since the stats were last saved.
+        self._lookups: Counter[str] = Counter()
 
     def add(
         self,
@@ -66,89 +102,331 @@ class Cache:
         location: Union[Location, None] = None,
         current_weather: Union[CurrentWeather, None] = None,
         one_call_weather: Union[OneCallWeather, None] = None,
-        cache_size: int = 5,
+        cache_size: Union[int, None] = None,
+        nearby: Union[CacheItem, None] = None,
     ) -> None:
-        def save_cache() -> None:
-            cache: Dict[str, Any] = {}
-            location_cache = location.model_dump() if location else None
-            current_weather_cache = (
-                CurrentWeatherCache(
-                    date_time_saved=datetime.now(tz=timezone.utc), current_weather=current_weather
-                ).model_dump()
-                if current_weather
-                else None
+        """Save weather for a key, merged with what is already cached for it.
+
+        Weather from nearby, the entry for a close by location, is saved for any section not
+        passed in. It keeps the time it was originally saved so it expires along with the entry
+        it came from.
+        """
+        key = cache_key.lower()
+        now = datetime.now(tz=timezone.utc)
+        current_weather_cache = (
+            CurrentWeatherCache(
+                cache_duration_minutes=self.current_weather_cache_minutes,
+                date_time_saved=now,
+                current_weather=current_weather,
             )
-            one_call_weather_cache = (
-                OneCallWeatherCache(
-                    date_time_saved=datetime.now(tz=timezone.utc), one_call_weather=one_call_weather
-                ).model_dump()
-                if one_call_weather
-                else None
+            if current_weather
+            else None
+        )
+        one_call_weather_cache = (
+            OneCallWeatherCache(
+                cache_duration_minutes=self.one_call_cache_minutes,
+                date_time_saved=now,
+                one_call_weather=one_call_weather,
             )
-
-            cache_hit = self.get(cache_key)
-
+            if one_call_weather
+            else None
+        )
+        if nearby:
+            current_weather_cache = current_weather_cache or nearby.current_weather
+            one_call_weather_cache = one_call_weather_cache or nearby.one_call_weather
+
+        # Held from reading the saved entry until the new one is written so a save from another
+        # process in between is not overwritten.
+        with self._storage.lock():
+            saved = self._storage.get(key)
+            cache_hit = self.unexpired(saved) if saved else None
             if cache_hit:
-                cache[cache_key.lower()] = {
-                    "location": cache_hit.location.model_dump()
-                    if cache_hit.location and not location_cache
-                    else location_cache,
-                    "currentWeather": cache_hit.current_weather.model_dump()
-                    if cache_hit.current_weather and not current_weather_cache
-                    else current_weather_cache,
-                    "oneCallWeather": cache_hit.one_call_weather.model_dump()
-                    if cache_hit.one_call_weather and not one_call_weather_cache
-                    else one_call_weather_cache,
-                }
+                if one_call_weather_cache and cache_hit.one_call_weather:
+                    one_call_weather_cache = _merge_sections(
+                        cache_hit.one_call_weather, one_call_weather_cache
+                    )
+
+                item = CacheItem(
+                    location=location or cache_hit.location,
+                    location_saved=now if location else cache_hit.location_saved,
+                    current_weather=current_weather_cache or cache_hit.current_weather,
+                    one_call_weather=one_call_weather_cache or cache_hit.one_call_weather,
+                    last_accessed=now,
+                )
             else:
-                cache[cache_key.lower()] = {
-                    "location": location_cache,
-                    "currentWeather": current_weather_cache,
-                    "oneCallWeather": one_call_weather_cache,
-                }
-
-            if self._cache:
-                for key in self._cache:
-                    if key != cache_key:
-                        saved_cache = self._cache[key]
-                        cache[key] = saved_cache.model_dump()
-
-            with open(self._cache_file, "w") as f:
-                json.dump(cache, f, cls=DateTimeEncoder)
-
-        if not self._cache or len(self._cache.keys()) < cache_size:
-            save_cache()
-        else:
-            last_key = list(self._cache.keys())[-1]
-            del self._cache[last_key]
-            save_cache()
+                item = CacheItem(
+                    location=location,
+                    location_saved=now if location else None,
+                    current_weather=current_weather_cache,
+                    one_call_weather=one_call_weather_cache,
+                    last_accessed=now,
+                )
+
+            evict = []
+            if key not in self._storage and len(self._storage) >= (cache_size or self.cache_size):
+                least_recently_used = self._storage.least_recently_used()
+                if least_recently_used:
+                    evict.append(least_recently_used)
+
+            trimmed: Dict[str, CacheItem] = {}
+            if self.max_cache_bytes:
+                item, trimmed, over_budget = self._fit_to_max_bytes(
+                    key, item, evict, self.max_cache_bytes
+                )
+                evict.extend(over_budget)
+
+            self._storage.put(key, item, evict, trimmed)
 
     def clear(self) -> None:
-        if self._cache_file.exists():
-            self._cache_file.unlink()
-
-    def get(self, cache_key: str) -> Union[CacheItem, None]:
-        if not self._cache or not self._cache.get(cache_key):
-            return None
+        with self._storage.lock():
+            self._storage.clear()
+
+    def get(
+        self, cache_key: str, allow_stale: bool = False, probe: bool = False
+    ) -> Union[CacheItem, None]:
+        """Get the cached entry for a key.
+
+        Expired weather is removed from the returned entry unless allow_stale is True, in which
+        case it is returned as saved so it can be displayed while it is refreshed. Lookups are
+        counted once per search, so probe is set for any other read, which is neither counted
+        nor marks the entry as recently used.
+        """
+        key = cache_key.lower()
+        # Taking the lock picks up weather saved by other processes since the cache was read.
+        with self._storage.lock():
+            cache = self._storage.get(key)
+            if not cache:
+                if not probe:
+                    self._lookups["miss"] += 1
+                return None
+
+            # Access times only need to be close enough to order entries for eviction, so they
+            # are saved at most once a minute to avoid rewriting the cache on every lookup.
+            now = datetime.now(tz=timezone.utc)
+            if not probe and (
+                not cache.last_accessed or now - cache.last_accessed > ACCESS_TIME_RESOLUTION
+            ):
+                self._storage.touch(key, now)
+
+        fresh = self.unexpired(cache)
+        if not probe:
+            self._lookups["hit" if fresh is cache else "expired"] += 1
+        return cache if allow_stale else fresh
+
+    def items(self) -> List[Tuple[str, CacheItem]]:
+        """Every saved entry, including expired values, without counting it as a lookup."""
+        with self._storage.lock():
+            items = [(key, self._storage.get(key)) for key in self._storage.keys()]
+
+        return [(key, item) for key, item in items if item]
+
+    def lookup_counts(self) -> Dict[str, int]:
+        """Lifetime hit, miss and expired counts for get, including ones not yet saved."""
+        counts = Counter(self._stats.load())
+        counts.update(self._lookups)
+        return {name: counts[name] for name in ("hit", "miss", "expired")}
+
+    def save_stats(self) -> None:
+        if not self._lookups:
+            return
+
+        with self._storage.lock():
+            self._stats.add(self._lookups)
+
+        self._lookups.clear()
+
+    def _fit_to_max_bytes(
+        self, cache_key: str, item: CacheItem, evict: List[str], max_bytes: int
+    ) -> Tuple[CacheItem, Dict[str, CacheItem], List[str]]:
+        """Trim saved entries, least recently used first, until the cache fits in max_cache_bytes.
+
+        Minutely forecasts are dropped first, followed by one call forecasts and then current
+        weather, so locations are only evicted once no weather is left to remove.
+        """
+        sizes = {
+            k: v for k, v in self._storage.sizes().items() if k != cache_key and k not in evict
+        }
+        sizes[cache_key] = self._storage.entry_size(item)
+        total = sum(sizes.values())
+        trimmed: Dict[str, CacheItem] = {cache_key: item}
+
+        for step, (can_trim, trim) in enumerate(_TRIM_STEPS):
+            for key in sizes:
+                if total <= max_bytes:
+                    break
+
+                # Only the minutely forecast is trimmed from the entry being saved since the
+                # rest of it is about to be displayed.
+                if key == cache_key and step > 0:
+                    continue
+
+                entry = trimmed.get(key) or self._storage.get(key)
+                if entry and can_trim(entry):
+                    trimmed[key] = trim(entry)
+                    size = self._storage.entry_size(trimmed[key])
+                    total -= sizes[key] - size
+                    sizes[key] = size
+
+        over_budget = []
+        for key in sizes:
+            if total <= max_bytes or key == cache_key:
+                break
+
+            over_budget.append(key)
+            trimmed.pop(key, None)
+            total -= sizes[key]
+
+        return trimmed.pop(cache_key), trimmed, over_budget
+
+    def unexpired(self, cache: CacheItem) -> CacheItem:
+        """Remove the values that have expired from an entry."""
+        now = datetime.now(tz=timezone.utc)
+        expired: Dict[str, None] = {}
+        if cache.location and self.location_cache_days:
+            if not cache.location_saved or now - cache.location_saved > timedelta(
+                days=self.location_cache_days
+            ):
+                expired["location"] = None
 
-        cache = self._cache[cache_key.lower()]
         if cache.current_weather:
-            time_diff = datetime.now(tz=timezone.utc) - cache.current_weather.date_time_saved
-            if (time_diff.total_seconds() / 60) > cache.current_weather.cache_duration_minutes:
-                cache.current_weather = None
+            observed = cache.current_weather.current_weather.dt
+            if now >= _expires_at(observed, cache.current_weather):
+                expired["current_weather"] = None
 
         if cache.one_call_weather:
-            time_diff = datetime.now(tz=timezone.utc) - cache.one_call_weather.date_time_saved
-            if (time_diff.total_seconds() / 60) > cache.one_call_weather.cache_duration_minutes:
-                cache.one_call_weather = None
+            observed = _EPOCH + timedelta(
+                seconds=cache.one_call_weather.one_call_weather.current.dt
+            )
+            if now >= _expires_at(observed, cache.one_call_weather):
+                expired["one_call_weather"] = None
+
+        # The cache is shared by the whole process so expired values are hidden from the caller
+        # without being removed from the saved entry.
+        return cache.model_copy(update=expired) if expired else cache
+
+
+@lru_cache(maxsize=1)
+def get_cache() -> Cache:
+    """Cache so the cache file is only read and validated once per process."""
+    settings = load_settings()
+    return Cache(
+        backend=settings.cache_backend,
+        cache_size=settings.cache_size,
+        max_cache_bytes=settings.max_cache_bytes,
+        location_cache_days=settings.location_cache_days,
+        current_weather_cache_minutes=settings.current_weather_cache_minutes,
+        one_call_cache_minutes=settings.one_call_cache_minutes,
+        compress_cache=bool(settings.compress_cache),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_geocode_index() -> GeocodeIndex:
+    """Cache so the geocode index is only opened once per process."""
+    settings = load_settings()
+    return GeocodeIndex(get_cache().cache_dir, max_age_days=settings.location_cache_days)
 
-        return cache
 
-    def _load(self) -> Union[Dict[str, CacheItem], None]:
-        if not self._cache_file.exists():
-            return None
+@asynccontextmanager
+async def single_flight(cache_key: str, section: str) -> AsyncIterator[bool]:
+    """Let one process at a time fetch a section of the weather for a cache key.
+
+    Yields True when another process held the lock first, in which case it has most likely just
+    saved the weather and the cache should be checked before fetching. Keys share a fixed number
+    of lock files so they do not pile up in the cache directory, and waiting gives up after
+    FETCH_WAIT_SECONDS so a stuck process cannot hold up the others.
+
+    The lock needs fcntl, so on Windows every fetch goes ahead without waiting on the others.
+    """
+    slot = zlib.crc32(cache_key.lower().encode()) % _FETCH_LOCK_SLOTS
+    lock_path = get_cache().cache_dir / f"fetch-{section}-{slot}.lock"
+    with open(lock_path, "a") as lock_file:
+        waited = False
+        deadline = time.monotonic() + FETCH_WAIT_SECONDS
+        while not try_lock(lock_file) and time.monotonic() < deadline:
+            waited = True
+            await asyncio.sleep(_FETCH_POLL_SECONDS)
+
+        yield waited
+
+
+def find_nearby_weather(
+    cache_key: str, location: Location, radius_km: float
+) -> Union[CacheItem, None]:
+    """Get the unexpired weather cached for the closest other location within radius_km."""
+    cache = get_cache()
+    for key in get_geocode_index().nearby(location.lat, location.lon, radius_km):
+        if key == cache_key.lower():
+            continue
+
+        cache_hit = cache.get(key, probe=True)
+        if cache_hit and (cache_hit.current_weather or cache_hit.one_call_weather):
+            return cache_hit
+
+    return None
+
+
+def missing_sections(weather: OneCallWeather, sections: Iterable[str]) -> List[str]:
+    """The one call sections that were not downloaded with the weather."""
+    return [section for section in sections if getattr(weather, section) is None]
+
+
+def _expires_at(observed: datetime, cache: CacheDuration) -> datetime:
+    """The first time after the weather was saved that upstream should have newer data.
+
+    Expiring from the observation time rather than the save time means weather is never
+    refetched before the provider has had a chance to update it.
+    """
+    cadence = timedelta(minutes=cache.cache_duration_minutes)
+    observed = min(observed, cache.date_time_saved)
+    updates_since_observed = (cache.date_time_saved - observed) // cadence + 1
+    return observed + cadence * updates_since_observed
+
+
+def _merge_sections(saved: OneCallWeatherCache, new: OneCallWeatherCache) -> OneCallWeatherCache:
+    """Add newly downloaded one call sections to the saved weather.
+
+    The new sections are added to the saved weather, rather than the other way around, so the
+    sections only it holds still expire with it. When the new weather holds every saved section
+    it replaces the saved weather.
+    """
+    saved_sections = [s for s in ONE_CALL_SECTIONS if getattr(saved.one_call_weather, s)]
+    if not missing_sections(new.one_call_weather, saved_sections):
+        return new
+
+    update = {
+        section: getattr(new.one_call_weather, section)
+        for section in ONE_CALL_SECTIONS
+        if getattr(new.one_call_weather, section) is not None
+    }
+    return saved.model_copy(
+        update={"one_call_weather": saved.one_call_weather.model_copy(update=update)}
+    )
+
+
+def _has_minutely(item: CacheItem) -> bool:
+    return bool(item.one_call_weather and item.one_call_weather.one_call_weather.minutely)
+
+
+def _without_minutely(item: CacheItem) -> CacheItem:
+    one_call = item.one_call_weather
+    if not one_call:
+        return item
+
+    weather = one_call.one_call_weather.model_copy(update={"minutely": None})
+    return item.model_copy(
+        update={"one_call_weather": one_call.model_copy(update={"one_call_weather": weather})}
+    )
 
-        with open(self._cache_file) as f:
-            json_cache = json.load(f)
 
-        return {k: CacheItem(**v) for k, v in json_cache.items()}
+_TRIM_STEPS: Tuple[Tuple[Callable[[CacheItem], bool], Callable[[CacheItem], CacheItem]], ...] = (
+    (_has_minutely, _without_minutely),
+    (
+        lambda item: item.one_call_weather is not None,
+        lambda item: item.model_copy(update={"one_call_weather": None}),
+    ),
+    (
+        lambda item: item.current_weather is not None,
+        lambda item: item.model_copy(update={"current_weather": None}),
+    ),
+)
@@ -37,6 +37,13 @@ def append_api_key(url: str) -> str:
     return f"{url}&appid={api_key}"
 
 
+class CacheBackend(str, Enum):
+    BINARY = "binary"
+    JSON = "json"
+    JOURNAL = "journal"
+    SQLITE = "sqlite"
+
+
 class TimeFormat(str, Enum):
     AMPM = "am/pm"
     TWENTY_FOUR_HOUR = "24 hour"
@@ -68,6 +75,18 @@ class Settings:
         imperial: bool | None = None,
         temp_only: bool | None = None,
         am_pm: bool | None = None,
+        cache_backend: CacheBackend = CacheBackend.JSON,
+        cache_size: int | None = None,
+        max_cache_bytes: int | None = None,
+        stale_ok: bool | None = None,
+        location_cache_days: int | None = None,
+        current_weather_cache_minutes: int | None = None,
+        one_call_cache_minutes: int | None = None,
+        compress_cache: bool | None = None,
+        reuse_radius_km: float | None = None,
+        http2: bool | None = None,
+        max_connections: int | None = None,
+        one_call_current: bool | None = None,
     ) -> None:
         self.settings_dir = settings_dir or Settings.get_default_directory()
         self._settings_file = self.settings_dir / "weather_command.yaml"
@@ -76,6 +95,18 @@ class Settings:
         self.imperial = imperial
         self.temp_only = temp_only
         self.am_pm = am_pm
+        self.cache_backend = cache_backend
+        self.cache_size = cache_size
+        self.max_cache_bytes = max_cache_bytes
+        self.stale_ok = stale_ok
+        self.location_cache_days = location_cache_days
+        self.current_weather_cache_minutes = current_weather_cache_minutes
+        self.one_call_cache_minutes = one_call_cache_minutes
+        self.compress_cache = compress_cache
+        self.reuse_radius_km = reuse_radius_km
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.one_call_current = one_call_current
 
     @property
     def display_values(self) -> str:
@@ -94,6 +125,34 @@ class Settings:
                 values = f"{values}time_format = [green]am/pm[/green]\n"
             else:
                 values = f"{values}time_format = [green]24 hour[/green]\n"
+        if self.cache_backend != CacheBackend.JSON:
+            values = f"{values}cache_backend = [green]{self.cache_backend.value}[/green]\n"
+        if self.cache_size is not None:
+            values = f"{values}cache_size = [green]{self.cache_size}[/green]\n"
+        if self.max_cache_bytes is not None:
+            values = f"{values}max_cache_bytes = [green]{self.max_cache_bytes}[/green]\n"
+        if self.stale_ok is not None:
+            values = f"{values}stale_ok = [green]{str(self.stale_ok).lower()}[/green]\n"
+        if self.location_cache_days is not None:
+            values = f"{values}location_cache_days = [green]{self.location_cache_days}[/green]\n"
+        if self.current_weather_cache_minutes is not None:
+            values = f"{values}current_weather_cache_minutes = [green]{self.current_weather_cache_minutes}[/green]\n"
+        if self.one_call_cache_minutes is not None:
+            values = (
+                f"{values}one_call_cache_minutes = [green]{self.one_call_cache_minutes}[/green]\n"
+            )
+        if self.compress_cache is not None:
+            values = f"{values}compress_cache = [green]{str(self.compress_cache).lower()}[/green]\n"
+        if self.reuse_radius_km is not None:
+            values = f"{values}reuse_radius_km = [green]{self.reuse_radius_km}[/green]\n"
+        if self.http2 is not None:
+            values = f"{values}http2 = [green]{str(self.http2).lower()}[/green]\n"
+        if self.max_connections is not None:
+            values = f"{values}max_connections = [green]{self.max_connections}[/green]\n"
+        if self.one_call_current is not None:
+            values = (
+                f"{values}one_call_current = [green]{str(self.one_call_current).lower()}[/green]\n"
+            )
 
         return values or "No settings saved"
 
@@ -126,6 +185,22 @@ class Settings:
                 if settings["settings"].get("time_format")
                 else None
             )
+            self.cache_backend = CacheBackend(
+                settings["settings"].get("cache_backend", CacheBackend.JSON.value)
+            )
+            self.cache_size = settings["settings"].get("cache_size")
+            self.max_cache_bytes = settings["settings"].get("max_cache_bytes")
+            self.stale_ok = settings["settings"].get("stale_ok")
+            self.location_cache_days = settings["settings"].get("location_cache_days")
+            self.current_weather_cache_minutes = settings["settings"].get(
+                "current_weather_cache_minutes"
+            )
+            self.one_call_cache_minutes = settings["settings"].get("one_call_cache_minutes")
+            self.compress_cache = settings["settings"].get("compress_cache")
+            self.reuse_radius_km = settings["settings"].get("reuse_radius_km")
+            self.http2 = settings["settings"].get("http2")
+            self.max_connections = settings["settings"].get("max_connections")
+            self.one_call_current = settings["settings"].get("one_call_current")
 
         if not self.api_key_env and not self.api_key_file:
             raise MissingApiKey(
@@ -151,6 +226,42 @@ class Settings:
                 TimeFormat.AMPM.value if self.am_pm else TimeFormat.TWENTY_FOUR_HOUR.value
             )
 
+        if self.cache_backend != CacheBackend.JSON:
+            settings["cache_backend"] = self.cache_backend.value
+
+        if self.cache_size is not None:
+            settings["cache_size"] = self.cache_size
+
+        if self.max_cache_bytes is not None:
+            settings["max_cache_bytes"] = self.max_cache_bytes
+
+        if self.stale_ok is not None:
+            settings["stale_ok"] = self.stale_ok
+
+        if self.location_cache_days is not None:
+            settings["location_cache_days"] = self.location_cache_days
+
+        if self.current_weather_cache_minutes is not None:
+            settings["current_weather_cache_minutes"] = self.current_weather_cache_minutes
+
+        if self.one_call_cache_minutes is not None:
+            settings["one_call_cache_minutes"] = self.one_call_cache_minutes
+
+        if self.compress_cache is not None:
+            settings["compress_cache"] = self.compress_cache
+
+        if self.reuse_radius_km is not None:
+            settings["reuse_radius_km"] = self.reuse_radius_km
+
+        if self.http2 is not None:
+            settings["http2"] = self.http2
+
+        if self.max_connections is not None:
+            settings["max_connections"] = self.max_connections
+
+        if self.one_call_current is not None:
+            settings["one_call_current"] = self.one_call_current
+
         if settings:
             with open(self._settings_file, "w") as f:
                 yaml.safe_dump({"settings": settings}, f)
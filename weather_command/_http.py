@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from importlib.util import find_spec
+
+from httpx import (
+    AsyncClient,
+    HTTPStatusError,
+    Limits,
+    NetworkError,
+    RemoteProtocolError,
+    TimeoutException,
+)
+from tenacity import RetryCallState, retry
+from tenacity.retry import retry_if_exception
+from tenacity.stop import stop_after_attempt, stop_before_delay
+
+from weather_command._config import load_settings
+
+DEFAULT_MAX_CONNECTIONS = 10
+# Idle connections are kept open this long for the next request.
+KEEPALIVE_EXPIRY_SECONDS = 30
+MAX_ATTEMPTS = 5
+# A request is not retried if the wait before it would end after this long from the first try.
+RETRY_DEADLINE_SECONDS = 15
+BACKOFF_INITIAL_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 4
+RETRY_AFTER_STATUS_CODES = (429, 503)
+
+
+@lru_cache(maxsize=1)
+def get_client() -> AsyncClient:
+    """Cache so every request in the process shares one pool of kept alive connections.
+
+    HTTP/2 is only used when the h2 package is installed, `pip install httpx[http2]`.
+    """
+    settings = load_settings()
+    max_connections = settings.max_connections or DEFAULT_MAX_CONNECTIONS
+    return AsyncClient(
+        http2=bool(settings.http2) and find_spec("h2") is not None,
+        limits=Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+async def close_client() -> None:
+    """Close the shared client if one was opened."""
+    if get_client.cache_info().currsize:
+        await get_client().aclose()
+        get_client.cache_clear()
+
+
+def is_transient(error: BaseException) -> bool:
+    """Timeouts, dropped connections, rate limiting and server errors may succeed if tried again,
+    other errors will not.
+    """
+    if isinstance(error, HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+
+    return isinstance(error, (TimeoutException, NetworkError, RemoteProtocolError))
+
+
+def retry_after(error: BaseException | None) -> float | None:
+    """Seconds the server asked to wait before retrying a 429 or 503 response, if it did."""
+    if not isinstance(error, HTTPStatusError):
+        return None
+    if error.response.status_code not in RETRY_AFTER_STATUS_CODES:
+        return None
+
+    value = error.response.headers.get("retry-after")
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if not retry_at.tzinfo:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max((retry_at - datetime.now(tz=timezone.utc)).total_seconds(), 0.0)
+
+
+def _wait(retry_state: RetryCallState) -> float:
+    """Wait as long as the server asked, otherwise back off exponentially with full jitter so
+    clients that failed together do not all retry together.
+    """
+    requested = retry_after(retry_state.outcome.exception() if retry_state.outcome else None)
+    if requested is not None:
+        return requested
+
+    backoff = BACKOFF_INITIAL_SECONDS * 2 ** (retry_state.attempt_number - 1)
+    return random.uniform(0, min(backoff, BACKOFF_MAX_SECONDS))
+
+
+# Shared by every request so they all retry the same way. Errors that are not retried, or that
+# are still failing at the deadline, are raised as is.
+retry_transient = retry(
+    retry=retry_if_exception(is_transient),
+    stop=stop_after_attempt(MAX_ATTEMPTS) | stop_before_delay(RETRY_DEADLINE_SECONDS),
+    wait=_wait,
+    reraise=True,
+)
@@ -1,28 +1,58 @@
 from __future__ import annotations
 
+import asyncio
 import sys
+import time
 from functools import lru_cache
+from typing import List, Union
 
 import httpx
-from pydantic import ValidationError
-from tenacity import retry
-from tenacity.retry import retry_if_exception_type, retry_unless_exception_type
-from tenacity.stop import stop_after_attempt
-from tenacity.wait import wait_fixed
+from pydantic import TypeAdapter, ValidationError
 
-from weather_command._cache import Cache
+from weather_command._cache import get_cache, get_geocode_index
 from weather_command._config import LOCATION_BASE_URL, console
+from weather_command._http import get_client, retry_transient
 from weather_command.errors import UnknownSearchTypeError, check_status_error
 from weather_command.models.location import Location
 
-
-@retry(
-    retry=(retry_if_exception_type() & retry_unless_exception_type(UnknownSearchTypeError)),
-    stop=stop_after_attempt(5),
-    wait=wait_fixed(0.5),
-    reraise=True,
+_LOCATION_RESPONSE: TypeAdapter[list[Location] | Location] = TypeAdapter(
+    Union[List[Location], Location]
 )
-def get_location_details(
+# Nominatim's usage policy allows at most one request a second.
+NOMINATIM_INTERVAL_SECONDS = 1.0
+
+
+class _RequestSpacing:
+    """Space out requests made by every task in the process so they start at least an interval
+    apart, while other requests carry on in the meantime.
+    """
+
+    def __init__(self) -> None:
+        self._next_request = 0.0
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def wait(self, interval: float) -> None:
+        loop = asyncio.get_running_loop()
+        lock = self._lock
+        # A lock can only be used in the event loop it was created for.
+        if lock is None or self._loop is not loop:
+            lock = self._lock = asyncio.Lock()
+            self._loop = loop
+
+        async with lock:
+            delay = self._next_request - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            self._next_request = time.monotonic() + interval
+
+
+_nominatim = _RequestSpacing()
+
+
+@retry_transient
+async def get_location_details(
     *,
     how: str,
     city_zip: str,
@@ -32,38 +62,55 @@ def get_location_details(
     if how not in ("city", "zip"):
         raise UnknownSearchTypeError(f"{type} is not a valid type")
 
-    cache = Cache()
+    cache = get_cache()
 
     base_url = build_location_url(how, city_zip, state, country)
-    cache_hit = cache.get(base_url)
+    # Callers have usually just looked the search up, so this is not counted a second time.
+    cache_hit = cache.get(base_url, probe=True)
     if cache_hit and cache_hit.location:
         return cache_hit.location
 
-    response = httpx.get(base_url, headers={"user-agent": "weather-command"})
+    geocode_index = get_geocode_index()
+    query = _geocode_query(how, city_zip, state, country)
+    indexed = geocode_index.get(query)
+    if indexed:
+        # Saved to the weather cache like a looked up location so later searches find it there
+        # without reading, or writing to, the index again.
+        cache.add(cache_key=base_url, location=indexed)
+        if not geocode_index.has_point(base_url):
+            geocode_index.put_point(base_url, indexed)
+        return indexed
+
+    if geocode_index.not_found(query):
+        _print_location_not_found_error()
+        sys.exit(1)
+
+    client = get_client()
+    await _nominatim.wait(NOMINATIM_INTERVAL_SECONDS)
+    response = await client.get(base_url, headers={"user-agent": "weather-command"})
     try:
         response.raise_for_status()
     except httpx.HTTPStatusError as e:
         check_status_error(e, console)
 
-    if not response.json():
+    try:
+        locations = _LOCATION_RESPONSE.validate_json(response.content)
+    except ValidationError:
         _print_location_not_found_error()
         sys.exit(1)
 
-    response_json = response.json()
-
-    try:
-        # Sometimes the response comes back as a single location and sometimes it is a list of
-        # locations. The if/else here is to handle both of these cases.
-        if isinstance(response_json, list):
-            location = Location(**response_json[0])
-        else:
-            location = Location(**response_json)
-
-        cache.add(cache_key=base_url, location=location)
-    except ValidationError:
+    # Sometimes the response comes back as a single location and sometimes it is a list of
+    # locations.
+    location = locations[0] if isinstance(locations, list) and locations else locations
+    if not isinstance(location, Location):
+        geocode_index.put_not_found(query)
         _print_location_not_found_error()
         sys.exit(1)
 
+    cache.add(cache_key=base_url, location=location)
+    geocode_index.put(query, location)
+    geocode_index.put_point(base_url, location)
+
     return location
 
 
@@ -84,5 +131,12 @@ def build_location_url(how: str, city_zip: str, state: str | None, country: str
     return base_url
 
 
+def _geocode_query(how: str, city_zip: str, state: str | None, country: str | None) -> str:
+    """Normalize a search so differences in case and spacing share one geocode index entry."""
+    return "|".join(
+        " ".join(part.split()).lower() for part in (how, city_zip, state or "", country or "")
+    )
+
+
 def _print_location_not_found_error() -> None:
     console.print("[red]Unable to get information for the specified location.[/red]")
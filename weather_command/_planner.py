@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import Coroutine, Sequence
+
+from weather_command._cache import find_nearby_weather, get_cache, missing_sections
+from weather_command._config import load_settings
+from weather_command._location import build_location_url, get_location_details
+from weather_command._utils import ONE_CALL_SECTIONS, build_weather_url
+from weather_command._weather import get_current_weather, get_one_call_weather
+from weather_command.models.cache import CacheItem
+from weather_command.models.location import Location
+from weather_command.models.weather import CurrentWeather, OneCallWeather
+
+
+async def plan_current_weather(
+    how: str,
+    city_zip: str,
+    *,
+    state_code: str | None,
+    country_code: str | None,
+    stale_ok: bool = False,
+) -> tuple[CurrentWeather, Location, list[Coroutine]]:
+    """Get the current weather, only requesting it if it is not cached.
+
+    When stale_ok is set expired weather is returned along with the request to refresh it, to
+    be run after the weather has been shown.
+    """
+    location_url, location, saved, fresh = await _plan_location(
+        how, city_zip, state_code, country_code
+    )
+    if fresh and fresh.current_weather:
+        return fresh.current_weather.current_weather, location, []
+
+    url = build_weather_url(forecast_type="current", lon=location.lon, lat=location.lat)
+    fetch = get_current_weather(url, location_url)
+    if stale_ok and saved and saved.current_weather:
+        return saved.current_weather.current_weather, location, [fetch]
+
+    return await fetch, location, []
+
+
+async def plan_one_call_weather(
+    how: str,
+    city_zip: str,
+    *,
+    state_code: str | None,
+    country_code: str | None,
+    sections: Sequence[str] = ONE_CALL_SECTIONS,
+    stale_ok: bool = False,
+) -> tuple[OneCallWeather, Location, list[Coroutine]]:
+    """Get the one call weather with the sections that will be displayed, only requesting the
+    ones that are not cached.
+
+    When stale_ok is set expired weather is returned along with the request to refresh it, to
+    be run after the weather has been shown.
+    """
+    location_url, location, saved, fresh = await _plan_location(
+        how, city_zip, state_code, country_code
+    )
+    if fresh and fresh.one_call_weather:
+        cached = fresh.one_call_weather.one_call_weather
+        missing = missing_sections(cached, sections)
+        if not missing:
+            return cached, location, []
+
+        url = build_weather_url(
+            forecast_type="daily", lon=location.lon, lat=location.lat, sections=missing
+        )
+        weather = await get_one_call_weather(url, location_url, missing)
+        update = {section: getattr(weather, section) for section in missing}
+        return cached.model_copy(update=update), location, []
+
+    url = build_weather_url(
+        forecast_type="daily", lon=location.lon, lat=location.lat, sections=sections
+    )
+    fetch = get_one_call_weather(url, location_url, sections)
+    if (
+        stale_ok
+        and saved
+        and saved.one_call_weather
+        and not missing_sections(saved.one_call_weather.one_call_weather, sections)
+    ):
+        return saved.one_call_weather.one_call_weather, location, [fetch]
+
+    return await fetch, location, []
+
+
+async def _plan_location(
+    how: str, city_zip: str, state_code: str | None, country_code: str | None
+) -> tuple[str, Location, CacheItem | None, CacheItem | None]:
+    """Read the cache entry for a search once, returning it both as saved and with the expired
+    values removed, along with its location.
+    """
+    location_url = build_location_url(how, city_zip, state_code, country_code)
+    cache = get_cache()
+    saved = cache.get(location_url, allow_stale=True)
+    fresh = cache.unexpired(saved) if saved else None
+    if fresh and fresh.location:
+        return location_url, fresh.location, saved, fresh
+
+    location = await get_location_details(
+        how=how, city_zip=city_zip, state=state_code, country=country_code
+    )
+    if saved:
+        return location_url, location, saved, fresh
+
+    # Weather cached for a location close enough to this one is used in place of fetching it.
+    radius_km = load_settings().reuse_radius_km
+    nearby = find_nearby_weather(location_url, location, radius_km) if radius_km else None
+    if nearby:
+        cache.add(cache_key=location_url, location=location, nearby=nearby)
+
+    return location_url, location, nearby, nearby
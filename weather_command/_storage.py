@@ -0,0 +1,990 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import zlib
+from collections import OrderedDict
+from contextlib import AbstractContextManager, contextmanager
+from datetime import date, datetime, timedelta, timezone
+from json import JSONEncoder
+from pathlib import Path
+from threading import RLock, Thread, current_thread, get_ident
+from typing import IO, Any, Iterable, Iterator, Mapping, Protocol
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Without fcntl, on Windows, the cache is only locked between threads of the same process.
+    fcntl = None  # type: ignore[assignment]
+
+from pydantic import ValidationError
+
+from weather_command.models.cache import (
+    CACHE_SCHEMA_VERSION,
+    CacheItem,
+    CurrentWeatherCache,
+    OneCallWeatherCache,
+)
+from weather_command.models.location import Location
+from weather_command.models.weather import CurrentWeather, OneCallWeather
+
+BINARY_MAGIC = b"WCMD"
+BINARY_VERSION = 1
+JOURNAL_MAX_BYTES = 256 * 1024
+# Size of the grid cells searched for nearby locations, about 11 km of latitude.
+GRID_CELL_DEGREES = 0.1
+# Searches that found nothing are usually typos, so they are only remembered long enough to stop
+# a script that repeats one from searching for it on every run.
+NOT_FOUND_CACHE_MINUTES = 60
+
+_EARTH_RADIUS_KM = 6371.0
+_KM_PER_DEGREE = math.pi * _EARTH_RADIUS_KM / 180
+
+_COMPRESSED = 1
+
+
+class DateTimeEncoder(JSONEncoder):
+    """Subclass the default encoder to be able to encode dates."""
+
+    def default(self, obj: Any) -> Any:
+        if isinstance(obj, (date, datetime)):
+            return obj.isoformat()
+
+
+class CacheLock:
+    """An exclusive lock on the cache directory that is shared with other processes.
+
+    The lock is reentrant for the thread holding it, and entering it returns True only for the
+    outermost acquisition so callers know when another process may have changed the cache since
+    they last held it.
+    """
+
+    def __init__(self, lock_file: Path) -> None:
+        self.lock_file = lock_file
+        self._lock = RLock()
+        self._depth = 0
+        self._owner: int | None = None
+        self._file: IO[str] | None = None
+
+    def __enter__(self) -> bool:
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                lock_file = open(self.lock_file, "a")
+            except BaseException:
+                self._lock.release()
+                raise
+
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._file = lock_file
+            self._owner = get_ident()
+
+        self._depth += 1
+        return self._depth == 1
+
+    def __exit__(self, *args: Any) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._file:
+            # Closing the file releases the lock held on it.
+            self._file.close()
+            self._file = None
+            self._owner = None
+
+        self._lock.release()
+
+    def held(self) -> bool:
+        return self._owner == get_ident()
+
+
+def try_lock(lock_file: IO[str]) -> bool:
+    """Take an exclusive lock on an open file without waiting, returning False if it is held.
+
+    Without fcntl, on Windows, the lock is never held so this always returns True.
+    """
+    if not fcntl:  # pragma: no cover
+        return True
+
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+
+    return True
+
+
+_LOCKS: dict[Path, CacheLock] = {}
+
+
+def cache_lock(cache_dir: Path) -> CacheLock:
+    """Get the lock for a cache directory.
+
+    flock treats each open file separately even within a process, so every storage for the same
+    directory shares one lock to be able to nest, such as when migrating from another backend.
+    """
+    lock_file = cache_dir / "cache.lock"
+    return _LOCKS.setdefault(lock_file, CacheLock(lock_file))
+
+
+class GeocodeIndex:
+    """Maps normalized location searches to locations.
+
+    Locations almost never change so they are kept apart from the weather cache, which only holds
+    a handful of entries, and are only dropped once they are older than max_age_days.
+
+    The coordinates of each weather cache key are also indexed by grid cell so weather cached
+    for one search can be found from a nearby one, and searches that found no location are kept
+    for not_found_minutes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_age_days: int | None = None,
+        not_found_minutes: int = NOT_FOUND_CACHE_MINUTES,
+    ) -> None:
+        self.index_file = cache_dir / "geocode.sqlite"
+        self.max_age_days = max_age_days
+        self.not_found_minutes = not_found_minutes
+        self._connection = sqlite3.connect(self.index_file, timeout=10)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS geocode (
+                    query TEXT PRIMARY KEY,
+                    location TEXT NOT NULL,
+                    date_time_saved TEXT NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS points (
+                    cache_key TEXT PRIMARY KEY,
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL,
+                    cell_lat INTEGER NOT NULL,
+                    cell_lon INTEGER NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS points_cell ON points (cell_lat, cell_lon)"
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS not_found (
+                    query TEXT PRIMARY KEY,
+                    date_time_saved TEXT NOT NULL
+                )
+                """
+            )
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM geocode")
+            self._connection.execute("DELETE FROM points")
+            self._connection.execute("DELETE FROM not_found")
+
+    def get(self, query: str) -> Location | None:
+        row = self._connection.execute(
+            "SELECT location, date_time_saved FROM geocode WHERE query = ?", (query,)
+        ).fetchone()
+        if not row:
+            return None
+
+        location, saved = row
+        if self.max_age_days and datetime.now(tz=timezone.utc) - datetime.fromisoformat(
+            saved
+        ) > timedelta(days=self.max_age_days):
+            return None
+
+        return Location.model_validate_json(location)
+
+    def has_point(self, cache_key: str) -> bool:
+        return (
+            self._connection.execute(
+                "SELECT 1 FROM points WHERE cache_key = ?", (cache_key.lower(),)
+            ).fetchone()
+            is not None
+        )
+
+    def nearby(self, lat: float, lon: float, radius_km: float) -> list[str]:
+        """Get the cache keys of the points within radius_km, closest first."""
+        lat_span = radius_km / _KM_PER_DEGREE
+        # Lines of longitude get closer together away from the equator.
+        lon_span = lat_span / max(math.cos(math.radians(lat)), 0.01)
+        rows = self._connection.execute(
+            """
+            SELECT cache_key, lat, lon
+            FROM points
+            WHERE cell_lat BETWEEN ? AND ? AND cell_lon BETWEEN ? AND ?
+            """,
+            (
+                _grid_cell(lat - lat_span),
+                _grid_cell(lat + lat_span),
+                _grid_cell(lon - lon_span),
+                _grid_cell(lon + lon_span),
+            ),
+        ).fetchall()
+        distances = {key: _distance_km(lat, lon, *point) for key, *point in rows}
+        return sorted(
+            (k for k, v in distances.items() if v <= radius_km), key=distances.__getitem__
+        )
+
+    def not_found(self, query: str) -> bool:
+        """Check if a search recently found no location."""
+        row = self._connection.execute(
+            "SELECT date_time_saved FROM not_found WHERE query = ?", (query,)
+        ).fetchone()
+        return bool(row) and datetime.now(tz=timezone.utc) - datetime.fromisoformat(
+            row[0]
+        ) <= timedelta(minutes=self.not_found_minutes)
+
+    def put(self, query: str, location: Location) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO geocode (query, location, date_time_saved) VALUES (?, ?, ?)",
+                (query, location.model_dump_json(), datetime.now(tz=timezone.utc).isoformat()),
+            )
+            self._connection.execute("DELETE FROM not_found WHERE query = ?", (query,))
+
+    def put_not_found(self, query: str) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO not_found (query, date_time_saved) VALUES (?, ?)",
+                (query, datetime.now(tz=timezone.utc).isoformat()),
+            )
+
+    def put_point(self, cache_key: str, location: Location) -> None:
+        with self._connection:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO points (cache_key, lat, lon, cell_lat, cell_lon)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    cache_key.lower(),
+                    location.lat,
+                    location.lon,
+                    _grid_cell(location.lat),
+                    _grid_cell(location.lon),
+                ),
+            )
+
+
+def _distance_km(lat: float, lon: float, other_lat: float, other_lon: float) -> float:
+    """Great circle distance using the haversine formula."""
+    d_lat = math.radians(other_lat - lat)
+    d_lon = math.radians(other_lon - lon)
+    a = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(lat)) * math.cos(math.radians(other_lat)) * math.sin(d_lon / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _grid_cell(degrees: float) -> int:
+    return math.floor(degrees / GRID_CELL_DEGREES)
+
+
+class CacheStats:
+    """Lifetime counts of cache lookups, kept next to the cache in cache-stats.json."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.stats_file = cache_dir / "cache-stats.json"
+
+    def add(self, counts: Mapping[str, int]) -> None:
+        """Add to the saved counts. Callers hold the cache lock so no other process's counts are
+        lost.
+        """
+        totals = self.load()
+        for name, count in counts.items():
+            totals[name] = totals.get(name, 0) + count
+
+        _write_atomic(self.stats_file, json.dumps(totals).encode())
+
+    def load(self) -> dict[str, int]:
+        if not self.stats_file.exists():
+            return {}
+
+        with open(self.stats_file) as f:
+            return json.load(f)
+
+
+class CacheStorage(Protocol):
+    cache_file: Path
+
+    def __contains__(self, cache_key: str) -> bool: ...
+
+    def __len__(self) -> int: ...
+
+    def clear(self) -> None: ...
+
+    def get(self, cache_key: str) -> CacheItem | None: ...
+
+    def keys(self) -> list[str]: ...
+
+    def least_recently_used(self) -> str | None: ...
+
+    # Held around each read-modify-write of the cache so saves from other processes are not lost.
+    def lock(self) -> AbstractContextManager[None]: ...
+
+    def put(
+        self,
+        cache_key: str,
+        item: CacheItem,
+        evict: Iterable[str] = (),
+        trimmed: Mapping[str, CacheItem] | None = None,
+    ) -> None: ...
+
+    def entry_size(self, item: CacheItem) -> int: ...
+
+    # Serialized size of each entry ordered from the least to the most recently used.
+    def sizes(self) -> dict[str, int]: ...
+
+    def touch(self, cache_key: str, accessed: datetime) -> None: ...
+
+
+class JsonCacheStorage:
+    """Stores every entry in a single json file that is rewritten on each save.
+
+    Entries are kept as the raw json until they are first read, so a run only pays to validate
+    the locations it looks up no matter how many are cached. The cache files are reloaded when
+    the lock is taken if another process has changed them since they were last read or written.
+    """
+
+    cache_file_name = "cache.json"
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_file = cache_dir / self.cache_file_name
+        self._lock = cache_lock(cache_dir)
+        with self._lock:
+            self._cache: dict[str, CacheItem | dict[str, Any]] = self._load()
+            self._saved()
+
+    def __contains__(self, cache_key: str) -> bool:
+        return cache_key in self._cache
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self) -> None:
+        if self.cache_file.exists():
+            self.cache_file.unlink()
+
+        self._cache = {}
+        self._saved()
+
+    def entry_size(self, item: CacheItem) -> int:
+        return len(item.model_dump_json(by_alias=True))
+
+    def get(self, cache_key: str) -> CacheItem | None:
+        entry = self._cache.get(cache_key)
+        if isinstance(entry, dict):
+            # Saved by a version of the cache with different models. Entries from before they
+            # were stamped may even hold weather in imperial units, so they are never read.
+            if entry.get("schemaVersion") != CACHE_SCHEMA_VERSION:
+                del self._cache[cache_key]
+                return None
+
+            entry = self._cache[cache_key] = CacheItem(**entry)
+
+        return entry
+
+    def keys(self) -> list[str]:
+        return list(self._cache.keys())
+
+    def least_recently_used(self) -> str | None:
+        return next(iter(self._least_recently_used_order()), None)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        with self._lock as acquired:
+            if acquired and self._signature != self._snapshot_signature():
+                self._cache = self._load()
+                self._saved()
+
+            yield
+
+    def put(
+        self,
+        cache_key: str,
+        item: CacheItem,
+        evict: Iterable[str] = (),
+        trimmed: Mapping[str, CacheItem] | None = None,
+    ) -> None:
+        self._cache = self._updated(cache_key, item, evict, trimmed or {})
+        self._write_snapshot(self._cache, self.cache_file)
+        self._saved()
+
+    def sizes(self) -> dict[str, int]:
+        return {k: self._entry_size(self._cache[k]) for k in self._least_recently_used_order()}
+
+    def touch(self, cache_key: str, accessed: datetime) -> None:
+        item = self.get(cache_key)
+        if item:
+            self.put(cache_key, item.model_copy(update={"last_accessed": accessed}))
+
+    def _files(self) -> tuple[Path, ...]:
+        return (self.cache_file,)
+
+    def _saved(self) -> None:
+        self._signature = self._snapshot_signature()
+
+    def _snapshot_signature(self) -> tuple[tuple[int, int, int] | None, ...]:
+        signature: list[tuple[int, int, int] | None] = []
+        for file in self._files():
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+
+        return tuple(signature)
+
+    def _least_recently_used_order(self) -> list[str]:
+        # Sorted from the oldest saved entry so that ties, such as entries saved before access
+        # times were recorded, put the oldest saved entry first.
+        return sorted(
+            reversed(self._cache.keys()),
+            key=lambda k: _last_accessed(self._cache[k])
+            or datetime.min.replace(tzinfo=timezone.utc),
+        )
+
+    def _entry_size(self, entry: CacheItem | dict[str, Any]) -> int:
+        if isinstance(entry, dict):
+            return len(json.dumps(entry, separators=(",", ":")))
+
+        return self.entry_size(entry)
+
+    def _load(self) -> dict[str, CacheItem | dict[str, Any]]:
+        return self._read_snapshot()
+
+    def _read_snapshot(self) -> dict[str, Any]:
+        if not self.cache_file.exists():
+            return {}
+
+        with open(self.cache_file) as f:
+            return json.load(f)
+
+    def _updated(
+        self,
+        cache_key: str,
+        item: CacheItem,
+        evict: Iterable[str],
+        trimmed: Mapping[str, CacheItem],
+    ) -> dict[str, CacheItem | dict[str, Any]]:
+        # The newest entry goes first so the oldest saved entry is always the last key.
+        cache: dict[str, CacheItem | dict[str, Any]] = {cache_key: item}
+        cache.update(
+            {
+                k: trimmed.get(k, v)
+                for k, v in self._cache.items()
+                if k != cache_key and k not in evict
+            }
+        )
+        return cache
+
+    def _write_snapshot(
+        self, cache: dict[str, CacheItem | dict[str, Any]], cache_file: Path
+    ) -> None:
+        # Entries that were never read are written back out as they were loaded.
+        _write_atomic(
+            cache_file,
+            json.dumps(
+                {
+                    k: v if isinstance(v, dict) else v.model_dump(by_alias=True)
+                    for k, v in cache.items()
+                },
+                cls=DateTimeEncoder,
+            ).encode(),
+        )
+
+
+class JournalCacheStorage(JsonCacheStorage):
+    """Appends only the changed fields of each save to a journal file.
+
+    cache.json is only rewritten when the journal grows past `max_journal_bytes`, at which point
+    the journal is folded into it on a background thread.
+    """
+
+    def __init__(self, cache_dir: Path, max_journal_bytes: int = JOURNAL_MAX_BYTES) -> None:
+        self.journal_file = cache_dir / "cache.journal"
+        self.max_journal_bytes = max_journal_bytes
+        self._compacting_file = cache_dir / "cache.journal.compacting"
+        self._compaction: Thread | None = None
+        super().__init__(cache_dir)
+
+    def clear(self) -> None:
+        self.wait_for_compaction()
+        for journal in (self._compacting_file, self.journal_file):
+            if journal.exists():
+                journal.unlink()
+        super().clear()
+
+    def compact(self) -> None:
+        """Fold the journal into cache.json.
+
+        The journal is moved aside before the snapshot is taken. cache.json is replaced
+        atomically so stopping part way through leaves either the old or the new snapshot, and the
+        moved journal is only removed once the new snapshot is in place.
+        """
+        with self.lock():
+            if self.journal_file.exists():
+                os.replace(self.journal_file, self._compacting_file)
+
+            self._write_snapshot(self._cache, self.cache_file)
+            if self._compacting_file.exists():
+                self._compacting_file.unlink()
+
+            self._saved()
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        # Compaction takes the lock on its own thread, so it has to finish before this thread
+        # can wait on the lock without the journal being folded in underneath it.
+        if not self._lock.held() and current_thread() is not self._compaction:
+            self.wait_for_compaction()
+
+        with super().lock():
+            yield
+
+    def put(
+        self,
+        cache_key: str,
+        item: CacheItem,
+        evict: Iterable[str] = (),
+        trimmed: Mapping[str, CacheItem] | None = None,
+    ) -> None:
+        evict = list(evict)
+        trimmed = trimmed or {}
+        records = [
+            self._record(k, v, []) for k, v in trimmed.items() if k != cache_key and k not in evict
+        ]
+        records.append(self._record(cache_key, item, evict))
+
+        self._cache = self._updated(cache_key, item, evict, trimmed)
+        with open(self.journal_file, "a") as f:
+            f.write("".join(f"{json.dumps(r, cls=DateTimeEncoder)}\n" for r in records))
+            journal_size = f.tell()
+
+        self._saved()
+
+        if journal_size > self.max_journal_bytes and not (
+            self._compaction and self._compaction.is_alive()
+        ):
+            self._compaction = Thread(target=self.compact)
+            self._compaction.start()
+
+    def wait_for_compaction(self) -> None:
+        if self._compaction:
+            self._compaction.join()
+
+    def _files(self) -> tuple[Path, ...]:
+        return (self.cache_file, self._compacting_file, self.journal_file)
+
+    def _read_snapshot(self) -> dict[str, Any]:
+        cache = OrderedDict(super()._read_snapshot())
+        for journal in (self._compacting_file, self.journal_file):
+            for record in self._read_journal(journal):
+                for key in record["evict"]:
+                    cache.pop(key, None)
+
+                entry = cache.get(record["key"], {})
+                entry.update(record["fields"])
+                cache[record["key"]] = entry
+                cache.move_to_end(record["key"], last=False)
+
+        return cache
+
+    def _read_journal(self, journal: Path) -> list[dict[str, Any]]:
+        if not journal.exists():
+            return []
+
+        with open(journal, "rb") as f:
+            data = f.read()
+
+        # A save that was interrupted leaves a partial last line. It is dropped, and cut from the
+        # file so the next record starts on its own line.
+        complete = data[: data.rfind(b"\n") + 1]
+        if len(complete) != len(data):
+            with open(journal, "r+b") as f:
+                f.truncate(len(complete))
+
+        return [json.loads(line) for line in complete.splitlines()]
+
+    def _record(self, cache_key: str, item: CacheItem, evict: list[str]) -> dict[str, Any]:
+        previous = self.get(cache_key)
+        changed = {
+            field
+            for field in CacheItem.model_fields
+            if previous is None or getattr(item, field) is not getattr(previous, field)
+        }
+        return {
+            "key": cache_key,
+            "fields": item.model_dump(by_alias=True, include=changed),
+            "evict": evict,
+        }
+
+
+class BinaryCacheStorage(JsonCacheStorage):
+    """Stores every entry in a compact binary file.
+
+    Datetimes are saved as epoch numbers, and each distinct set of object keys is written once to
+    a table that objects refer to by index so hourly and daily rows do not repeat their field
+    names. The body can optionally be zlib compressed. A json or journal cache found in the cache
+    directory is moved into the binary file the first time it is opened.
+
+    Loaded entries stay packed until they are read and are written back out unchanged, so the
+    key tables from the file are kept to give the packed entries the same indexes when saving.
+    """
+
+    cache_file_name = "cache.bin"
+
+    def __init__(self, cache_dir: Path, compress: bool = False) -> None:
+        self.compress = compress
+        self._tables: list[list[str]] = []
+        super().__init__(cache_dir)
+
+    def clear(self) -> None:
+        super().clear()
+        self._tables = []
+
+    def get(self, cache_key: str) -> CacheItem | None:
+        entry = self._cache.get(cache_key)
+        if isinstance(entry, _PackedEntry):
+            self._cache[cache_key] = _unpack(entry.packed, self._tables)
+
+        return super().get(cache_key)
+
+    def _entry_size(self, entry: CacheItem | dict[str, Any]) -> int:
+        if isinstance(entry, _PackedEntry):
+            return len(json.dumps(entry.packed, separators=(",", ":")))
+
+        return super()._entry_size(entry)
+
+    def _load(self) -> dict[str, CacheItem | dict[str, Any]]:
+        if not self.cache_file.exists():
+            self._migrate()
+
+        return self._read_snapshot()
+
+    def _migrate(self) -> None:
+        legacy = JournalCacheStorage(self.cache_file.parent)
+        if len(legacy):
+            self._write_snapshot(legacy._cache, self.cache_file)
+            legacy.clear()
+
+    def _read_snapshot(self) -> dict[str, Any]:
+        if not self.cache_file.exists():
+            return {}
+
+        with open(self.cache_file, "rb") as f:
+            data = f.read()
+
+        # A file written by an incompatible version is treated as an empty cache.
+        if data[:4] != BINARY_MAGIC or data[4] != BINARY_VERSION:
+            return {}
+
+        body = zlib.decompress(data[6:]) if data[5] & _COMPRESSED else data[6:]
+        self._tables, entries = json.loads(body)
+        return {k: _PackedEntry(v, self._tables) for k, v in entries.items()}
+
+    def _write_snapshot(
+        self, cache: dict[str, CacheItem | dict[str, Any]], cache_file: Path
+    ) -> None:
+        tables = {tuple(table): i for i, table in enumerate(self._tables)}
+        entries = {
+            k: v.packed
+            if isinstance(v, _PackedEntry)
+            else _pack(v if isinstance(v, dict) else v.model_dump(by_alias=True), tables)
+            for k, v in cache.items()
+        }
+        self._tables = [list(table) for table in tables]
+        body = json.dumps([self._tables, entries], separators=(",", ":")).encode()
+        flags = 0
+        if self.compress:
+            body = zlib.compress(body)
+            flags |= _COMPRESSED
+
+        _write_atomic(cache_file, BINARY_MAGIC + bytes((BINARY_VERSION, flags)) + body)
+
+
+class _PackedEntry(dict):
+    """An entry read from the binary cache that only exposes its access time until it is read."""
+
+    def __init__(self, packed: dict[str, list[Any]], tables: list[list[str]]) -> None:
+        ((table, values),) = packed.items()
+        fields = dict(zip(tables[int(table)], values))
+        super().__init__(lastAccessed=fields.get("lastAccessed"))
+        self.packed = packed
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write to a temporary file next to path and then move it over path.
+
+    Readers in other processes see either the previous or the new file, never a partial one.
+    """
+    fd, temp_file = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_file, path)
+    except BaseException:
+        os.unlink(temp_file)
+        raise
+
+
+def _last_accessed(entry: CacheItem | dict[str, Any]) -> datetime | None:
+    if not isinstance(entry, dict):
+        return entry.last_accessed
+
+    last_accessed = entry.get("lastAccessed")
+    if isinstance(last_accessed, (int, float)):
+        return datetime.fromtimestamp(last_accessed, tz=timezone.utc)
+
+    return datetime.fromisoformat(last_accessed) if last_accessed else None
+
+
+def _pack(value: Any, tables: dict[tuple[str, ...], int]) -> Any:
+    if isinstance(value, dict):
+        table = tables.setdefault(tuple(value), len(tables))
+        return {str(table): [_pack(v, tables) for v in value.values()]}
+    if isinstance(value, list):
+        return [_pack(v, tables) for v in value]
+    if isinstance(value, datetime):
+        timestamp = value.timestamp()
+        return int(timestamp) if timestamp.is_integer() else timestamp
+
+    return value
+
+
+def _unpack(value: Any, tables: list[list[str]]) -> Any:
+    if isinstance(value, dict):
+        ((table, values),) = value.items()
+        return {k: _unpack(v, tables) for k, v in zip(tables[int(table)], values)}
+    if isinstance(value, list):
+        return [_unpack(v, tables) for v in value]
+
+    return value
+
+
+class SqliteCacheStorage:
+    """Stores one row per cache key so lookups and saves only touch a single indexed row."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_file = cache_dir / "cache.sqlite"
+        self._lock = cache_lock(cache_dir)
+        self._connection = sqlite3.connect(self.cache_file, timeout=10)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    cache_key TEXT PRIMARY KEY,
+                    location TEXT,
+                    location_saved TEXT,
+                    current_weather TEXT,
+                    current_weather_saved TEXT,
+                    current_weather_minutes INTEGER,
+                    one_call_weather TEXT,
+                    one_call_weather_saved TEXT,
+                    one_call_weather_minutes INTEGER,
+                    schema_version INTEGER NOT NULL,
+                    date_time_saved TEXT NOT NULL,
+                    last_accessed TEXT NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_last_accessed ON cache (last_accessed)"
+            )
+
+    def __contains__(self, cache_key: str) -> bool:
+        row = self._connection.execute(
+            "SELECT 1 FROM cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM cache")
+
+    def entry_size(self, item: CacheItem) -> int:
+        return sum(len(blob) for blob in self._blobs(item) if blob)
+
+    def get(self, cache_key: str) -> CacheItem | None:
+        row = self._connection.execute(
+            """
+            SELECT location, location_saved, current_weather, current_weather_saved,
+                current_weather_minutes, one_call_weather, one_call_weather_saved,
+                one_call_weather_minutes, schema_version, last_accessed
+            FROM cache
+            WHERE cache_key = ?
+            """,
+            (cache_key,),
+        ).fetchone()
+        if not row:
+            return None
+
+        try:
+            return self._item(row)
+        except ValidationError:
+            if row[8] == CACHE_SCHEMA_VERSION:
+                raise
+
+            # Saved by a version of the cache with different models.
+            with self._connection:
+                self._connection.execute("DELETE FROM cache WHERE cache_key = ?", (cache_key,))
+            return None
+
+    def keys(self) -> list[str]:
+        rows = self._connection.execute(
+            "SELECT cache_key FROM cache ORDER BY date_time_saved DESC"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def least_recently_used(self) -> str | None:
+        row = self._connection.execute(
+            "SELECT cache_key FROM cache ORDER BY last_accessed LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        # Each read goes to the database so there is nothing to reload.
+        with self._lock:
+            yield
+
+    def put(
+        self,
+        cache_key: str,
+        item: CacheItem,
+        evict: Iterable[str] = (),
+        trimmed: Mapping[str, CacheItem] | None = None,
+    ) -> None:
+        rows = [self._row(k, v) for k, v in (trimmed or {}).items() if k != cache_key]
+        rows.append(self._row(cache_key, item))
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM cache WHERE cache_key = ?", [(key,) for key in evict]
+            )
+            self._connection.executemany(
+                """
+                INSERT OR REPLACE INTO cache (
+                    cache_key,
+                    location,
+                    location_saved,
+                    current_weather,
+                    current_weather_saved,
+                    current_weather_minutes,
+                    one_call_weather,
+                    one_call_weather_saved,
+                    one_call_weather_minutes,
+                    schema_version,
+                    date_time_saved,
+                    last_accessed
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+
+    def sizes(self) -> dict[str, int]:
+        rows = self._connection.execute(
+            """
+            SELECT
+                cache_key,
+                COALESCE(LENGTH(location), 0)
+                    + COALESCE(LENGTH(current_weather), 0)
+                    + COALESCE(LENGTH(one_call_weather), 0)
+            FROM cache
+            ORDER BY last_accessed
+            """
+        ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def touch(self, cache_key: str, accessed: datetime) -> None:
+        with self._connection:
+            self._connection.execute(
+                "UPDATE cache SET last_accessed = ? WHERE cache_key = ?",
+                (accessed.isoformat(), cache_key),
+            )
+
+    def _blobs(self, item: CacheItem) -> tuple[str | None, str | None, str | None]:
+        return (
+            item.location.model_dump_json() if item.location else None,
+            item.current_weather.current_weather.model_dump_json()
+            if item.current_weather
+            else None,
+            item.one_call_weather.one_call_weather.model_dump_json()
+            if item.one_call_weather
+            else None,
+        )
+
+    def _item(self, fields: tuple[Any, ...]) -> CacheItem:
+        (
+            location,
+            location_saved,
+            current_weather,
+            current_saved,
+            current_minutes,
+            one_call_weather,
+            one_call_saved,
+            one_call_minutes,
+            schema_version,
+            last_accessed,
+        ) = fields
+        return CacheItem(
+            location=Location.model_validate_json(location) if location else None,
+            location_saved=datetime.fromisoformat(location_saved) if location_saved else None,
+            current_weather=CurrentWeatherCache(
+                cache_duration_minutes=current_minutes,
+                date_time_saved=datetime.fromisoformat(current_saved),
+                current_weather=CurrentWeather.model_validate_json(current_weather),
+            )
+            if current_weather
+            else None,
+            one_call_weather=OneCallWeatherCache(
+                cache_duration_minutes=one_call_minutes,
+                date_time_saved=datetime.fromisoformat(one_call_saved),
+                one_call_weather=OneCallWeather.model_validate_json(one_call_weather),
+            )
+            if one_call_weather
+            else None,
+            last_accessed=datetime.fromisoformat(last_accessed),
+            schema_version=schema_version,
+        )
+
+    def _row(self, cache_key: str, item: CacheItem) -> tuple[str | int | None, ...]:
+        current = item.current_weather
+        one_call = item.one_call_weather
+        saved = max(
+            [x.date_time_saved for x in (current, one_call) if x],
+            default=datetime.now(tz=timezone.utc),
+        )
+        location_blob, current_blob, one_call_blob = self._blobs(item)
+        return (
+            cache_key,
+            location_blob,
+            item.location_saved.isoformat() if item.location_saved else None,
+            current_blob,
+            current.date_time_saved.isoformat() if current else None,
+            current.cache_duration_minutes if current else None,
+            one_call_blob,
+            one_call.date_time_saved.isoformat() if one_call else None,
+            one_call.cache_duration_minutes if one_call else None,
+            item.schema_version,
+            saved.isoformat(),
+            (item.last_accessed or saved).isoformat(),
+        )
@@ -1,17 +1,34 @@
 from __future__ import annotations
 
-from weather_command._config import WEATHER_BASE_URL, append_api_key
+from typing import Iterable
+
+from weather_command._config import WEATHER_BASE_URL, Units, append_api_key
+
+# Weather is always requested and cached in metric and converted when it is displayed, so one
+# cached response can be shown in either unit system.
+CANONICAL_UNITS = Units.METRIC
+
+# One call sections that are only downloaded when they will be displayed. The current section is
+# always downloaded since the one call weather expires from its observation time, and the
+# minutely forecast and alerts are never displayed.
+ONE_CALL_SECTIONS = ("hourly", "daily")
+_NEVER_DISPLAYED = ("minutely", "alerts")
 
 
 def build_weather_url(
     forecast_type: str,
-    units: str,
     lon: float | None = None,
     lat: float | None = None,
+    sections: Iterable[str] = ONE_CALL_SECTIONS,
 ) -> str:
     if forecast_type == "current":
-        url = f"{WEATHER_BASE_URL}/weather?lat={lat}&lon={lon}&units={units}"
+        url = f"{WEATHER_BASE_URL}/weather?lat={lat}&lon={lon}&units={CANONICAL_UNITS.value}"
     else:
-        url = f"{WEATHER_BASE_URL}/onecall?lat={lat}&lon={lon}&units={units}"
+        include = set(sections)
+        exclude = [s for s in ONE_CALL_SECTIONS if s not in include] + list(_NEVER_DISPLAYED)
+        url = (
+            f"{WEATHER_BASE_URL}/onecall?lat={lat}&lon={lon}&units={CANONICAL_UNITS.value}"
+            f"&exclude={','.join(exclude)}"
+        )
 
     return append_api_key(url)
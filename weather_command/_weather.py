@@ -3,54 +3,75 @@ from __future__ import annotations
 import sys
 from enum import Enum
 from functools import lru_cache
+from typing import Sequence
 
-from httpx import AsyncClient, HTTPStatusError
+from httpx import HTTPStatusError
 from pydantic import ValidationError
-from tenacity import retry
-from tenacity.stop import stop_after_attempt
-from tenacity.wait import wait_fixed
 
-from weather_command._cache import Cache
+from weather_command._cache import get_cache, missing_sections, single_flight
 from weather_command._config import console
+from weather_command._http import get_client, retry_transient
+from weather_command._utils import ONE_CALL_SECTIONS
 from weather_command.errors import check_status_error
 from weather_command.models.weather import CurrentWeather, OneCallWeather
 
 
-@retry(stop=stop_after_attempt(5), wait=wait_fixed(0.5), reraise=True)
 async def get_current_weather(url: str, cache_key: str) -> CurrentWeather:
-    try:
-        async with AsyncClient() as client:
-            response = await client.get(url)
+    async with single_flight(cache_key, "current") as waited:
+        # Another process fetching the same location has likely saved the weather already.
+        cached = get_cache().get(cache_key, probe=True) if waited else None
+        if cached and cached.current_weather:
+            return cached.current_weather.current_weather
+
+        return await _fetch_current_weather(url, cache_key)
+
+
+async def get_one_call_weather(
+    url: str, cache_key: str, sections: Sequence[str] = ONE_CALL_SECTIONS
+) -> OneCallWeather:
+    """Get the one call weather, sections being the ones the url downloads."""
+    async with single_flight(cache_key, "one_call") as waited:
+        cached = get_cache().get(cache_key, probe=True) if waited else None
+        if cached and cached.one_call_weather:
+            weather = cached.one_call_weather.one_call_weather
+            if not missing_sections(weather, sections):
+                return weather
 
+        return await _fetch_one_call_weather(url, cache_key)
+
+
+@retry_transient
+async def _fetch_current_weather(url: str, cache_key: str) -> CurrentWeather:
+    try:
+        response = await get_client().get(url)
         response.raise_for_status()
     except HTTPStatusError as e:
         check_status_error(e, console)
 
     try:
-        weather = CurrentWeather(**response.json())
+        weather = CurrentWeather.model_validate_json(response.content)
     except ValidationError:
         _print_validation_error()
 
-    cache = Cache()
+    cache = get_cache()
     cache.add(cache_key=cache_key, current_weather=weather)
     return weather
 
 
-@retry(stop=stop_after_attempt(5), wait=wait_fixed(0.5), reraise=True)
-async def get_one_call_weather(url: str, cache_key: str) -> OneCallWeather:
-    async with AsyncClient() as client:
-        response = await client.get(url)
+@retry_transient
+async def _fetch_one_call_weather(url: str, cache_key: str) -> OneCallWeather:
+    response = await get_client().get(url)
     try:
         response.raise_for_status()
     except HTTPStatusError as e:
         check_status_error(e, console)
 
     try:
-        weather = OneCallWeather(**response.json())
+        weather = OneCallWeather.model_validate_json(response.content)
     except ValidationError:
         _print_validation_error()
 
-    cache = Cache()
+    cache = get_cache()
     cache.add(cache_key=cache_key, one_call_weather=weather)
 
     return weather
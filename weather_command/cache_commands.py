@@ -0,0 +1,202 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Coroutine, Dict, List, Tuple, Union
+
+from pydantic import BaseModel
+from rich.table import Table
+from typer import Argument, Exit, Option, Typer
+
+from weather_command._cache import get_cache, get_geocode_index
+from weather_command._config import console
+from weather_command._http import close_client
+from weather_command._location import build_location_url, get_location_details
+from weather_command._utils import build_weather_url
+from weather_command._weather import get_current_weather, get_one_call_weather
+from weather_command.models.cache import CacheItem
+from weather_command.models.location import Location
+
+DEFAULT_WARM_CONCURRENCY = 4
+# Upper bounds of the age ranges cached values are grouped into, anything older goes in the last.
+AGE_RANGES = (
+    (timedelta(minutes=10), "< 10 minutes"),
+    (timedelta(hours=1), "< 1 hour"),
+    (timedelta(days=1), "< 1 day"),
+    (timedelta(days=7), "< 7 days"),
+)
+
+# how, city or zip, state, country
+_Search = Tuple[str, str, Union[str, None], Union[str, None]]
+
+app = Typer()
+
+
+@app.command()
+def stats() -> None:
+    """Show what is in the cache and how often lookups find unexpired weather in it."""
+    cache = get_cache()
+    now = datetime.now(tz=timezone.utc)
+    sections: Dict[str, List[Tuple[int, Union[datetime, None]]]] = {
+        "Location": [],
+        "Current weather": [],
+        "One call weather": [],
+    }
+    items = cache.items()
+    for _, item in items:
+        for name, value, saved in _sections(item):
+            sections[name].append((len(value.model_dump_json()), saved))
+
+    age_labels = [label for _, label in AGE_RANGES] + ["Older"]
+    entries = Table("Type", "Entries", "Bytes", *age_labels, title=f"{len(items)} cache entries")
+    for name, section in sections.items():
+        ages = dict.fromkeys(age_labels, 0)
+        for _, saved in section:
+            ages[_age_label(now - saved) if saved else "Older"] += 1
+
+        entries.add_row(
+            name,
+            str(len(section)),
+            str(sum(size for size, _ in section)),
+            *(str(count) for count in ages.values()),
+        )
+
+    counts = cache.lookup_counts()
+    total = sum(counts.values())
+    hit_rate = f"{counts['hit'] / total:.0%}" if total else "-"
+    lookups = Table("Hits", "Misses", "Expired", "Hit rate", title="Lookups")
+    lookups.add_row(str(counts["hit"]), str(counts["miss"]), str(counts["expired"]), hit_rate)
+
+    console.print(entries)
+    console.print(lookups)
+
+
+@app.command()
+def warm(
+    file: Path = Argument(
+        ..., exists=True, dir_okay=False, help="File with one location on each line."
+    ),
+    concurrency: int = Option(
+        DEFAULT_WARM_CONCURRENCY, min=1, help="The most locations to fetch at the same time."
+    ),
+    summary: bool = Option(
+        False, "--summary", help="If this flag is set the number of locations warmed is printed."
+    ),
+) -> None:
+    """Fill the cache with the weather for each location in a file.
+
+    Each line is city,<city>[,<state>][,<country>] or zip,<zip>[,<state>][,<country>] or
+    <lat>,<lon>. Blank lines and lines starting with # are skipped.
+    """
+    locations = _read_locations(file)
+    cache_size = get_cache().cache_size
+    if len(locations) > cache_size:
+        # Warming would evict the first locations to make room for the last ones.
+        console.print(
+            f"The file has {len(locations)} locations but the cache only holds {cache_size}, "
+            "increase it with weather settings cache-size",
+            style="error",
+        )
+        raise Exit(1)
+
+    # Nothing is printed while warming so it can be run from cron.
+    console.quiet = True
+    try:
+        results = asyncio.run(_warm_all(locations, concurrency))
+    finally:
+        console.quiet = False
+        get_cache().save_stats()
+
+    failed = results.count(False)
+    if summary:
+        console.print(f"Warmed {len(results) - failed} of {len(results)} locations")
+
+    if failed:
+        raise Exit(1)
+
+
+def _age_label(age: timedelta) -> str:
+    return next((label for limit, label in AGE_RANGES if age < limit), "Older")
+
+
+def _sections(item: CacheItem) -> List[Tuple[str, BaseModel, Union[datetime, None]]]:
+    sections: List[Tuple[str, BaseModel, Union[datetime, None]]] = []
+    if item.location:
+        sections.append(("Location", item.location, item.location_saved))
+    if item.current_weather:
+        current = item.current_weather
+        sections.append(("Current weather", current.current_weather, current.date_time_saved))
+    if item.one_call_weather:
+        one_call = item.one_call_weather
+        sections.append(("One call weather", one_call.one_call_weather, one_call.date_time_saved))
+
+    return sections
+
+
+def _read_locations(file: Path) -> List[Union[_Search, Location]]:
+    locations: List[Union[_Search, Location]] = []
+    with open(file) as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            fields = [field.strip() for field in line.split(",")]
+            if fields[0].lower() in ("city", "zip") and 2 <= len(fields) <= 4 and fields[1]:
+                how, city_zip, state, country = (fields + ["", "", ""])[:4]
+                locations.append((how.lower(), city_zip, state or None, country or None))
+                continue
+
+            try:
+                lat, lon = (float(field) for field in fields)
+                if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    raise ValueError
+            except ValueError:
+                console.print(f"Line {number} is not a valid location: {line}", style="error")
+                raise Exit(1) from None
+
+            locations.append(Location(display_name=f"{lat}, {lon}", lat=lat, lon=lon))
+
+    return locations
+
+
+async def _warm_all(locations: List[Union[_Search, Location]], concurrency: int) -> List[bool]:
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        return await asyncio.gather(*(_warm(location, semaphore) for location in locations))
+    finally:
+        await close_client()
+
+
+async def _warm(location: Union[_Search, Location], semaphore: asyncio.Semaphore) -> bool:
+    """Fetch the weather missing from the cache for a location, returning False if it failed."""
+    async with semaphore:
+        try:
+            cache = get_cache()
+            if isinstance(location, Location):
+                # Coordinates are never searched for directly, so they are cached to be found
+                # as a nearby location by searches close to them.
+                cache_key = f"{location.lat},{location.lon}"
+                cache.add(cache_key=cache_key, location=location)
+                get_geocode_index().put_point(cache_key, location)
+            else:
+                how, city_zip, state, country = location
+                cache_key = build_location_url(how, city_zip, state, country)
+                location = await get_location_details(
+                    how=how, city_zip=city_zip, state=state, country=country
+                )
+
+            cache_hit = cache.get(cache_key, probe=True)
+            retrieve: List[Coroutine] = []
+            if not (cache_hit and cache_hit.current_weather):
+                url = build_weather_url(forecast_type="current", lon=location.lon, lat=location.lat)
+                retrieve.append(get_current_weather(url, cache_key))
+            if not (cache_hit and cache_hit.one_call_weather):
+                url = build_weather_url(forecast_type="daily", lon=location.lon, lat=location.lat)
+                retrieve.append(get_one_call_weather(url, cache_key))
+
+            await asyncio.gather(*retrieve)
+        # Errors fetching a location exit, which should only stop warming that location.
+        except (Exception, SystemExit):
+            return False
+
+    return True
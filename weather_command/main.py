@@ -1,20 +1,21 @@
 import asyncio
 from enum import Enum
-from typing import Coroutine, List, Union
+from typing import Coroutine, List, Sequence, Union
 
 from typer import Argument, Exit, Option, Typer, echo
 
-from weather_command import settings_commands
+from weather_command import cache_commands, settings_commands
 from weather_command._builder import show_current, show_daily, show_hourly
-from weather_command._cache import Cache
+from weather_command._cache import get_cache, get_geocode_index
 from weather_command._config import console, load_settings
-from weather_command._location import build_location_url, get_location_details
-from weather_command._utils import build_weather_url
-from weather_command._weather import get_current_weather, get_one_call_weather
+from weather_command._http import close_client
+from weather_command._planner import plan_current_weather, plan_one_call_weather
+from weather_command._utils import ONE_CALL_SECTIONS
 
 __version__ = "6.1.7"
 
 app = Typer()
+app.add_typer(cache_commands.app, name="cache", help="Manage the weather cache.")
 app.add_typer(settings_commands.app, name="settings", help="Manage saved settings.")
 
 
@@ -29,58 +30,20 @@ class How(str, Enum):
     ZIP = "zip"
 
 
-async def _preload_cache(
-    how: str,
-    city_zip: str,
-    state_code: Union[str, None],
-    country_code: Union[str, None],
-    units: str,
-) -> None:
-    with console.status("Getting weather..."):
-        retrieve: List[Coroutine] = []
-        location_url = build_location_url(how, city_zip, state_code, country_code)
-        cache = Cache()
-        cache_hit = cache.get(location_url)
-        if cache_hit:
-            if cache_hit.location:
-                location = cache_hit.location
-            else:  # pragma: no cover
-                # This is a fail safe. It should only be possible to get here if someone manually
-                # modified the cache file.
-                location = get_location_details(
-                    how="zip", city_zip=city_zip, state=state_code, country=country_code
-                )
-
-            if not cache_hit.current_weather:
-                url = build_weather_url(
-                    forecast_type="current",
-                    units=units,
-                    lon=location.lon,
-                    lat=location.lat,
-                )
-                retrieve.append(get_current_weather(url, location_url))
-            if not cache_hit.one_call_weather:
-                url = build_weather_url(
-                    forecast_type="daily", units=units, lon=location.lon, lat=location.lat
-                )
-                retrieve.append(get_one_call_weather(url, location_url))
-        else:
-            location = get_location_details(
-                how=how, city_zip=city_zip, state=state_code, country=country_code
-            )
-
-            url = build_weather_url(
-                forecast_type="current", units=units, lon=location.lon, lat=location.lat
-            )
-            retrieve.append(get_current_weather(url, location_url))
-
-            url = build_weather_url(
-                forecast_type="daily", units=units, lon=location.lon, lat=location.lat
-            )
-            retrieve.append(get_one_call_weather(url, location_url))
+async def _refresh_quietly(fetch: Coroutine) -> None:
+    """Refresh weather that was already displayed, ignoring any failure.
 
-        if retrieve:
-            await asyncio.gather(*retrieve)
+    Errors are not printed since they would appear after the weather and the next lookup will
+    fetch the weather again anyway.
+    """
+    quiet = console.quiet
+    console.quiet = True
+    try:
+        await fetch
+    except (Exception, SystemExit):
+        pass
+    finally:
+        console.quiet = quiet
 
 
 async def _runner(
@@ -95,6 +58,8 @@ async def _runner(
     pager: bool,
     clear_cache: bool,
     terminal_width: Union[int, None],
+    stale_ok: bool = False,
+    one_call_current: bool = False,
 ) -> None:
     settings = load_settings()
 
@@ -113,49 +78,81 @@ async def _runner(
     else:
         am_pm_choice = am_pm
 
+    if not stale_ok and settings.stale_ok is not None:
+        stale_ok_choice = settings.stale_ok
+    else:
+        stale_ok_choice = stale_ok
+
+    if not one_call_current and settings.one_call_current is not None:
+        one_call_current_choice = settings.one_call_current
+    else:
+        one_call_current_choice = one_call_current
+
     if clear_cache:
-        cache = Cache()
+        cache = get_cache()
         cache.clear()
+        get_geocode_index().clear()
 
-    if not clear_cache:
-        await _preload_cache(how, city_zip, state_code, country_code, units)
+    # Stats are saved and the client closed however the lookup ends, including exiting early
+    # when the location can't be found.
+    try:
+        refresh: List[Coroutine] = []
+        if forecast_type == "current" and not one_call_current_choice:
+            with console.status("Getting weather..."):
+                current_weather, location, refresh = await plan_current_weather(
+                    how,
+                    city_zip,
+                    state_code=state_code,
+                    country_code=country_code,
+                    stale_ok=stale_ok_choice,
+                )
+            show_current(
+                current_weather,
+                location,
+                units=units,
+                am_pm=am_pm_choice,
+                temp_only=temp_only_choice,
+                pager=pager,
+                terminal_width=terminal_width,
+            )
+        else:
+            # Only the forecast being displayed is downloaded, unless current weather is shown from
+            # the one call weather in which case every forecast is so a single cached request serves
+            # every forecast type.
+            if one_call_current_choice:
+                sections: Sequence[str] = ONE_CALL_SECTIONS
+            else:
+                sections = ("daily",) if forecast_type == "daily" else ("hourly",)
 
-    if forecast_type == "current":
-        await show_current(
-            how=how,
-            city_zip=city_zip,
-            units=units,
-            state_code=state_code,
-            country_code=country_code,
-            am_pm=am_pm_choice,
-            temp_only=temp_only_choice,
-            pager=pager,
-            terminal_width=terminal_width,
-        )
-    elif forecast_type == "daily":
-        await show_daily(
-            how=how,
-            city_zip=city_zip,
-            units=units,
-            state_code=state_code,
-            country_code=country_code,
-            am_pm=am_pm_choice,
-            temp_only=temp_only_choice,
-            pager=pager,
-            terminal_width=terminal_width,
-        )
-    elif forecast_type == "hourly":
-        await show_hourly(
-            how=how,
-            city_zip=city_zip,
-            units=units,
-            state_code=state_code,
-            country_code=country_code,
-            am_pm=am_pm_choice,
-            temp_only=temp_only_choice,
-            pager=pager,
-            terminal_width=terminal_width,
-        )
+            with console.status("Getting weather..."):
+                one_call_weather, location, refresh = await plan_one_call_weather(
+                    how,
+                    city_zip,
+                    state_code=state_code,
+                    country_code=country_code,
+                    sections=sections,
+                    stale_ok=stale_ok_choice,
+                )
+            show = show_daily if forecast_type == "daily" else show_hourly
+            if forecast_type == "current":
+                show = show_current
+            show(
+                one_call_weather,
+                location,
+                units=units,
+                am_pm=am_pm_choice,
+                temp_only=temp_only_choice,
+                pager=pager,
+                terminal_width=terminal_width,
+            )
+
+        # Expired weather that was displayed is refreshed after it is shown so the next lookup is
+        # up to date without making this one wait on the network.
+        if refresh:
+            await asyncio.gather(*(_refresh_quietly(fetch) for fetch in refresh))
+    finally:
+        get_cache().save_stats()
+        await close_client()
 
 
 @app.command()
@@ -195,6 +192,16 @@ def city(
     ),
     pager: bool = Option(False, "--pager", "-p", help="Display the results in a pager."),
     clear_cache: bool = Option(False, help="Clear the cache data before running."),
+    stale_ok: bool = Option(
+        False,
+        "--stale-ok",
+        help="If this flag is set expired cached weather will be displayed and then refreshed.",
+    ),
+    one_call_current: bool = Option(
+        False,
+        "--one-call-current",
+        help="If this flag is set current weather will be displayed from the one call weather.",
+    ),
     terminal_width: Union[int, None] = Option(
         None, help="Allows for overriding the default terminal width."
     ),
@@ -213,6 +220,8 @@ def city(
             pager=pager,
             clear_cache=clear_cache,
             terminal_width=terminal_width,
+            stale_ok=stale_ok,
+            one_call_current=one_call_current,
         )
     )
 
@@ -254,6 +263,16 @@ def zip(
     ),
     pager: bool = Option(False, "--pager", "-p", help="Display the results in a pager."),
     clear_cache: bool = Option(False, help="Clear the cache data before running."),
+    stale_ok: bool = Option(
+        False,
+        "--stale-ok",
+        help="If this flag is set expired cached weather will be displayed and then refreshed.",
+    ),
+    one_call_current: bool = Option(
+        False,
+        "--one-call-current",
+        help="If this flag is set current weather will be displayed from the one call weather.",
+    ),
     terminal_width: Union[int, None] = Option(
         None, help="Allows for overriding the default terminal width."
     ),
@@ -272,6 +291,8 @@ def zip(
             pager=pager,
             clear_cache=clear_cache,
             terminal_width=terminal_width,
+            stale_ok=stale_ok,
+            one_call_current=one_call_current,
         )
     )
 
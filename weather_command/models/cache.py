@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Optional
+
+from camel_converter.pydantic_base import CamelBase
+
+from weather_command.models.location import Location
+from weather_command.models.weather import CurrentWeather, OneCallWeather
+
+# Increase when a change to the cached models means entries saved before it may no longer
+# validate.
+CACHE_SCHEMA_VERSION = 1
+
+
+class CacheDuration(CamelBase):
+    cache_duration_minutes: int = 15
+    date_time_saved: datetime
+
+
+class CurrentWeatherCache(CacheDuration):
+    current_weather: CurrentWeather
+
+
+class OneCallWeatherCache(CacheDuration):
+    one_call_weather: OneCallWeather
+
+
+class CacheItem(CamelBase):
+    location: Optional[Location] = None
+    location_saved: Optional[datetime] = None
+    current_weather: Optional[CurrentWeatherCache] = None
+    one_call_weather: Optional[OneCallWeatherCache] = None
+    last_accessed: Optional[datetime] = None
+    schema_version: int = CACHE_SCHEMA_VERSION
@@ -105,6 +105,8 @@ class OneCallCurrent(CamelBase):
     wind_deg: int = 0
     wind_gust: float = 0.0
     weather: List[Weather]
+    rain: Optional[PrecipAmount] = None
+    snow: Optional[PrecipAmount] = None
 
 
 class Temp(CamelBase):
@@ -154,5 +156,5 @@ class OneCallWeather(CamelBase):
     timezone_offset: int
     current: OneCallCurrent
     minutely: Optional[List[Minutely]] = None
-    hourly: List[Hourly]
-    daily: List[Daily]
+    hourly: Optional[List[Hourly]] = None
+    daily: Optional[List[Daily]] = None
@@ -2,7 +2,14 @@ from typing import Union
 
 from typer import Option, Typer
 
-from weather_command._config import Settings, TimeFormat, Units, console, load_settings
+from weather_command._config import (
+    CacheBackend,
+    Settings,
+    TimeFormat,
+    Units,
+    console,
+    load_settings,
+)
 
 app = Typer()
 
@@ -47,6 +54,54 @@ def api_key(
     console.print("API key successfully saved", style="green")
 
 
+@app.command()
+def cache_backend(
+    cache_backend: CacheBackend = Option(..., prompt=True, help="Storage used for cached data"),
+) -> None:
+    """Save the storage used for cached data. binary writes a smaller cache file than json, journal only appends changes instead of rewriting the cache file, sqlite keeps one row per location and can hold many more locations."""
+    settings = load_settings()
+    settings.cache_backend = cache_backend
+    settings.save()
+    console.print("Cache backend preference successfully saved", style="green")
+
+
+@app.command()
+def cache_size(
+    cache_size: int = Option(
+        ..., prompt=True, min=1, help="Maximum number of locations to keep cached"
+    ),
+) -> None:
+    """Save the maximum number of locations to keep cached. When full the least recently used location is removed."""
+    settings = load_settings()
+    settings.cache_size = cache_size
+    settings.save()
+    console.print("Cache size preference successfully saved", style="green")
+
+
+@app.command()
+def compress_cache(
+    compress_cache: bool = Option(..., prompt=True, help="Compress the binary cache file"),
+) -> None:
+    """Save preference for zlib compressing the cache file when the binary cache backend is used."""
+    settings = load_settings()
+    settings.compress_cache = compress_cache
+    settings.save()
+    console.print("Compress cache preference successfully saved", style="green")
+
+
+@app.command()
+def current_weather_cache_minutes(
+    current_weather_cache_minutes: int = Option(
+        ..., prompt=True, min=1, help="Minutes between current weather updates"
+    ),
+) -> None:
+    """Save how often current weather is updated. Cached current weather is refreshed this many minutes after it was observed."""
+    settings = load_settings()
+    settings.current_weather_cache_minutes = current_weather_cache_minutes
+    settings.save()
+    console.print("Current weather cache minutes preference successfully saved", style="green")
+
+
 @app.command()
 def delete() -> None:
     """Delete saved settings."""
@@ -55,6 +110,97 @@ def delete() -> None:
     console.print("Settings file successfully deleted", style="green")
 
 
+@app.command()
+def http2(
+    http2: bool = Option(..., prompt=True, help="Use HTTP/2 when the h2 package is installed"),
+) -> None:
+    """Save preference for making requests with HTTP/2. Requires installing httpx[http2]."""
+    settings = load_settings()
+    settings.http2 = http2
+    settings.save()
+    console.print("HTTP/2 preference successfully saved", style="green")
+
+
+@app.command()
+def location_cache_days(
+    location_cache_days: int = Option(
+        ..., prompt=True, min=1, help="Days to keep cached locations"
+    ),
+) -> None:
+    """Save the number of days to keep cached locations. Locations are kept until they are evicted when not set."""
+    settings = load_settings()
+    settings.location_cache_days = location_cache_days
+    settings.save()
+    console.print("Location cache days preference successfully saved", style="green")
+
+
+@app.command()
+def max_cache_bytes(
+    max_cache_bytes: int = Option(
+        ..., prompt=True, min=1, help="Maximum size of the cached data in bytes"
+    ),
+) -> None:
+    """Save the maximum size of the cached data. Minutely and hourly forecasts are removed before locations when it is reached."""
+    settings = load_settings()
+    settings.max_cache_bytes = max_cache_bytes
+    settings.save()
+    console.print("Max cache bytes preference successfully saved", style="green")
+
+
+@app.command()
+def max_connections(
+    max_connections: int = Option(
+        ..., prompt=True, min=1, help="Maximum open connections for requests"
+    ),
+) -> None:
+    """Save the number of connections that can be open at once. Requests made while this many are in use wait for one to be free."""
+    settings = load_settings()
+    settings.max_connections = max_connections
+    settings.save()
+    console.print("Max connections preference successfully saved", style="green")
+
+
+@app.command()
+def one_call_cache_minutes(
+    one_call_cache_minutes: int = Option(
+        ..., prompt=True, min=1, help="Minutes between forecast updates"
+    ),
+) -> None:
+    """Save how often daily and hourly forecasts are updated. Cached forecasts are refreshed this many minutes after they were observed."""
+    settings = load_settings()
+    settings.one_call_cache_minutes = one_call_cache_minutes
+    settings.save()
+    console.print("One call cache minutes preference successfully saved", style="green")
+
+
+@app.command()
+def one_call_current(
+    one_call_current: bool = Option(
+        ..., prompt=True, help="Display current weather from the one call weather"
+    ),
+) -> None:
+    """Save preference for displaying current weather from the one call weather so one request
+    serves every forecast type.
+    """
+    settings = load_settings()
+    settings.one_call_current = one_call_current
+    settings.save()
+    console.print("One call current preference successfully saved", style="green")
+
+
+@app.command()
+def reuse_radius_km(
+    reuse_radius_km: float = Option(
+        ..., prompt=True, min=0, help="Kilometers within which cached weather is reused"
+    ),
+) -> None:
+    """Save how close another cached location has to be for its weather to be reused for a new search. Set to 0 to only use weather cached for the location searched."""
+    settings = load_settings()
+    settings.reuse_radius_km = reuse_radius_km
+    settings.save()
+    console.print("Reuse radius preference successfully saved", style="green")
+
+
 @app.command()
 def saved_settings() -> None:
     """Display saved settings."""
@@ -62,6 +208,17 @@ def saved_settings() -> None:
     console.print(settings.display_values)
 
 
+@app.command()
+def stale_ok(
+    stale_ok: bool = Option(..., prompt=True, help="Display expired weather while refreshing it"),
+) -> None:
+    """Save preference for displaying expired cached weather and refreshing it afterwards."""
+    settings = load_settings()
+    settings.stale_ok = stale_ok
+    settings.save()
+    console.print("Stale ok preference successfully saved", style="green")
+
+
 @app.command()
 def temp_only(temp_only: bool = Option(..., prompt=True, help="Only display temperate")) -> None:
     """Save preference for displaying only temperature."""